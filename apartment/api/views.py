@@ -3,13 +3,18 @@ import logging
 from urllib.parse import quote
 
 from dateutil import parser
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import Http404, HttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import RetrieveUpdateAPIView
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -20,10 +25,11 @@ from apartment.api.serializers import (
 )
 from apartment.elastic.queries import (
     get_apartment_uuids,
-    get_apartments,
     get_project,
     get_project_apartment_sale_state_counts,
     get_projects,
+    iter_apartments,
+    iter_projects,
 )
 from apartment.models import ProjectExtraData
 from application_form.api.sales.serializers import (
@@ -40,6 +46,14 @@ from application_form.models import (
     ApartmentReservationStateChangeEvent,
     LotteryEvent,
 )
+from application_form.pdf.batch import (
+    BATCH_OUTPUT_PDF,
+    BATCH_OUTPUT_ZIP,
+    BATCH_OUTPUTS,
+    bundle_project_documents,
+    render_project_contracts,
+    render_project_invoices,
+)
 from application_form.services.export import (
     ApplicantExportService,
     ApplicantMailingListExportService,
@@ -47,20 +61,64 @@ from application_form.services.export import (
     XlsxSalesReportExportService,
 )
 from application_form.services.queue import preview_queue_change
+from invoicing.enums import InstallmentType
 from users.enums import UserKeyValueKeys
 from users.models import UserKeyValue
 
 _logger = logging.getLogger(__name__)
 
 
+def _stream_json_list(objects, serializer_class, **serializer_kwargs):
+    """Serialize the objects one by one into a JSON array as they are consumed."""
+    renderer = JSONRenderer()
+    objects = iter(objects)
+    first = next(objects, None)
+    if first is None:
+        yield b"[]"
+        return
+
+    yield b"[" + renderer.render(serializer_class(first, **serializer_kwargs).data)
+    for obj in objects:
+        yield b"," + renderer.render(serializer_class(obj, **serializer_kwargs).data)
+    yield b"]"
+
+
+def _json_list_response(objects, serializer_class, **serializer_kwargs):
+    """Stream the objects as a JSON array.
+
+    The first page of the objects is fetched and serialized before the response is
+    built, so that errors up to that point are handled as usual. Later errors can
+    only cut the array short, since the status has already been sent.
+    """
+    chunks = _stream_json_list(objects, serializer_class, **serializer_kwargs)
+    first_chunk = next(chunks)
+    return StreamingHttpResponse(
+        itertools.chain([first_chunk], chunks), content_type="application/json"
+    )
+
+
+def _csv_export_response(export_service, file_name):
+    """Stream the CSV of the export service as an attachment."""
+    chunks = export_service.iter_csv_chunks()
+    # Build the first chunk right away so that errors are handled as usual
+    first_chunk = next(chunks)
+    response = StreamingHttpResponse(
+        itertools.chain([first_chunk], chunks),
+        content_type="text/csv; charset=utf-8-sig",
+    )
+    response["Content-Disposition"] = "attachment; filename={file_name}.csv".format(
+        file_name=file_name
+    )
+    return response
+
+
 class ApartmentAPIView(APIView):
     http_method_names = ["get"]
 
     def get(self, request):
         project_uuid = request.GET.get("project_uuid", None)
-        apartments = get_apartments(project_uuid)
-        serializer = ApartmentDocumentSerializer(apartments, many=True)
-        return Response(serializer.data)
+        apartments = iter_apartments(project_uuid)
+        return _json_list_response(apartments, ApartmentDocumentSerializer)
 
 
 class ApartmentReservationsAPIView(APIView):
@@ -139,7 +197,6 @@ class ProjectExportApplicantsAPIView(APIView):
             apartment_uuid__in=apartment_uuids
         )
         export_services = ApplicantExportService(reservations)
-        csv_file = export_services.get_csv_string()
         project_address = project.project_street_address
 
         file_name = quote(
@@ -148,11 +205,7 @@ class ProjectExportApplicantsAPIView(APIView):
                 title=project_address,
             ).replace(" ", "_")
         )
-        response = HttpResponse(csv_file, content_type="text/csv; charset=utf-8-sig")
-        response["Content-Disposition"] = "attachment; filename={file_name}.csv".format(
-            file_name=file_name
-        )
-        return response
+        return _csv_export_response(export_services, file_name)
 
 
 class ProjectExportApplicantsMailingListAPIView(APIView):
@@ -178,16 +231,114 @@ class ProjectExportApplicantsMailingListAPIView(APIView):
         )
 
         export_services = ApplicantMailingListExportService(reservations, export_type)
-        csv_file = export_services.get_csv_string()
         file_name = format_lazy(
             _("[Project {title}] Applicants information"),
             title=project.project_street_address,
         ).replace(" ", "_")
-        response = HttpResponse(csv_file, content_type="text/csv; charset=utf-8-sig")
-        response["Content-Disposition"] = "attachment; filename={file_name}.csv".format(
-            file_name=file_name
-        )
-        return response
+        return _csv_export_response(export_services, file_name)
+
+
+def _get_batch_output(request):
+    output = request.query_params.get("output", BATCH_OUTPUT_ZIP)
+    if output not in BATCH_OUTPUTS:
+        raise ValidationError(f"Unknown output: {output}")
+    return output
+
+
+def _project_documents_response(documents, output, file_name):
+    """Return the documents of a project as a ZIP file or a single PDF attachment."""
+    if not documents:
+        raise Http404
+    content_type = {
+        BATCH_OUTPUT_ZIP: "application/zip",
+        BATCH_OUTPUT_PDF: "application/pdf",
+    }[output]
+    response = HttpResponse(
+        bundle_project_documents(documents, output), content_type=content_type
+    )
+    response["Content-Disposition"] = f"attachment; filename={file_name}.{output}"
+    return response
+
+
+_BATCH_OUTPUT_PARAMETER = OpenApiParameter(
+    name="output",
+    description="Either zip (default) for a PDF file of each apartment, or pdf for "
+    "a single PDF file of all the apartments.",
+    type=str,
+    enum=BATCH_OUTPUTS,
+    location=OpenApiParameter.QUERY,
+    required=False,
+)
+
+
+@extend_schema(
+    description="Create the contracts of all the reserved apartments of the project.",
+    parameters=[_BATCH_OUTPUT_PARAMETER],
+    responses={
+        (200, "application/zip"): OpenApiTypes.BINARY,
+        (200, "application/pdf"): OpenApiTypes.BINARY,
+    },
+)
+class ProjectContractsAPIView(APIView):
+    http_method_names = ["get"]
+
+    def get(self, request, project_uuid):
+        output = _get_batch_output(request)
+        data = request.query_params
+        salesperson_uuid = data.get("salesperson_uuid")
+
+        salesperson = request.user
+        if salesperson_uuid:
+            try:
+                salesperson = get_user_model().objects.get(uuid=salesperson_uuid)
+            except (get_user_model().DoesNotExist, DjangoValidationError):
+                raise ValidationError(f"Unknown salesperson: {salesperson_uuid}")
+
+        try:
+            documents = render_project_contracts(
+                project_uuid,
+                salesperson=salesperson,
+                sales_price_paid_place=data.get("sales_price_paid_place"),
+                sales_price_paid_time=data.get("sales_price_paid_time"),
+            )
+        except ObjectDoesNotExist:
+            raise NotFound()
+        except ValueError as e:
+            raise ValidationError(str(e))
+        return _project_documents_response(documents, output, "sopimukset")
+
+
+@extend_schema(
+    description="Create the invoices of all the reserved apartments of the project.",
+    parameters=[
+        _BATCH_OUTPUT_PARAMETER,
+        OpenApiParameter(
+            name="types",
+            description="Comma-separated installment types.",
+            type={"type": "array", "items": {"type": "string"}},
+            location=OpenApiParameter.QUERY,
+            required=False,
+        ),
+    ],
+    responses={
+        (200, "application/zip"): OpenApiTypes.BINARY,
+        (200, "application/pdf"): OpenApiTypes.BINARY,
+    },
+)
+class ProjectInvoicesAPIView(APIView):
+    http_method_names = ["get"]
+
+    def get(self, request, project_uuid):
+        output = _get_batch_output(request)
+        types = None
+        if type_params := request.query_params.get("types"):
+            types = [e for e in InstallmentType if e.value in type_params.split(",")]
+
+        try:
+            documents = render_project_invoices(project_uuid, installment_types=types)
+        except ObjectDoesNotExist:
+            raise NotFound()
+        return _project_documents_response(documents, output, "laskut")
 
 
 class ProjectExportLotteryResultsAPIView(APIView):
@@ -202,18 +353,13 @@ class ProjectExportLotteryResultsAPIView(APIView):
         if LotteryEvent.objects.filter(apartment_uuid__in=apartment_uuids).count() == 0:
             raise ValidationError("Project lottery has not happened yet")
         export_services = ProjectLotteryResultExportService(project)
-        csv_file = export_services.get_csv_string()
         file_name = quote(
             format_lazy(
                 _("[Project {title}] Lottery result"),
                 title=project.project_street_address,
             ).replace(" ", "_")
         )
-        response = HttpResponse(csv_file, content_type="text/csv; charset=utf-8-sig")
-        response["Content-Disposition"] = "attachment; filename={file_name}.csv".format(
-            file_name=file_name
-        )
-        return response
+        return _csv_export_response(export_services, file_name)
 
 
 class SaleReportSelectedProjectsAPIView(APIView):
@@ -226,24 +372,18 @@ class SaleReportSelectedProjectsAPIView(APIView):
             key=UserKeyValueKeys.INCLUDE_SALES_REPORT_PROJECT_UUID.value,
         ).values_list("value", flat=True)
 
-        # filter projects
-        project_data = [
-            project
-            for project in get_projects()
-            if project.project_uuid in included_project_uuids
-        ]
-
+        included_project_uuids = list(included_project_uuids)
         apartment_sale_state_counts = get_project_apartment_sale_state_counts(
-            [str(project.project_uuid) for project in project_data]
+            included_project_uuids
         )
-        serializer = ProjectDocumentListSerializer(
-            project_data,
-            many=True,
+        projects = iter_projects(included_project_uuids)
+        return _json_list_response(
+            projects,
+            ProjectDocumentListSerializer,
             context={
                 "apartment_sale_state_counts": apartment_sale_state_counts,
             },
         )
-        return Response(serializer.data)
 
 
 class SaleReportAPIView(APIView):
@@ -0,0 +1,221 @@
+"""
+Read-through cache for documents fetched from Elasticsearch.
+
+Lookups wrapped with `cached_document` are memoized in two tiers:
+
+* A per-request tier that lives inside `document_cache_scope()`. The scope is opened
+  by `ElasticDocumentCacheMiddleware` for every request, so repeated lookups of the
+  same document during a request cost a dict access.
+* An optional process-wide tier on top of a Django cache backend
+  (`ELASTIC_DOCUMENT_CACHE_ALIAS`). It is enabled by setting
+  `ELASTIC_DOCUMENT_CACHE_TIMEOUT` to a positive number of seconds. With the default
+  `locmemcache://` backend this is a per-process LRU cache with a TTL.
+
+Documents are never written by this service, so entries only need to be dropped when
+the data in Elasticsearch is known to have changed; use `invalidate_apartment`,
+`invalidate_project` or `clear_document_cache` for that.
+"""
+
+import functools
+import inspect
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+_KEY_PREFIX = "elastic-document"
+_GENERATION_KEY = f"{_KEY_PREFIX}:generation"
+
+_request_cache: ContextVar[Optional[Dict[Tuple, Any]]] = ContextVar(
+    "elastic_document_request_cache", default=None
+)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Return the hit/miss counters of this process."""
+    with _stats_lock:
+        return {
+            "request_hits": _stats["request_hits"],
+            "shared_hits": _stats["shared_hits"],
+            "misses": _stats["misses"],
+        }
+
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+@contextmanager
+def document_cache_scope():
+    """Memoize cached lookups until the scope is exited.
+
+    Nested scopes share the outermost scope's cache.
+    """
+    if _request_cache.get() is not None:
+        yield
+        return
+
+    token = _request_cache.set({})
+    try:
+        yield
+    finally:
+        _request_cache.reset(token)
+
+
+class ElasticDocumentCacheMiddleware:
+    """Open a document cache scope for the duration of each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with document_cache_scope():
+            return self.get_response(request)
+
+
+def _shared_cache():
+    if not settings.ELASTIC_DOCUMENT_CACHE_TIMEOUT:
+        return None
+    return caches[settings.ELASTIC_DOCUMENT_CACHE_ALIAS]
+
+
+def _new_generation() -> int:
+    # Start from the current time so that a lost generation key can never bring
+    # back entries of an earlier generation
+    return time.time_ns()
+
+
+def _shared_key(cache, key: Tuple) -> str:
+    # Bumping the generation is how the whole shared tier is cleared without having
+    # to know which keys it holds.
+    generation = cache.get_or_set(_GENERATION_KEY, _new_generation, timeout=None)
+    return ":".join([_KEY_PREFIX, str(generation), *(str(part) for part in key)])
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def cached_document(kind: str) -> Callable:
+    """Decorate a lookup function so its results go through the document cache.
+
+    The cache key consists of `kind` and the bound arguments of the call, with the
+    defaults applied, so `f(x)` and `f(x, False)` share an entry. Exceptions are not
+    cached. The undecorated function is available as `uncached`.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (kind,) + tuple(_normalize(v) for v in bound.arguments.values())
+
+            request_cache = _request_cache.get()
+            if request_cache is not None and key in request_cache:
+                _count("request_hits")
+                return request_cache[key]
+
+            shared_cache = _shared_cache()
+            value = None
+            if shared_cache is not None:
+                value = shared_cache.get(_shared_key(shared_cache, key))
+
+            if value is not None:
+                _count("shared_hits")
+            else:
+                _count("misses")
+                value = func(*args, **kwargs)
+                if shared_cache is not None:
+                    shared_cache.set(
+                        _shared_key(shared_cache, key),
+                        value,
+                        timeout=settings.ELASTIC_DOCUMENT_CACHE_TIMEOUT,
+                    )
+
+            if request_cache is not None:
+                request_cache[key] = value
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+def prime_cache(kind: str, value: Any, *args: Hashable) -> None:
+    """Store a document fetched by other means under the key `cached_document(kind)`
+    would use for `args`, e.g. the results of a bulk lookup."""
+    key = (kind,) + tuple(_normalize(arg) for arg in args)
+    request_cache = _request_cache.get()
+    if request_cache is not None:
+        request_cache[key] = value
+
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        shared_cache.set(
+            _shared_key(shared_cache, key),
+            value,
+            timeout=settings.ELASTIC_DOCUMENT_CACHE_TIMEOUT,
+        )
+
+
+def _invalidate(*key: Hashable) -> None:
+    key = tuple(_normalize(part) for part in key)
+    request_cache = _request_cache.get()
+    if request_cache is not None:
+        request_cache.pop(key, None)
+
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(_shared_key(shared_cache, key))
+
+
+def invalidate_apartment(apartment_uuid) -> None:
+    """Drop the cached documents of a single apartment."""
+    for include_project_fields in (False, True):
+        _invalidate("apartment", apartment_uuid, include_project_fields)
+
+
+def invalidate_project(project_uuid) -> None:
+    """Drop the cached project document, its apartment uuid list and every apartment
+    of the project, since apartment documents embed the project fields."""
+    from apartment.elastic.queries import get_apartment_uuids
+
+    for apartment_uuid in get_apartment_uuids.uncached(project_uuid):
+        invalidate_apartment(apartment_uuid)
+    _invalidate("project", project_uuid)
+    _invalidate("apartment_uuids", project_uuid)
+
+
+def clear_document_cache() -> None:
+    """Drop every cached document in both tiers."""
+    request_cache = _request_cache.get()
+    if request_cache is not None:
+        request_cache.clear()
+
+    shared_cache = _shared_cache()
+    if shared_cache is not None:
+        try:
+            shared_cache.incr(_GENERATION_KEY)
+        except ValueError:
+            shared_cache.set(_GENERATION_KEY, _new_generation(), timeout=None)
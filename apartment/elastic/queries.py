@@ -1,14 +1,22 @@
 from collections import defaultdict
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from django.core.exceptions import ObjectDoesNotExist
 from elasticsearch_dsl import search
 
+from apartment.elastic.cache import cached_document, prime_cache
 from apartment.elastic.documents import ApartmentDocument
 from apartment.elastic.elastic_utils import resolve_es_field
 from application_form.enums import ApartmentReservationState
 from application_form.models import ApartmentReservation
 
+# Maximum number of apartments fetched with a single query. Must not exceed the
+# index.max_result_window of the apartment index.
+_MULTI_GET_CHUNK_SIZE = 1000
+
+# Number of documents fetched per request when streaming search results
+_STREAM_PAGE_SIZE = 500
+
 
 def _project_sale_state_counter_defaults() -> Dict[str, int]:
     return {
@@ -32,21 +40,25 @@ def _bucket_for_reservation_states(reservation_states: List) -> str:
 
 
 def apartment_query(**kwargs):
+    return list(iter_apartment_query(**kwargs))
+
+
+def iter_apartment_query(**kwargs) -> Iterator[ApartmentDocument]:
     search = _filter_apartments_with_keywords(**kwargs)
-    count = search.count()
-    response = search[0:count].execute()
-    return response
+    return _stream_search(search)
 
 
 def project_query(**kwargs):
+    return list(iter_project_query(**kwargs))
+
+
+def iter_project_query(**kwargs) -> Iterator[ApartmentDocument]:
     search = _filter_apartments_with_keywords(**kwargs)
     search = _filter_out_apartments(search)
-
-    count = search.count()
-    response = search[0:count].execute()
-    return response
+    return _stream_collapsed_search(search)
 
 
+@cached_document("apartment")
 def get_apartment(apartment_uuid, include_project_fields=False):
     search = ApartmentDocument.search()
 
@@ -65,6 +77,39 @@ def get_apartment(apartment_uuid, include_project_fields=False):
     return apartment
 
 
+def get_apartments_by_uuids(
+    apartment_uuids: Iterable, include_project_fields=False
+) -> Dict[str, ApartmentDocument]:
+    """Fetch the given apartments with as few queries as possible.
+
+    Returns a dict of apartment documents keyed by the apartment uuid string.
+    Apartments that do not exist in ElasticSearch are left out.
+    """
+    apartment_uuid_list = sorted(
+        {str(apartment_uuid) for apartment_uuid in apartment_uuids}
+    )
+
+    apartments = {}
+    for start in range(0, len(apartment_uuid_list), _MULTI_GET_CHUNK_SIZE):
+        end = start + _MULTI_GET_CHUNK_SIZE
+        chunk = apartment_uuid_list[start:end]
+        search = ApartmentDocument.search()
+        search = search.filter("terms", **{resolve_es_field("uuid"): chunk})
+        search = search.extra(size=len(chunk))
+
+        if not include_project_fields:
+            search = search.source(excludes=["project_*"])
+
+        for apartment in search.execute():
+            apartments[str(apartment.uuid)] = apartment
+
+    # Later single lookups of these apartments can be served from the cache
+    for apartment_uuid, apartment in apartments.items():
+        prime_cache("apartment", apartment, apartment_uuid, include_project_fields)
+
+    return apartments
+
+
 def get_apartment_project_uuid(apartment_uuid):
     search = ApartmentDocument.search()
 
@@ -82,6 +127,12 @@ def get_apartment_project_uuid(apartment_uuid):
 
 
 def get_apartments(project_uuid=None, include_project_fields=False):
+    return list(iter_apartments(project_uuid, include_project_fields))
+
+
+def iter_apartments(
+    project_uuid=None, include_project_fields=False
+) -> Iterator[ApartmentDocument]:
     search = ApartmentDocument.search()
 
     # Filters
@@ -94,13 +145,35 @@ def get_apartments(project_uuid=None, include_project_fields=False):
     if not include_project_fields:
         search = search.source(excludes=["project_*"])
 
-    # Get all items
-    count = search.count()
-    response = search[0:count].execute()
+    return _stream_search(search)
 
-    return response
 
+def get_apartments_by_project_uuids(
+    project_uuids: Iterable[str], include_project_fields=False
+) -> Dict[str, List[ApartmentDocument]]:
+    """Fetch the apartments of the given projects with a single search.
+
+    Returns a dict of apartment document lists keyed by the project uuid string.
+    Projects without apartments are left out.
+    """
+    project_uuid_list = sorted({str(project_uuid) for project_uuid in project_uuids})
+    if not project_uuid_list:
+        return {}
 
+    search = ApartmentDocument.search()
+    search = search.filter(
+        "terms", **{resolve_es_field("project_uuid"): project_uuid_list}
+    )
+    if not include_project_fields:
+        search = search.source(excludes=["project_*"])
+
+    apartments_by_project_uuid = defaultdict(list)
+    for apartment in _stream_search(search):
+        apartments_by_project_uuid[str(apartment.project_uuid)].append(apartment)
+    return dict(apartments_by_project_uuid)
+
+
+@cached_document("apartment_uuids")
 def get_apartment_uuids(project_uuid) -> List[str]:
     search = ApartmentDocument.search()
 
@@ -116,6 +189,7 @@ def get_apartment_uuids(project_uuid) -> List[str]:
     return result
 
 
+@cached_document("project")
 def get_project(project_uuid):
     search = ApartmentDocument.search()
 
@@ -140,18 +214,26 @@ def get_project(project_uuid):
 
 
 def get_projects():
+    return list(iter_projects())
+
+
+def iter_projects(
+    project_uuids: Optional[Iterable[str]] = None,
+) -> Iterator[ApartmentDocument]:
     search = ApartmentDocument.search()
 
+    if project_uuids is not None:
+        search = search.filter(
+            "terms",
+            **{resolve_es_field("project_uuid"): [str(u) for u in project_uuids]},
+        )
+
     # Project data needs to exist in apartment data
     search = search.filter("exists", field="project_id")
 
     search = _filter_out_apartments(search)
 
-    # Get all items
-    count = search.count()
-    response = search[0:count].execute()
-
-    return response
+    return _stream_collapsed_search(search)
 
 
 def get_project_apartment_sale_state_counts(
@@ -250,3 +332,48 @@ def _filter_out_apartments(search: search.Search) -> ApartmentDocument:
     search = search.source(["project_*"])
 
     return search
+
+
+def _stream_search(search: search.Search) -> Iterator[ApartmentDocument]:
+    """Yield every hit of the search, fetching them page by page with search_after.
+
+    Unlike counting the hits first and then fetching all of them at once, a result
+    set smaller than a page costs a single request and memory use is bounded by the
+    page size. The hits are sorted only by the unique uuid, since the index order of
+    `_doc` can change between the requests when the index is refreshed or merged,
+    which would skip or repeat hits.
+    """
+    search = search.sort(resolve_es_field("uuid"))
+    search = search.extra(size=_STREAM_PAGE_SIZE)
+
+    search_after = None
+    while True:
+        page = search
+        if search_after is not None:
+            page = search.extra(search_after=search_after)
+
+        response = page.execute()
+        yield from response
+
+        if len(response.hits) < _STREAM_PAGE_SIZE:
+            return
+        search_after = list(response.hits[-1].meta.sort)
+
+
+def _stream_collapsed_search(search: search.Search) -> Iterator[ApartmentDocument]:
+    """Yield every hit of a collapsed search page by page.
+
+    search_after and scroll cannot be combined with field collapsing, so the pages
+    are fetched with from/size. This is fine for the number of projects there are.
+    """
+    search = search.sort("project_id")
+
+    start = 0
+    while True:
+        end = start + _STREAM_PAGE_SIZE
+        response = search[start:end].execute()
+        yield from response
+
+        if len(response.hits) < _STREAM_PAGE_SIZE:
+            return
+        start = end
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from apartment.elastic.cache import (
+    clear_document_cache,
+    invalidate_apartment,
+    invalidate_project,
+)
+from connections.utils import create_elastic_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Drop cached ElasticSearch documents after the index has been updated. "
+        "Without arguments every cached document is dropped. Only caches on a "
+        "backend shared by the processes (not locmemcache://) can be cleared from "
+        "here; entries of a per-process cache expire by their timeout only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--project",
+            action="append",
+            default=[],
+            help="UUID of a project whose documents are dropped. Can be repeated.",
+        )
+        parser.add_argument(
+            "--apartment",
+            action="append",
+            default=[],
+            help="UUID of an apartment whose documents are dropped. Can be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["project"] and not options["apartment"]:
+            clear_document_cache()
+            self.stdout.write("Dropped all cached documents")
+            return
+
+        if options["project"]:
+            # the apartments of the projects are looked up from ElasticSearch
+            create_elastic_connection()
+        for project_uuid in options["project"]:
+            invalidate_project(project_uuid)
+        for apartment_uuid in options["apartment"]:
+            invalidate_apartment(apartment_uuid)
+        self.stdout.write(
+            f"Dropped the cached documents of {len(options['project'])} projects and "
+            f"{len(options['apartment'])} apartments"
+        )
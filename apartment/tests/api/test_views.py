@@ -1,10 +1,17 @@
+import codecs
+import json
 import uuid
+import zipfile
 from datetime import datetime, timedelta
+from io import BytesIO
 from urllib.parse import quote, urlencode
 
 import pytest
 from django.urls import reverse
+from elasticsearch.exceptions import ConnectionError as ElasticConnectionError
 
+from apartment.api.serializers import ProjectDocumentListSerializer
+from apartment.api.views import _json_list_response
 from apartment.models import ProjectExtraData
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.enums import (
@@ -24,11 +31,17 @@ from application_form.tests.factories import (
     LotteryEventFactory,
 )
 from customer.tests.factories import CustomerFactory
+from invoicing.enums import InstallmentType
+from invoicing.tests.factories import ApartmentInstallmentFactory
 from users.enums import UserKeyValueKeys
 from users.models import UserKeyValue
 from users.tests.utils import assert_customer_match_data
 
 
+def _streamed_json(response):
+    return json.loads(b"".join(response.streaming_content))
+
+
 @pytest.mark.django_db
 @pytest.mark.usefixtures("elastic_apartments")
 def test_apartment_list_get_unauthorized(
@@ -50,7 +63,7 @@ def test_apartment_list_get(sales_ui_salesperson_api_client):
         reverse("apartment:apartment-list"), format="json"
     )
     assert response.status_code == 200
-    assert len(response.data) > 0
+    assert len(_streamed_json(response)) > 0
 
 
 @pytest.mark.django_db
@@ -65,8 +78,12 @@ def test_apartment_list_get_with_project_uuid(
         format="json",
     )
     assert response.status_code == 200
-    assert len(response.data) == 5
-    assert response.data[0].get("uuid") == apartments[0].uuid
+    data = _streamed_json(response)
+    assert len(data) == 5
+    # the apartments are listed in the order of their uuids
+    assert [item.get("uuid") for item in data] == sorted(
+        apartment.uuid for apartment in apartments
+    )
 
 
 @pytest.mark.django_db
@@ -212,7 +229,7 @@ def test_selected_project_list_get(
         reverse("apartment:report-selected-project-list"), format="json"
     )
     assert response.status_code == 200
-    assert len(response.data) == 0
+    assert len(_streamed_json(response)) == 0
 
     UserKeyValue.objects.create(
         user=sales_ui_salesperson_api_client.user,
@@ -225,7 +242,7 @@ def test_selected_project_list_get(
         reverse("apartment:report-selected-project-list"), format="json"
     )
     assert response.status_code == 200
-    assert project_uuid in [p["uuid"] for p in response.data]
+    assert project_uuid in [p["uuid"] for p in _streamed_json(response)]
 
 
 @pytest.mark.django_db
@@ -607,6 +624,9 @@ def test_export_applicants_csv_per_project(
     # see: https://stackoverflow.com/a/23868112
     assert "," not in content_disposition_header
     assert response.status_code == 200
+    content = b"".join(response.streaming_content)
+    assert content.startswith(codecs.BOM_UTF8)
+    assert content.decode("utf-8-sig").startswith('"Primary applicant";')
 
 
 @pytest.mark.django_db
@@ -1003,3 +1023,87 @@ def test_get_project_detail_extra_data_field(
         else {"offer_message_intro": "", "offer_message_content": ""}
     )
     assert response.data["extra_data"] == expected
+
+
+@pytest.mark.django_db
+def test_project_invoices_unauthorized(user_api_client):
+    response = user_api_client.get(
+        reverse(
+            "apartment:project-detail-invoices",
+            kwargs={"project_uuid": uuid.uuid4()},
+        )
+    )
+    assert response.status_code == 403
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("output", ("zip", "pdf"))
+def test_project_invoices(sales_ui_salesperson_api_client, output):
+    project_uuid = uuid.uuid4()
+    apartments = [
+        ApartmentDocumentFactory(project_uuid=project_uuid, apartment_number=number)
+        for number in ("A2", "A1", "B1")
+    ]
+    reservations = [
+        ApartmentReservationFactory(
+            apartment_uuid=apartment.uuid,
+            state=ApartmentReservationState.RESERVED,
+            queue_position=1,
+            list_position=1,
+        )
+        for apartment in apartments
+    ]
+    for reservation in reservations[:2]:
+        ApartmentInstallmentFactory(
+            apartment_reservation=reservation, type=InstallmentType.PAYMENT_1
+        )
+
+    response = sales_ui_salesperson_api_client.get(
+        reverse(
+            "apartment:project-detail-invoices",
+            kwargs={"project_uuid": project_uuid},
+        ),
+        {"output": output},
+    )
+
+    assert response.status_code == 200
+    assert response["Content-Disposition"] == f"attachment; filename=laskut.{output}"
+    if output == "zip":
+        assert response["Content-Type"] == "application/zip"
+        with zipfile.ZipFile(BytesIO(response.content)) as zip_file:
+            # only the reservations with installments are invoiced
+            assert len(zip_file.namelist()) == 2
+            assert all(name.endswith(".pdf") for name in zip_file.namelist())
+    else:
+        assert response["Content-Type"] == "application/pdf"
+        for reservation in reservations[:2]:
+            assert (
+                reservation.customer.primary_profile.full_name.encode()
+                in response.content
+            )
+
+
+@pytest.mark.django_db
+def test_project_invoices_invalid_output(sales_ui_salesperson_api_client):
+    response = sales_ui_salesperson_api_client.get(
+        reverse(
+            "apartment:project-detail-invoices",
+            kwargs={"project_uuid": uuid.uuid4()},
+        ),
+        {"output": "tar"},
+    )
+    assert response.status_code == 400
+
+
+def test_json_list_response_fetches_the_first_page_before_responding():
+    def failing_search():
+        raise ElasticConnectionError("N/A", "unavailable", None)
+        yield
+
+    with pytest.raises(ElasticConnectionError):
+        _json_list_response(failing_search(), ProjectDocumentListSerializer)
+
+
+def test_json_list_response_empty_list():
+    response = _json_list_response([], ProjectDocumentListSerializer)
+    assert _streamed_json(response) == []
@@ -0,0 +1,147 @@
+from io import StringIO
+from unittest.mock import Mock
+
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.management import call_command
+from django.test import override_settings
+
+from apartment.elastic.cache import (
+    cached_document,
+    clear_document_cache,
+    document_cache_scope,
+    get_cache_stats,
+    invalidate_apartment,
+    reset_cache_stats,
+)
+from apartment.elastic.queries import get_apartment
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    reset_cache_stats()
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _cached_lookup():
+    lookup = Mock(side_effect=lambda *args: {"args": args})
+
+    @cached_document("apartment")
+    def cached(apartment_uuid, include_project_fields=False):
+        return lookup(apartment_uuid, include_project_fields)
+
+    return lookup, cached
+
+
+def test_lookups_are_not_memoized_outside_of_a_scope():
+    lookup, cached = _cached_lookup()
+
+    cached("a")
+    cached("a")
+
+    assert lookup.call_count == 2
+    assert get_cache_stats() == {"request_hits": 0, "shared_hits": 0, "misses": 2}
+
+
+def test_lookups_are_memoized_inside_a_scope():
+    lookup, cached = _cached_lookup()
+
+    with document_cache_scope():
+        first = cached("a")
+        # Default arguments are applied before building the key
+        assert cached("a", False) is first
+        cached("a", include_project_fields=True)
+        with document_cache_scope():
+            assert cached("a") is first
+
+    assert lookup.call_count == 2
+    assert get_cache_stats() == {"request_hits": 2, "shared_hits": 0, "misses": 2}
+
+
+def test_exceptions_are_not_cached():
+    lookup = Mock(side_effect=[ObjectDoesNotExist(), {"uuid": "a"}])
+    cached = cached_document("apartment")(lambda apartment_uuid: lookup(apartment_uuid))
+
+    with document_cache_scope():
+        with pytest.raises(ObjectDoesNotExist):
+            cached("a")
+        assert cached("a") == {"uuid": "a"}
+
+    assert lookup.call_count == 2
+
+
+@override_settings(ELASTIC_DOCUMENT_CACHE_TIMEOUT=60)
+def test_shared_tier_is_used_across_scopes():
+    lookup, cached = _cached_lookup()
+
+    with document_cache_scope():
+        cached("a")
+    with document_cache_scope():
+        assert cached("a") == {"args": ("a", False)}
+
+    assert lookup.call_count == 1
+    assert get_cache_stats() == {"request_hits": 0, "shared_hits": 1, "misses": 1}
+
+
+@override_settings(ELASTIC_DOCUMENT_CACHE_TIMEOUT=60)
+def test_invalidate_apartment_drops_both_tiers():
+    lookup, cached = _cached_lookup()
+
+    with document_cache_scope():
+        cached("a")
+        cached("a", True)
+        cached("b")
+        invalidate_apartment("a")
+        cached("a")
+        cached("a", True)
+        cached("b")
+
+    assert lookup.call_count == 5
+
+
+@override_settings(ELASTIC_DOCUMENT_CACHE_TIMEOUT=60)
+def test_clear_document_cache_drops_everything():
+    lookup, cached = _cached_lookup()
+
+    with document_cache_scope():
+        cached("a")
+        cached("b")
+        clear_document_cache()
+        cached("a")
+        cached("b")
+
+    assert lookup.call_count == 4
+
+
+@override_settings(ELASTIC_DOCUMENT_CACHE_TIMEOUT=60)
+def test_clear_elastic_document_cache_command():
+    lookup, cached = _cached_lookup()
+
+    cached("a")
+    cached("b")
+    call_command("clear_elastic_document_cache", "--apartment", "a", stdout=StringIO())
+    cached("a")
+    cached("b")
+    assert lookup.call_count == 3
+
+    call_command("clear_elastic_document_cache", stdout=StringIO())
+    cached("a")
+    cached("b")
+    assert lookup.call_count == 5
+
+
+@pytest.mark.django_db
+def test_get_apartment_is_memoized_per_request(elastic_apartments):
+    apartment_uuid = elastic_apartments[0].uuid
+
+    with document_cache_scope():
+        first = get_apartment(apartment_uuid, include_project_fields=True)
+        second = get_apartment(apartment_uuid, include_project_fields=True)
+
+    assert first is second
+    assert first.uuid == apartment_uuid
+    assert get_cache_stats()["misses"] == 1
+    assert get_cache_stats()["request_hits"] == 1
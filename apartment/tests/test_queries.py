@@ -0,0 +1,118 @@
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from apartment.elastic.cache import document_cache_scope, get_cache_stats
+from apartment.elastic.queries import (
+    get_apartment,
+    get_apartments_by_project_uuids,
+    get_apartments_by_uuids,
+    iter_apartments,
+    iter_projects,
+)
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_uuids(elastic_apartments):
+    wanted = elastic_apartments[:3]
+    missing_uuid = uuid.uuid4()
+
+    apartments = get_apartments_by_uuids(
+        [apartment.uuid for apartment in wanted] + [missing_uuid],
+        include_project_fields=True,
+    )
+
+    assert set(apartments) == {str(apartment.uuid) for apartment in wanted}
+    for apartment in wanted:
+        fetched = apartments[str(apartment.uuid)]
+        assert fetched.apartment_number == apartment.apartment_number
+        assert fetched.project_uuid == apartment.project_uuid
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_uuids_excludes_project_fields(elastic_apartments):
+    apartment = elastic_apartments[0]
+
+    apartments = get_apartments_by_uuids([apartment.uuid])
+
+    assert "project_uuid" not in apartments[str(apartment.uuid)]
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_uuids_empty():
+    assert get_apartments_by_uuids([]) == {}
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_uuids_uses_chunks(elastic_apartments):
+    apartment_uuids = [apartment.uuid for apartment in elastic_apartments]
+
+    with patch("apartment.elastic.queries._MULTI_GET_CHUNK_SIZE", 3):
+        apartments = get_apartments_by_uuids(apartment_uuids)
+
+    assert set(apartments) == {
+        str(apartment_uuid) for apartment_uuid in apartment_uuids
+    }
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_uuids_primes_cache(elastic_apartments):
+    apartment_uuids = [apartment.uuid for apartment in elastic_apartments]
+
+    with document_cache_scope():
+        apartments = get_apartments_by_uuids(
+            apartment_uuids, include_project_fields=True
+        )
+        misses = get_cache_stats()["misses"]
+        for apartment_uuid in apartment_uuids:
+            assert (
+                get_apartment(apartment_uuid, include_project_fields=True)
+                is apartments[str(apartment_uuid)]
+            )
+
+    assert get_cache_stats()["misses"] == misses
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_project_uuids(elastic_apartments):
+    project_uuids = {apartment.project_uuid for apartment in elastic_apartments}
+
+    apartments_by_project_uuid = get_apartments_by_project_uuids(
+        list(project_uuids) + [uuid.uuid4()], include_project_fields=True
+    )
+
+    assert set(apartments_by_project_uuid) == {str(u) for u in project_uuids}
+    for project_uuid, apartments in apartments_by_project_uuid.items():
+        assert sorted(apartment.uuid for apartment in apartments) == sorted(
+            apartment.uuid
+            for apartment in elastic_apartments
+            if str(apartment.project_uuid) == project_uuid
+        )
+
+
+@pytest.mark.django_db
+def test_get_apartments_by_project_uuids_empty():
+    assert get_apartments_by_project_uuids([]) == {}
+
+
+@pytest.mark.django_db
+def test_iter_apartments_pages_through_all_results(elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+
+    with patch("apartment.elastic.queries._STREAM_PAGE_SIZE", 2):
+        streamed = list(iter_apartments(project_uuid))
+
+    assert [apartment.uuid for apartment in streamed] == sorted(
+        apartment.uuid for apartment in apartments
+    )
+
+
+@pytest.mark.django_db
+def test_iter_projects_pages_through_all_results(elastic_apartments):
+    project_uuids = {apartment.project_uuid for apartment in elastic_apartments}
+
+    with patch("apartment.elastic.queries._STREAM_PAGE_SIZE", 3):
+        streamed = list(iter_projects(project_uuids))
+
+    assert sorted(project.project_uuid for project in streamed) == sorted(project_uuids)
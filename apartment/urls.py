@@ -6,10 +6,12 @@ from apartment.api.views import (
     ApartmentQueuePreviewAPIView,
     ApartmentReservationsAPIView,
     ProjectAPIView,
+    ProjectContractsAPIView,
     ProjectExportApplicantsAPIView,
     ProjectExportApplicantsMailingListAPIView,
     ProjectExportLotteryResultsAPIView,
     ProjectExtraDataAPIView,
+    ProjectInvoicesAPIView,
     SaleReportAPIView,
     SaleReportSelectedProjectsAPIView,
 )
@@ -65,6 +67,16 @@ urlpatterns = [
         ProjectExportLotteryResultsAPIView.as_view(),
         name="project-detail-lottery-result",
     ),
+    path(
+        "sales/projects/<uuid:project_uuid>/contracts/",
+        ProjectContractsAPIView.as_view(),
+        name="project-detail-contracts",
+    ),
+    path(
+        "sales/projects/<uuid:project_uuid>/invoices/",
+        ProjectInvoicesAPIView.as_view(),
+        name="project-detail-invoices",
+    ),
     path(
         "sales/projects/<uuid:project_uuid>/extra_data/",
         ProjectExtraDataAPIView.as_view(),
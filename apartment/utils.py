@@ -1,4 +1,6 @@
+from collections import defaultdict
 from datetime import datetime
+from typing import Dict
 
 from django.conf import settings
 
@@ -26,6 +28,34 @@ def get_apartment_state_from_apartment_uuid(apartment_uuid):
     ).value
 
 
+def get_apartment_states_from_apartment_uuids(apartment_uuids) -> Dict[str, str]:
+    """Bulk version of `get_apartment_state_from_apartment_uuid`.
+
+    Returns the states keyed by the apartment uuid string.
+    """
+    apartment_uuids = {str(apartment_uuid) for apartment_uuid in apartment_uuids}
+    reserved_states = defaultdict(list)
+    for apartment_uuid, reservation_state in (
+        ApartmentReservation.objects.reserved()
+        .filter(apartment_uuid__in=apartment_uuids)
+        .values_list("apartment_uuid", "state")
+    ):
+        reserved_states[str(apartment_uuid)].append(reservation_state)
+
+    states = {}
+    for apartment_uuid in apartment_uuids:
+        reservation_states = reserved_states.get(apartment_uuid, [])
+        if not reservation_states:
+            states[apartment_uuid] = ApartmentState.FREE.value
+        elif len(reservation_states) > 1:
+            states[apartment_uuid] = ApartmentState.REVIEW.value
+        else:
+            states[apartment_uuid] = ApartmentState.get_from_reserved_reservation_state(
+                reservation_states[0]
+            ).value
+    return states
+
+
 def get_apartment_state_of_sale_from_event(event):
     """
     If there is a reservation marked as Sold in Sales UI, the apartment state of sale
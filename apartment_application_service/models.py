@@ -4,6 +4,10 @@ from django.db import models
 from django.db.models import BooleanField, IntegerField
 from django.utils.translation import gettext_lazy as _
 
+# Added to the new batch's right of residence numbers so that they are ordered after
+# the old batch's numbers, see `right_of_residence_ordering_number`
+RIGHT_OF_RESIDENCE_NEW_BATCH_OFFSET = 100000000
+
 
 class TimestampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
@@ -50,14 +54,22 @@ class CommonApplicationData(models.Model):
         if self.right_of_residence_is_old_batch:
             return self.right_of_residence
         else:
-            return self.right_of_residence + 100000000
+            return self.right_of_residence + RIGHT_OF_RESIDENCE_NEW_BATCH_OFFSET
 
-    def save(self, *args, **kwargs):
+    def set_right_of_residence_is_old_batch(self) -> None:
+        """Keep `right_of_residence_is_old_batch` in line with `right_of_residence`.
+
+        Called on save. Must be called before saving with `bulk_create`, which skips
+        `save`.
+        """
         if self.right_of_residence is None:
             self.right_of_residence_is_old_batch = None
         elif self.right_of_residence_is_old_batch is None:
             # right_of_residence_is_old_batch default value is False
             self.right_of_residence_is_old_batch = False
+
+    def save(self, *args, **kwargs):
+        self.set_right_of_residence_is_old_batch()
         super().save(*args, **kwargs)
 
     class Meta:
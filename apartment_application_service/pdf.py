@@ -1,9 +1,13 @@
 import dataclasses
+import functools
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
 from decimal import Decimal
 from io import BytesIO
-from typing import ClassVar, Dict, Iterable, Optional, Union
+from typing import ClassVar, Dict, Iterable, List, Optional, Tuple, Union
 
+from django.conf import settings
 from pikepdf import Name, Pdf, String
 
 PDF_TEMPLATE_DIRECTORY = "pdf_templates"
@@ -15,6 +19,42 @@ class PDFError(Exception):
     pass
 
 
+@dataclasses.dataclass(frozen=True)
+class PDFFieldWidget:
+    """Location of a widget annotation of a form field in a PDF."""
+
+    page: int
+    annotation: int
+    # name of the parent field of a widget that has no field type of its own
+    parent_name: Optional[str] = None
+
+
+FieldIndex = Dict[str, List[PDFFieldWidget]]
+
+
+class PDFTemplate:
+    """A PDF template that is read and indexed only once per process.
+
+    Every document is filled in a copy of the template opened from the bytes kept in
+    memory, and the fields are looked up from the precomputed field index instead of
+    walking through all the annotations of the document.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.content = f.read()
+        with Pdf.open(BytesIO(self.content)) as pdf:
+            self.field_index = _build_field_index(pdf)
+
+    def open(self) -> Pdf:
+        return Pdf.open(BytesIO(self.content))
+
+
+@functools.lru_cache(maxsize=None)
+def get_pdf_template(path: str) -> PDFTemplate:
+    return PDFTemplate(path)
+
+
 @dataclasses.dataclass
 class PDFData:
     """Base class for data used to populate a PDF template's fields."""
@@ -86,22 +126,104 @@ class PDFCurrencyField:
         )
 
 
+# the data dict, the field font sizes and the default font size of a PDFData
+FillData = Tuple[DataDict, Dict[str, int], Optional[int]]
+
+
+def _get_fill_data(pdf_data: PDFData) -> FillData:
+    return (
+        pdf_data.to_data_dict(),
+        getattr(pdf_data, "FIELD_FONT_SIZES", {}),
+        getattr(pdf_data, "FIELD_DEFAULT_FONT_SIZE", None),
+    )
+
+
 def create_pdf(
     template_file_name: str, pdf_data_list: Union[PDFData, Iterable[PDFData]]
 ) -> BytesIO:
-    pdf: Optional[Pdf]
     if not isinstance(pdf_data_list, Iterable):
-        pdf_data_list = [pdf_data_list]
+        fill_data = _get_fill_data(pdf_data_list)
+    else:
+        fill_data = [_get_fill_data(pdf_data) for pdf_data in pdf_data_list]
+    return BytesIO(_fill_template(template_file_name, fill_data))
+
+
+def create_pdfs(
+    template_file_name: str,
+    documents: Iterable[Union[PDFData, Iterable[PDFData]]],
+    unique_field_names: bool = False,
+    processes: Optional[int] = None,
+) -> List[bytes]:
+    """
+    Create a PDF of each document like `create_pdf` does, and return their contents.
+
+    The templates are filled in a pool of `processes` processes, by default
+    `PDF_RENDER_PROCESSES` of them. With no processes they are filled in this process.
+
+    With `unique_field_names` every record gets field names of its own, so that the
+    documents can be combined with `merge_pdfs`.
+    """
+    jobs = []
+    first_idx = 0
+    for document in documents:
+        if unique_field_names and not isinstance(document, Iterable):
+            document = [document]
+        if isinstance(document, Iterable):
+            fill_data = [_get_fill_data(pdf_data) for pdf_data in document]
+        else:
+            fill_data = _get_fill_data(document)
+        jobs.append((template_file_name, fill_data, first_idx))
+        if unique_field_names:
+            first_idx += len(fill_data)
+
+    if processes is None:
+        processes = settings.PDF_RENDER_PROCESSES
+    if processes > 0 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(
+                executor.map(
+                    _fill_template,
+                    *zip(*jobs),
+                    chunksize=max(1, len(jobs) // (processes * 4)),
+                )
+            )
+    return [_fill_template(*job) for job in jobs]
+
+
+def merge_pdfs(pdfs: Iterable[bytes]) -> BytesIO:
+    """Combine the given PDFs into one."""
+    pdf = Pdf.new()
+    # the pages are copied from the source documents only when the PDF is saved
+    sources = []
+    for content in pdfs:
+        source = Pdf.open(BytesIO(content))
+        _append_pdf(pdf, source)
+        sources.append(source)
+
+    pdf_bytes = BytesIO()
+    pdf.save(pdf_bytes)
+    pdf_bytes.seek(0)
+    return pdf_bytes
+
+
+def _fill_template(
+    template_file_name: str,
+    fill_data: Union[FillData, List[FillData]],
+    first_idx: int = 0,
+) -> bytes:
+    pdf: Optional[Pdf]
+    if isinstance(fill_data, tuple):
+        fill_data = [fill_data]
         pdf = None
     else:
         pdf = Pdf.new()
 
-    for idx, pdf_data in enumerate(pdf_data_list):
-        field_font_sizes = getattr(pdf_data, "FIELD_FONT_SIZES", {})
-        field_default_font_size = getattr(pdf_data, "FIELD_DEFAULT_FONT_SIZE", None)
+    for idx, (data_dict, field_font_sizes, field_default_font_size) in enumerate(
+        fill_data, first_idx
+    ):
         single_pdf = _create_pdf(
             f"{PDF_TEMPLATE_DIRECTORY}/{template_file_name}",
-            pdf_data.to_data_dict(),
+            data_dict,
             idx,
             field_font_sizes,
             field_default_font_size,
@@ -109,18 +231,22 @@ def create_pdf(
         if pdf is None:  # Only one repetition of data
             pdf = single_pdf  # Output the single filled PDF
             break
-        if not hasattr(pdf.Root, "AcroForm") and hasattr(single_pdf.Root, "AcroForm"):
-            acroform = pdf.copy_foreign(single_pdf.Root.AcroForm)
-            pdf.Root.AcroForm = acroform
-            del pdf.Root.AcroForm.Fields
-            _set_need_appearances(pdf)
-        pdf.pages.extend(single_pdf.pages)
+        _append_pdf(pdf, single_pdf)
     pdf_bytes = BytesIO()
     if pdf is not None:
         pdf.save(pdf_bytes)
-    pdf_bytes.seek(0)
 
-    return pdf_bytes
+    return pdf_bytes.getvalue()
+
+
+def _append_pdf(pdf: Pdf, other: Pdf) -> None:
+    if not hasattr(pdf.Root, "AcroForm") and hasattr(other.Root, "AcroForm"):
+        acroform = pdf.copy_foreign(other.Root.AcroForm)
+        pdf.Root.AcroForm = acroform
+        if hasattr(pdf.Root.AcroForm, "Fields"):
+            del pdf.Root.AcroForm.Fields
+        _set_need_appearances(pdf)
+    pdf.pages.extend(other.pages)
 
 
 def _get_checkbox_checked_value(annotation: object):
@@ -155,26 +281,19 @@ def _set_annotation_font_size(
         annot.Parent.DA = da
 
 
-def _set_parent_field_value_if_needed(
+def _set_parent_field_value(
     annot: object,
+    field_name: str,
     data_dict: DataDict,
     field_font_sizes: Dict[str, int],
     field_default_font_size: Optional[int],
-) -> bool:
-    if hasattr(annot, "FT") or not hasattr(annot, "Parent"):
-        return False
-
-    field_name = str(annot.Parent.T)
-    if field_name not in data_dict:
-        return False
-
+) -> None:
     pdf_value = String(data_dict[field_name])
     annot.Parent.V = pdf_value
     annot.Parent.DV = pdf_value
 
     font_size = field_font_sizes.get(field_name, field_default_font_size)
     _set_annotation_font_size(annot, font_size)
-    return True
 
 
 def _set_text_field_value(
@@ -226,25 +345,53 @@ def _set_regular_field_value(
     raise PDFError(f"Field {field_name} has an unsupported type {annot.FT}")
 
 
+def _build_field_index(pdf: Pdf) -> FieldIndex:
+    """Map the field names of the PDF to the widget annotations of the fields.
+
+    A widget without a field type of its own is indexed under the name of its parent
+    field, and under its own name if it has one.
+    """
+    field_index = defaultdict(list)
+    for page_idx, page in enumerate(pdf.pages):
+        for annot_idx, annot in enumerate(getattr(page, "Annots", [])):
+            parent_name = None
+            if not hasattr(annot, "FT") and hasattr(annot, "Parent"):
+                parent_name = str(annot.Parent.T)
+            widget = PDFFieldWidget(page_idx, annot_idx, parent_name)
+
+            if parent_name is not None:
+                field_index[parent_name].append(widget)
+            if hasattr(annot, "T"):
+                field_index[str(annot.T)].append(widget)
+    return dict(field_index)
+
+
 def _set_pdf_fields(
     pdf: Pdf,
     data_dict: DataDict,
     idx: None,
     field_font_sizes: Optional[Dict[str, int]] = None,
     field_default_font_size: Optional[int] = None,
+    field_index: Optional[FieldIndex] = None,
 ) -> None:
     field_font_sizes = field_font_sizes or {}
-
-    for page in pdf.pages:
-        for annot in getattr(page, "Annots", []):
-            if _set_parent_field_value_if_needed(
-                annot,
-                data_dict,
-                field_font_sizes,
-                field_default_font_size,
-            ):
+    if field_index is None:
+        field_index = _build_field_index(pdf)
+
+    for field_name in data_dict:
+        for widget in field_index.get(field_name, []):
+            annot = pdf.pages[widget.page].Annots[widget.annotation]
+            if widget.parent_name == field_name:
+                _set_parent_field_value(
+                    annot,
+                    field_name,
+                    data_dict,
+                    field_font_sizes,
+                    field_default_font_size,
+                )
                 continue
-            if not hasattr(annot, "T") or (field_name := str(annot.T)) not in data_dict:
+            if widget.parent_name in data_dict:
+                # the value is set to the parent field instead
                 continue
             if idx is not None:
                 # In case of merging multiple PDFs, need to rename the field, otherwise
@@ -271,13 +418,15 @@ def _create_pdf(
     field_font_sizes: Optional[Dict[str, int]] = None,
     field_default_font_size: Optional[int] = None,
 ) -> Pdf:
-    pdf = Pdf.open(template_file_name)
+    template = get_pdf_template(template_file_name)
+    pdf = template.open()
     _set_pdf_fields(
         pdf,
         data_dict,
         idx=idx,
         field_font_sizes=field_font_sizes,
         field_default_font_size=field_default_font_size,
+        field_index=template.field_index,
     )
     _set_need_appearances(pdf)
     return pdf
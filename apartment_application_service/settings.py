@@ -63,6 +63,8 @@ env = environ.Env(
     ELASTICSEARCH_USERNAME=(str, ""),
     ELASTICSEARCH_PASSWORD=(str, ""),
     APARTMENT_INDEX_NAME=(str, "asuntotuotanto-apartments"),
+    ELASTIC_DOCUMENT_CACHE_ALIAS=(str, "default"),
+    ELASTIC_DOCUMENT_CACHE_TIMEOUT=(int, 0),
     ETUOVI_SUPPLIER_SOURCE_ITEMCODE=(str, ""),
     ETUOVI_COMPANY_NAME=(str, ""),
     ETUOVI_TRANSFER_ID=(str, ""),
@@ -82,6 +84,7 @@ env = environ.Env(
     OIKOTIE_HOUSINGCOMPANIES_BATCH_SCHEMA_URL=(str, ""),
     APARTMENT_DATA_TRANSFER_PATH=(str, "transfer_files"),
     HASHIDS_SALT=(str, ""),
+    BLIND_INDEX_KEY=(str, ""),
     PUBLIC_PGP_KEY=(str, ""),
     PRIVATE_PGP_KEY=(str, ""),
     SAP_SFTP_USERNAME=(str, ""),
@@ -118,6 +121,12 @@ env = environ.Env(
     DEFAULT_SOLD_APARMENT_TIME_RANGE=(int, 1),
     DEFAULT_APARTMENT_REVALUATION_TIME_RANGE=(int, 1),
     APPLICANT_DUPLICATE_VALIDATION_DISABLED=(bool, False),
+    SPARSE_LIST_POSITIONS=(bool, False),
+    LOTTERY_JOBS_RUN_INLINE=(bool, False),
+    LOTTERY_JOB_TIMEOUT=(int, 10 * 60),
+    APPLICATION_INTAKE_QUEUED=(bool, False),
+    APPLICATION_INTAKE_TIMEOUT=(int, 5 * 60),
+    PDF_RENDER_PROCESSES=(int, 0),
 )
 if os.path.exists(env_file):
     env.read_env(env_file)
@@ -228,6 +237,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "simple_history.middleware.HistoryRequestMiddleware",
+    "apartment.elastic.cache.ElasticDocumentCacheMiddleware",
 ]
 
 TEMPLATES = [
@@ -404,6 +414,14 @@ ELASTICSEARCH_USERNAME = env("ELASTICSEARCH_USERNAME")
 ELASTICSEARCH_PASSWORD = env("ELASTICSEARCH_PASSWORD")
 APARTMENT_INDEX_NAME = env("APARTMENT_INDEX_NAME")
 
+# Process-wide cache for apartment and project documents, disabled when the timeout
+# (seconds) is 0. Lookups are always memoized for the duration of a request.
+# Nothing is notified when the ElasticSearch index is updated: entries expire by the
+# timeout unless the index sync runs the clear_elastic_document_cache command, which
+# needs a cache backend shared by the processes (e.g. Redis) instead of locmemcache://.
+ELASTIC_DOCUMENT_CACHE_ALIAS = env("ELASTIC_DOCUMENT_CACHE_ALIAS")
+ELASTIC_DOCUMENT_CACHE_TIMEOUT = env("ELASTIC_DOCUMENT_CACHE_TIMEOUT")
+
 # Etuovi settings
 ETUOVI_SUPPLIER_SOURCE_ITEMCODE = env("ETUOVI_SUPPLIER_SOURCE_ITEMCODE")
 ETUOVI_COMPANY_NAME = env("ETUOVI_COMPANY_NAME")
@@ -438,6 +456,11 @@ OIKOTIE_HOUSINGCOMPANIES_BATCH_SCHEMA = env(
 ]  # noqa: E501
 
 HASHIDS_SALT = env("HASHIDS_SALT")
+# Key of the hashes used to look up encrypted national identification numbers. It is
+# required, and kept apart from SECRET_KEY so that rotating that does not invalidate
+# the stored hashes. Changing this key requires recomputing the hashes of all the
+# profiles and applicants.
+BLIND_INDEX_KEY = env("BLIND_INDEX_KEY")
 SIMPLE_JWT = {"ACCESS_TOKEN_LIFETIME": timedelta(minutes=30)}
 
 # For pgcrypto
@@ -472,6 +495,28 @@ DEFAULT_APARTMENT_REVALUATION_TIME_RANGE = env.int(
 APPLICANT_DUPLICATE_VALIDATION_DISABLED = env.bool(
     "APPLICANT_DUPLICATE_VALIDATION_DISABLED"
 )
+# Leave gaps between the list positions of reservations so that a reservation can be
+# inserted into a queue without shifting the list positions of the following ones
+SPARSE_LIST_POSITIONS = env.bool("SPARSE_LIST_POSITIONS")
+# Run lottery jobs within the request that creates them instead of leaving them to
+# the run_lottery_jobs worker. The per-apartment progress of a running job is kept in
+# the default cache, so it is only visible across processes with a shared cache.
+LOTTERY_JOBS_RUN_INLINE = env.bool("LOTTERY_JOBS_RUN_INLINE")
+# Seconds after which a running lottery job that is no longer locked by its worker is
+# marked as failed, so that the lottery of the project can be requested again
+LOTTERY_JOB_TIMEOUT = env.int("LOTTERY_JOB_TIMEOUT")
+
+# Only validate and store the received applications, and leave creating them to the
+# process_application_intake worker. The number of workers running limits how many
+# applications are added to the apartment queues at the same time.
+APPLICATION_INTAKE_QUEUED = env.bool("APPLICATION_INTAKE_QUEUED")
+# Seconds after which a processing application intake that is no longer locked by its
+# worker is put back in the queue
+APPLICATION_INTAKE_TIMEOUT = env.int("APPLICATION_INTAKE_TIMEOUT")
+
+# Number of processes the PDFs of the project-wide contract and invoice batches are
+# rendered in. With 0 they are rendered in the process that handles the request.
+PDF_RENDER_PROCESSES = env.int("PDF_RENDER_PROCESSES")
 
 # local_settings.py can be used to override environment-specific settings
 # like database and email that differ between development and production.
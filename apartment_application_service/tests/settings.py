@@ -17,6 +17,8 @@ os.environ.setdefault("LOG_LEVEL", test_env("TEST_LOG_LEVEL"))
 from ..settings import *  # noqa: E402, F401, F403
 
 IS_TEST = True
+LOTTERY_JOBS_RUN_INLINE = True
+BLIND_INDEX_KEY = BLIND_INDEX_KEY or "test-blind-index-key"  # noqa: F405
 
 TEST_APARTMENT_INDEX_NAME = test_env("TEST_APARTMENT_INDEX_NAME")
 APARTMENT_INDEX_NAME = TEST_APARTMENT_INDEX_NAME
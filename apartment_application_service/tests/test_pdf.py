@@ -1,4 +1,27 @@
-from apartment_application_service.pdf import _set_need_appearances, _set_pdf_fields
+import dataclasses
+from io import BytesIO
+from typing import ClassVar, Dict
+
+from pikepdf import Pdf
+
+from apartment_application_service.pdf import (
+    _build_field_index,
+    _set_need_appearances,
+    _set_pdf_fields,
+    create_pdfs,
+    get_pdf_template,
+    merge_pdfs,
+    PDF_TEMPLATE_DIRECTORY,
+    PDFData,
+    PDFFieldWidget,
+)
+
+
+@dataclasses.dataclass
+class ApartmentPDFData(PDFData):
+    apartment: str
+
+    FIELD_MAPPING: ClassVar[Dict[str, str]] = {"apartment": "Huoneisto"}
 
 
 class MockAnnotation:
@@ -8,6 +31,16 @@ class MockAnnotation:
         self.AP = appearance
 
 
+class MockParentField:
+    def __init__(self, field_name):
+        self.T = field_name
+
+
+class MockKidAnnotation:
+    def __init__(self, parent):
+        self.Parent = parent
+
+
 class MockPage:
     def __init__(self, annotations):
         self.Annots = annotations
@@ -61,3 +94,92 @@ def test_set_need_appearances_does_nothing_without_acroform():
     _set_need_appearances(pdf)
 
     assert not hasattr(pdf.Root, "AcroForm")
+
+
+def test_build_field_index_indexes_kid_widgets_under_parent_name():
+    parent = MockParentField("ParentField")
+    pdf = MockPdf(
+        pages=[
+            MockPage([MockAnnotation("/Tx", "TestField")]),
+            MockPage([MockKidAnnotation(parent), MockKidAnnotation(parent)]),
+        ]
+    )
+
+    assert _build_field_index(pdf) == {
+        "TestField": [PDFFieldWidget(0, 0)],
+        "ParentField": [
+            PDFFieldWidget(1, 0, "ParentField"),
+            PDFFieldWidget(1, 1, "ParentField"),
+        ],
+    }
+
+
+def test_set_pdf_fields_sets_parent_field_value():
+    parent = MockParentField("ParentField")
+    kid = MockKidAnnotation(parent)
+    pdf = MockPdf(pages=[MockPage([kid])])
+
+    _set_pdf_fields(pdf, {"ParentField": "Filled value"}, idx=None)
+
+    assert str(parent.V) == "Filled value"
+    assert str(parent.DV) == "Filled value"
+
+
+def test_get_pdf_template_is_loaded_once():
+    path = f"{PDF_TEMPLATE_DIRECTORY}/invoice_template.pdf"
+
+    template = get_pdf_template(path)
+
+    assert get_pdf_template(path) is template
+    assert template.field_index
+    with template.open() as first, template.open() as second:
+        assert first is not second
+        assert len(first.pages) == len(second.pages)
+
+
+def _get_field_values(content: bytes) -> Dict[str, str]:
+    with Pdf.open(BytesIO(content)) as pdf:
+        return {
+            str(annotation.T): str(annotation.V)
+            for page in pdf.pages
+            for annotation in page.get("/Annots", [])
+            if "/T" in annotation and "/V" in annotation
+        }
+
+
+def test_create_pdfs_in_process_pool_matches_serial_rendering():
+    documents = [
+        ApartmentPDFData(apartment="A 1"),
+        [ApartmentPDFData(apartment="A 2"), ApartmentPDFData(apartment="A 3")],
+    ]
+
+    serial = create_pdfs("invoice_template.pdf", documents, processes=0)
+    pooled = create_pdfs("invoice_template.pdf", documents, processes=2)
+
+    assert len(serial) == 2
+    assert [_get_field_values(c) for c in pooled] == [
+        _get_field_values(c) for c in serial
+    ]
+    assert _get_field_values(serial[0])["Huoneisto_0"] == "A 1"
+    assert {"Huoneisto_0": "A 2", "Huoneisto_1": "A 3"}.items() <= _get_field_values(
+        serial[1]
+    ).items()
+
+
+def test_merge_pdfs_keeps_the_fields_of_every_document():
+    documents = [
+        ApartmentPDFData(apartment="A 1"),
+        [ApartmentPDFData(apartment="A 2"), ApartmentPDFData(apartment="A 3")],
+    ]
+    contents = create_pdfs(
+        "invoice_template.pdf", documents, unique_field_names=True, processes=0
+    )
+
+    merged = merge_pdfs(contents)
+
+    template = get_pdf_template(f"{PDF_TEMPLATE_DIRECTORY}/invoice_template.pdf")
+    with Pdf.open(merged) as pdf, template.open() as template_pdf:
+        assert len(pdf.pages) == 3 * len(template_pdf.pages)
+    values = _get_field_values(merged.getvalue())
+    for idx, apartment in enumerate(["A 1", "A 2", "A 3"]):
+        assert values[f"Huoneisto_{idx}"] == apartment
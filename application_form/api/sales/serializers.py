@@ -23,7 +23,14 @@ from application_form.api.serializers import (
     ApplicationSerializerBase,
 )
 from application_form.enums import ApartmentReservationState, ApplicationArrivalMethod
-from application_form.models import ApartmentReservation, Applicant, LotteryEvent, Offer
+from application_form.models import (
+    ApartmentReservation,
+    Applicant,
+    LotteryEvent,
+    LotteryJob,
+    Offer,
+)
+from application_form.services.lottery.jobs import get_lottery_job_progress
 from application_form.services.offer import create_offer, update_offer
 from application_form.services.reservation import create_late_reservation
 from cost_index.api.serializers import ApartmentRevaluationSerializer
@@ -44,6 +51,38 @@ class ProjectUUIDSerializer(serializers.Serializer):
     project_uuid = UUIDField()
 
 
+class LotteryJobApartmentSerializer(serializers.Serializer):
+    apartment_uuid = UUIDField()
+    processed = serializers.BooleanField()
+
+
+class LotteryJobSerializer(EnumSupportSerializerMixin, serializers.ModelSerializer):
+    apartments = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LotteryJob
+        fields = [
+            "id",
+            "project_uuid",
+            "state",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "apartments",
+        ]
+
+    @extend_schema_field(LotteryJobApartmentSerializer(many=True))
+    def get_apartments(self, obj):
+        return LotteryJobApartmentSerializer(
+            [
+                {"apartment_uuid": apartment_uuid, "processed": processed}
+                for apartment_uuid, processed in get_lottery_job_progress(obj).items()
+            ],
+            many=True,
+        ).data
+
+
 class SalesApplicantSerializer(ApplicantSerializerBase):
     class Meta(ApplicantSerializerBase.Meta):
         fields = ApplicantSerializerBase.Meta.fields + ["date_of_birth", "ssn_suffix"]
@@ -91,7 +130,7 @@ class SalesApplicationSerializer(ApplicationSerializerBase):
         validated_data["method_of_arrival"] = ApplicationArrivalMethod.POST
         return super().prepare_metadata(validated_data)
 
-    def create(self, validated_data):
+    def prepare_create(self, validated_data):
         submitted_late = validated_data.pop("submitted_late", None)
 
         project_uuid = get_apartment_project_uuid(
@@ -134,8 +173,7 @@ class SalesApplicationSerializer(ApplicationSerializerBase):
         else:
             validated_data["submitted_late"] = False
 
-        application = super().create(validated_data)
-        return application
+        return super().prepare_create(validated_data)
 
     def _has_lottery_event(self, project_uuid: UUID) -> bool:
         apartment_uuids = get_apartment_uuids(project_uuid)
@@ -25,6 +25,7 @@ from apartment.elastic.queries import get_apartment, get_project
 from apartment.models import ProjectExtraData
 from apartment.utils import get_apartment_state_of_sale_from_event
 from application_form.api.sales.serializers import (
+    LotteryJobSerializer,
     OfferMessageSerializer,
     OfferSerializer,
     ProjectExtraDataSerializer,
@@ -41,12 +42,14 @@ from application_form.api.views import ApplicationViewSet
 from application_form.enums import (
     ApartmentReservationCancellationReason,
     ApartmentReservationState,
+    ApplicationIntakeSource,
 )
 from application_form.exceptions import ProjectDoesNotHaveApplicationsException
 from application_form.models import (
     ApartmentReservation,
     ApartmentReservationStateChangeEvent,
     LotteryEvent,
+    LotteryJob,
     Offer,
 )
 from application_form.pdf import (
@@ -59,7 +62,11 @@ from application_form.services.application import cancel_reservation
 from application_form.services.lottery.exceptions import (
     ApplicationTimeNotFinishedException,
 )
-from application_form.services.lottery.machine import distribute_apartments
+from application_form.services.lottery.jobs import create_lottery_job
+from application_form.services.lottery.utils import (
+    _validate_project_application_time_has_finished,
+    _validate_project_has_applications,
+)
 from application_form.services.queue import _adjust_positions
 from application_form.services.reservation import (
     transfer_reservation_to_another_customer,
@@ -73,7 +80,12 @@ from users.permissions import IsDjangoSalesperson, IsDrupalSalesperson
 @require_http_methods(["POST"])  # For SonarCloud
 def execute_lottery_for_project(request):
     """
-    Run the lottery for the given project.
+    Request the lottery for the given project.
+
+    The lottery is run in the background. The response contains the lottery job,
+    whose progress can be followed from the lottery job status endpoint. If the
+    project's lottery has already been requested but not finished, that job is
+    returned.
     """
     serializer = ProjectUUIDSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -86,13 +98,29 @@ def execute_lottery_for_project(request):
         raise NotFound(detail="Project not found.")
 
     try:
-        distribute_apartments(project_uuid, request.user)
+        _validate_project_has_applications(project_uuid)
+        _validate_project_application_time_has_finished(project_uuid)
     except ProjectDoesNotHaveApplicationsException as ex:
         raise ValidationError(detail="Project does not have applications.") from ex
     except ApplicationTimeNotFinishedException as ex:
         raise ValidationError(detail=str(ex)) from ex
 
-    return Response({"status": "success"}, status=status.HTTP_200_OK)
+    job = create_lottery_job(project_uuid, request.user)
+    return Response(LotteryJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(http_method_names=["GET"])
+@permission_classes([IsDjangoSalesperson])
+@require_http_methods(["GET"])  # For SonarCloud
+def lottery_job_status(request, lottery_job_id):
+    """
+    Return the state of the lottery job and the progress of each apartment.
+    """
+    try:
+        job = LotteryJob.objects.get(pk=lottery_job_id)
+    except LotteryJob.DoesNotExist:
+        raise NotFound(detail="Lottery job not found.")
+    return Response(LotteryJobSerializer(job).data)
 
 
 @api_view(http_method_names=["GET"])
@@ -153,6 +181,10 @@ def apartment_states(request):
 class SalesApplicationViewSet(ApplicationViewSet):
     serializer_class = SalesApplicationSerializer
     permission_classes = [permissions.IsAuthenticated, IsDrupalSalesperson]
+    intake_source = ApplicationIntakeSource.SALES
+
+    def _get_salesperson(self):
+        return self.request.user
 
 
 def _recalculate_queue_position_for_haso_on_submitted_late_change(
@@ -1,5 +1,6 @@
 import logging
 from datetime import datetime
+from typing import Tuple
 
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -8,6 +9,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import IntegerField, UUIDField
 
+from apartment.elastic.documents import ApartmentDocument
 from apartment.elastic.queries import (
     get_apartment_project_uuid,
     get_apartment_uuids,
@@ -31,6 +33,7 @@ from application_form.models import (
     ApartmentReservationStateChangeEvent,
     Applicant,
     Application,
+    ApplicationIntake,
     Offer,
 )
 from application_form.services.application import (
@@ -130,6 +133,25 @@ class ApplicationSerializerBase(serializers.ModelSerializer):
         }
 
     def create(self, validated_data):
+        validated_data, project, is_submitted_late = self.prepare_create(validated_data)
+        application = create_application(
+            validated_data,
+            user=self.context.get("salesperson"),
+            submitted_late=is_submitted_late,
+        )
+        self.complete_create(application, validated_data, project, is_submitted_late)
+        return application
+
+    def prepare_create(
+        self, validated_data: dict
+    ) -> Tuple[dict, ApartmentDocument, bool]:
+        """
+        Check that the application can be created and fill in its metadata.
+
+        Returns the data to create the application from, the project applied to and
+        whether the application is submitted late. Raises a `ValidationError` if the
+        application cannot be created.
+        """
         submitted_late_override = validated_data.pop("submitted_late", None)
         validated_data = self.prepare_metadata(validated_data)
 
@@ -185,13 +207,21 @@ class ApplicationSerializerBase(serializers.ModelSerializer):
                 code=400,
             )
 
-        application = create_application(
-            validated_data,
-            user=self.context.get("salesperson"),
-            submitted_late=is_submitted_late,
-        )
-
+        return validated_data, project, is_submitted_late
+
+    def complete_create(
+        self,
+        application: Application,
+        validated_data: dict,
+        project: ApartmentDocument,
+        is_submitted_late: bool,
+    ) -> None:
+        """Handle the consequences of the created application, such as replacing the
+        earlier reservations of a late HASO application."""
+        is_haso = project.project_ownership_type.lower() == OwnershipType.HASO.value
         if is_submitted_late and is_haso and project.project_can_apply_afterwards:
+            profile = self.context["request"].user.profile
+            project_apartment_uuids = get_apartment_uuids(project.project_uuid)
             # find pre-existing reservation for profile, apartments, cancel it
             project_reservations = ApartmentReservation.objects.filter(
                 apartment_uuid__in=project_apartment_uuids,
@@ -217,8 +247,6 @@ class ApplicationSerializerBase(serializers.ModelSerializer):
                 ],
             )
 
-        return application
-
     def prepare_metadata(self, validated_data):
         if validated_data.get("type", None) == ApplicationType.HASO:
             validated_data["process_number"] = METADATA_HASO_PROCESS_NUMBER
@@ -249,9 +277,9 @@ class ApplicationSerializer(ApplicationSerializerBase):
             sender_names += "/ {}".format(additional_applicant_name)
         return sender_names
 
-    def create(self, validated_data):
+    def prepare_create(self, validated_data):
         validated_data["profile"] = self.context["request"].user.profile
-        return super().create(validated_data)
+        return super().prepare_create(validated_data)
 
     def prepare_metadata(self, validated_data):
         validated_data["sender_names"] = self._get_senders_name_from_applicants_data(
@@ -300,6 +328,22 @@ class ApplicationSerializer(ApplicationSerializerBase):
         return super().validate(attrs)
 
 
+class ApplicationIntakeSerializer(
+    EnumSupportSerializerMixin, serializers.ModelSerializer
+):
+    application_uuid = UUIDField(source="external_uuid")
+
+    class Meta:
+        model = ApplicationIntake
+        fields = (
+            "application_uuid",
+            "state",
+            "errors",
+            "created_at",
+            "processed_at",
+        )
+
+
 class ReservationOfferSerializer(
     EnumSupportSerializerMixin, serializers.ModelSerializer
 ):
@@ -1,4 +1,8 @@
+from django.conf import settings
+from django.db import transaction
 from rest_framework import permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -9,10 +13,18 @@ from apartment.elastic.queries import get_apartment_uuids
 from application_form.api.serializers import (
     ApartmentReservationSerializer,
     ApplicantSerializerBase,
+    ApplicationIntakeSerializer,
     ApplicationSerializer,
 )
-from application_form.models import ApartmentReservation, Application
-from application_form.services.application import delete_application
+from application_form.enums import ApplicationIntakeSource
+from application_form.models import ApartmentReservation, Application, ApplicationIntake
+from application_form.services.application import (
+    create_applications,
+    delete_application,
+)
+from application_form.services.intake import enqueue_application
+from audit_log import audit_logging
+from audit_log.enums import Operation
 from audit_log.viewsets import AuditLoggingModelViewSet
 
 
@@ -23,6 +35,116 @@ class ApplicationViewSet(AuditLoggingModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = "external_uuid"
     http_method_names = ["post"]
+    intake_source = ApplicationIntakeSource.PUBLIC
+
+    def create(self, request, *args, **kwargs):
+        if not settings.APPLICATION_INTAKE_QUEUED:
+            return super().create(request, *args, **kwargs)
+
+        # Only validate the application here and leave creating it to the
+        # process_application_intake worker
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        intake = enqueue_application(
+            serializer.validated_data["external_uuid"],
+            request.data,
+            self.intake_source,
+            request.user,
+        )
+        return Response(
+            ApplicationIntakeSerializer(intake).data, status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(methods=["POST"], detail=False)
+    def bulk(self, request):
+        """
+        Create a list of applications.
+
+        Each application is validated like a single application would be, and the
+        valid ones are created together. The response has a result for each
+        application, in the order of the request.
+        """
+        if not isinstance(request.data, list):
+            raise ValidationError({"detail": "Expected a list of applications."})
+
+        results = [None] * len(request.data)
+        valid = []
+        for index, item in enumerate(request.data):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                valid.append((index, serializer))
+            else:
+                results[index] = self._bulk_error(item, serializer.errors)
+
+        application_uuids = [
+            serializer.validated_data["external_uuid"] for _, serializer in valid
+        ]
+        existing_uuids = set(
+            Application.objects.filter(external_uuid__in=application_uuids).values_list(
+                "external_uuid", flat=True
+            )
+        )
+        seen_uuids = set()
+        to_create = []
+        for index, serializer in valid:
+            item = request.data[index]
+            application_uuid = serializer.validated_data["external_uuid"]
+            if application_uuid in existing_uuids or application_uuid in seen_uuids:
+                results[index] = self._bulk_error(
+                    item, {"application_uuid": ["Application already exists."]}
+                )
+                continue
+            seen_uuids.add(application_uuid)
+            try:
+                prepared = serializer.prepare_create(dict(serializer.validated_data))
+            except ValidationError as e:
+                results[index] = self._bulk_error(item, e.detail)
+                continue
+            to_create.append((index, serializer, prepared))
+
+        if to_create:
+            with transaction.atomic():
+                applications = create_applications(
+                    [validated_data for _, _, (validated_data, _, _) in to_create],
+                    user=self._get_salesperson(),
+                    submitted_late=[
+                        is_submitted_late
+                        for _, _, (_, _, is_submitted_late) in to_create
+                    ],
+                )
+                for (index, serializer, prepared), application in zip(
+                    to_create, applications
+                ):
+                    serializer.complete_create(application, *prepared)
+                    results[index] = {
+                        "application_uuid": str(application.external_uuid),
+                        "status": status.HTTP_201_CREATED,
+                    }
+                audit_logging.log_many(
+                    self._get_actor(), Operation.CREATE, applications
+                )
+
+        response_status = (
+            status.HTTP_201_CREATED
+            if len(to_create) == len(results)
+            else status.HTTP_207_MULTI_STATUS
+        )
+        return Response(results, status=response_status)
+
+    def _get_salesperson(self):
+        """Return the user recorded as the creator of the reservations of the
+        applications. Applicants creating their own applications are not recorded."""
+        return None
+
+    @staticmethod
+    def _bulk_error(item, errors) -> dict:
+        return {
+            "application_uuid": (
+                item.get("application_uuid") if isinstance(item, dict) else None
+            ),
+            "status": status.HTTP_400_BAD_REQUEST,
+            "errors": errors,
+        }
 
 
 class ListProjectReservations(GenericAPIView):
@@ -99,3 +221,22 @@ class DeleteApplicationView(APIView):
 
         delete_application(application)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ApplicationIntakeStatusView(APIView):
+    """
+    Returns the state of an application received with the queued intake.
+    """
+
+    authentication_classes = [JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, application_uuid):
+        intake = ApplicationIntake.objects.filter(
+            external_uuid=application_uuid, user=request.user
+        ).first()
+        if intake is None:
+            return Response(
+                {"detail": "Application not found."}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(ApplicationIntakeSerializer(intake).data)
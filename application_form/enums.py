@@ -44,6 +44,25 @@ class OfferState(Enum):
     REJECTED = "rejected"
 
 
+class LotteryJobState(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ApplicationIntakeState(Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ApplicationIntakeSource(Enum):
+    PUBLIC = "public"
+    SALES = "sales"
+
+
 class ApplicationArrivalMethod(Enum):
     ELECTRONICAL_SYSTEM = "electronical_system"
     EMAIL = "email"
@@ -0,0 +1,98 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from application_form.enums import ApplicationType
+from application_form.services.lottery.fixtures import (
+    create_apartment_index,
+    create_application,
+    create_project_apartments,
+    delete_apartments,
+)
+from application_form.services.lottery.machine import distribute_apartments
+from application_form.services.queue import add_application_to_queues
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the lottery of a generated project in dry-run mode and print how long "
+        "each phase took. Only available with the test settings, since the apartments "
+        "are written to the ElasticSearch index of the settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--apartments", type=int, default=200, help="Number of apartments."
+        )
+        parser.add_argument(
+            "--applicants", type=int, default=1000, help="Number of applications."
+        )
+        parser.add_argument(
+            "--ownership-type",
+            choices=["hitas", "haso"],
+            default="hitas",
+            help="Ownership type of the generated project.",
+        )
+        parser.add_argument(
+            "--max-choices",
+            type=int,
+            default=5,
+            help="Maximum number of apartments in a single application.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=None, help="Seed of the generated data."
+        )
+
+    def handle(self, *args, **options):
+        if not settings.IS_TEST:
+            raise CommandError(
+                "The lottery benchmark must be run with the test settings."
+            )
+        rng = random.Random(options["seed"])
+        ownership_type = options["ownership_type"]
+        application_type = (
+            ApplicationType.HASO if ownership_type == "haso" else ApplicationType.HITAS
+        )
+
+        create_apartment_index()
+        apartments = []
+        try:
+            apartments = create_project_apartments(
+                ownership_type, options["apartments"], rng
+            )
+            try:
+                with transaction.atomic():
+                    for _ in range(options["applicants"]):
+                        choices = rng.sample(
+                            apartments,
+                            rng.randint(
+                                1, min(options["max_choices"], len(apartments))
+                            ),
+                        )
+                        application = create_application(application_type, choices, rng)
+                        add_application_to_queues(application)
+
+                    report = distribute_apartments(
+                        apartments[0].project_uuid, dry_run=True
+                    )
+                    raise _Rollback()
+            except _Rollback:
+                pass
+        finally:
+            delete_apartments(apartments)
+
+        self.stdout.write(
+            f"{'phase':<24}{'seconds':>10}{'queries':>10}{'es calls':>10}"
+        )
+        rows = list(report.phases.items()) + [("total", report.total)]
+        for name, stats in rows:
+            self.stdout.write(
+                f"{name:<24}{stats.seconds:>10.3f}{stats.queries:>10}"
+                f"{stats.es_calls:>10}"
+            )
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from application_form.pdf.benchmark import (
+    CHECKED_METRICS,
+    DEFAULT_RECORD_COUNTS,
+    find_regressions,
+    METRICS,
+    PDF_PIPELINES,
+    read_baseline,
+    run_pdf_benchmark,
+    write_baseline,
+)
+
+# Recorded locally, see application_form.pdf.benchmark
+DEFAULT_BASELINE = "pdf_benchmark_baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the PDF templates with fixture data and print the wall time, peak "
+        "memory and output size of each pipeline. Fails if the peak memory or the "
+        "output size exceeds the stored baseline by more than the tolerance; a slower "
+        "wall time is only reported unless --check-seconds is given. The baseline is "
+        "recorded on the same machine with --update-baseline. Only available with "
+        "the test settings, since the contracts are filled with the test data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "pipelines",
+            nargs="*",
+            choices=list(PDF_PIPELINES),
+            help="Pipelines to run. All of them by default.",
+        )
+        parser.add_argument(
+            "--records",
+            type=int,
+            nargs="+",
+            default=DEFAULT_RECORD_COUNTS,
+            help="Numbers of records to fill the template with.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=3, help="Number of runs of each case."
+        )
+        parser.add_argument(
+            "--baseline",
+            default=DEFAULT_BASELINE,
+            help="JSON file of the baseline measurements, by default in the current "
+            "directory.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed relative increase over the baseline.",
+        )
+        parser.add_argument(
+            "--check-seconds",
+            action="store_true",
+            help="Fail also if the wall time exceeds the baseline.",
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store the measurements as the new baseline instead of checking them.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.IS_TEST:
+            raise CommandError("The PDF benchmark must be run with the test settings.")
+        results = run_pdf_benchmark(
+            options["pipelines"], options["records"], options["repeat"]
+        )
+
+        self.stdout.write(
+            f"{'pipeline':<18}{'records':>8}{'seconds':>10}{'peak KiB':>12}"
+            f"{'bytes':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.pipeline:<18}{result.records:>8}{result.seconds:>10.3f}"
+                f"{result.peak_memory_kib:>12}{result.output_bytes:>12}"
+            )
+
+        if options["update_baseline"]:
+            write_baseline(options["baseline"], results)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+            return
+
+        try:
+            baseline = read_baseline(options["baseline"])
+        except FileNotFoundError:
+            raise CommandError(
+                f"No baseline found at {options['baseline']}. Record one with "
+                "--update-baseline first."
+            )
+        checked_metrics = METRICS if options["check_seconds"] else CHECKED_METRICS
+        regressions = find_regressions(
+            results, baseline, options["tolerance"], checked_metrics
+        )
+        advisories = find_regressions(
+            results,
+            baseline,
+            options["tolerance"],
+            [metric for metric in METRICS if metric not in checked_metrics],
+        )
+        for advisory in advisories:
+            self.stderr.write(f"Warning: {advisory}")
+        if regressions:
+            raise CommandError("\n".join(["PDF benchmark regressed:"] + regressions))
@@ -4,13 +4,12 @@ import os
 from datetime import date, datetime
 from typing import List, Union
 
-import django
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db.models.manager import BaseManager
 
 from apartment.elastic.documents import ApartmentDocument
-from apartment.elastic.queries import get_apartment
+from apartment.elastic.queries import get_apartments_by_uuids
 from application_form.models import Application, ApplicationApartment
 from connections.utils import create_elastic_connection
 
@@ -189,12 +188,17 @@ class Command(BaseCommand):
             ]
         ]
 
+        application_apartments = list(application_apartments)
+        apartments = get_apartments_by_uuids(
+            (
+                application_apartment.apartment_uuid
+                for application_apartment in application_apartments
+            ),
+            include_project_fields=True,
+        )
         for application_apartment in application_apartments:
-            try:
-                apartment = get_apartment(
-                    application_apartment.apartment_uuid, include_project_fields=True
-                )
-            except django.core.exceptions.ObjectDoesNotExist:
+            apartment = apartments.get(str(application_apartment.apartment_uuid))
+            if apartment is None:
                 continue
 
             application = application_apartment.application
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from application_form.api.sales.serializers import SalesApplicationSerializer
+from application_form.api.serializers import ApplicationSerializer
+from application_form.enums import ApplicationIntakeSource
+from application_form.services.intake import process_pending_application_intakes
+
+# The intakes are validated again with the serializer of the endpoint they came from
+INTAKE_SERIALIZER_CLASSES = {
+    ApplicationIntakeSource.PUBLIC: ApplicationSerializer,
+    ApplicationIntakeSource.SALES: SalesApplicationSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = "Create the applications received with the queued intake."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no more waiting applications.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between checks for new applications.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_pending_application_intakes(INTAKE_SERIALIZER_CLASSES)
+            if count:
+                self.stdout.write(f"Processed {count} application(s).")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
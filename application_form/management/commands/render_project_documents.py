@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from application_form.pdf.batch import (
+    BATCH_OUTPUT_ZIP,
+    BATCH_OUTPUTS,
+    bundle_project_documents,
+    render_project_contracts,
+    render_project_invoices,
+)
+from connections.utils import create_elastic_connection
+from invoicing.enums import InstallmentType
+
+DOCUMENT_CONTRACTS = "contracts"
+DOCUMENT_INVOICES = "invoices"
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the contracts or the invoices of all the reserved apartments of a "
+        "project and write them to a file, either as a ZIP file of a PDF file of each "
+        "apartment or as a single PDF file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "documents", choices=[DOCUMENT_CONTRACTS, DOCUMENT_INVOICES]
+        )
+        parser.add_argument("project_uuid")
+        parser.add_argument("path", help="File to write the documents to.")
+        parser.add_argument(
+            "--output",
+            choices=BATCH_OUTPUTS,
+            default=BATCH_OUTPUT_ZIP,
+            help="Either zip (default) for a PDF file of each apartment, or pdf for a "
+            "single PDF file of all the apartments.",
+        )
+        parser.add_argument(
+            "--salesperson-uuid",
+            help="UUID of the salesperson of the contracts. Required for Hitas "
+            "contracts.",
+        )
+        parser.add_argument("--sales-price-paid-place")
+        parser.add_argument("--sales-price-paid-time")
+        parser.add_argument(
+            "--types",
+            nargs="+",
+            choices=[installment_type.value for installment_type in InstallmentType],
+            help="Installment types to invoice. All of them by default.",
+        )
+
+    def handle(self, *args, **options):
+        create_elastic_connection()
+
+        try:
+            if options["documents"] == DOCUMENT_CONTRACTS:
+                documents = render_project_contracts(
+                    options["project_uuid"],
+                    salesperson=self._get_salesperson(options["salesperson_uuid"]),
+                    sales_price_paid_place=options["sales_price_paid_place"],
+                    sales_price_paid_time=options["sales_price_paid_time"],
+                )
+            else:
+                types = None
+                if options["types"]:
+                    types = [InstallmentType(value) for value in options["types"]]
+                documents = render_project_invoices(
+                    options["project_uuid"], installment_types=types
+                )
+        except ObjectDoesNotExist:
+            raise CommandError(f"Unknown project: {options['project_uuid']}")
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not documents:
+            raise CommandError("The project has no documents to render.")
+
+        with open(options["path"], "wb") as f:
+            f.write(bundle_project_documents(documents, options["output"]).getvalue())
+        self.stdout.write(f"Wrote {len(documents)} document(s) to {options['path']}")
+
+    def _get_salesperson(self, salesperson_uuid):
+        if not salesperson_uuid:
+            return None
+        try:
+            return get_user_model().objects.get(uuid=salesperson_uuid)
+        except (get_user_model().DoesNotExist, ValidationError):
+            raise CommandError(f"Unknown salesperson: {salesperson_uuid}")
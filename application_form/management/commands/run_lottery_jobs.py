@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from application_form.services.lottery.jobs import run_pending_lottery_jobs
+
+
+class Command(BaseCommand):
+    help = "Run the requested project lotteries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no more waiting lotteries.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between checks for new lotteries.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = run_pending_lottery_jobs()
+            if count:
+                self.stdout.write(f"Ran {count} lottery job(s).")
+            if options["once"]:
+                return
+            time.sleep(options["poll_interval"])
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:00
+
+import django.db.models.deletion
+import enumfields.fields
+from django.conf import settings
+from django.db import migrations, models
+
+import application_form.enums
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        (
+            "application_form",
+            "0074_apartmentreservation_queue_position_before_cancelation",
+        ),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LotteryJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "project_uuid",
+                    models.UUIDField(db_index=True, verbose_name="project uuid"),
+                ),
+                (
+                    "state",
+                    enumfields.fields.EnumField(
+                        default="pending",
+                        enum=application_form.enums.LotteryJobState,
+                        max_length=15,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "started_at",
+                    models.DateTimeField(null=True, verbose_name="started at"),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(null=True, verbose_name="finished at"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("id",),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="lotteryjob",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("state__in", ["pending", "running"])),
+                fields=("project_uuid",),
+                name="lotteryjob_one_active_per_project",
+            ),
+        ),
+    ]
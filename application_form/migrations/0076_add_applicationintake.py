@@ -0,0 +1,99 @@
+# Generated by Django 4.2.7 on 2026-10-17 12:00
+
+import django.db.models.deletion
+import enumfields.fields
+import pgcrypto.fields
+from django.conf import settings
+from django.db import migrations, models
+
+import application_form.enums
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("application_form", "0075_add_lotteryjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ApplicationIntake",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "external_uuid",
+                    models.UUIDField(
+                        unique=True, verbose_name="application identifier"
+                    ),
+                ),
+                (
+                    "source",
+                    enumfields.fields.EnumField(
+                        enum=application_form.enums.ApplicationIntakeSource,
+                        max_length=15,
+                        verbose_name="source",
+                    ),
+                ),
+                (
+                    "payload",
+                    pgcrypto.fields.TextPGPPublicKeyField(verbose_name="payload"),
+                ),
+                (
+                    "state",
+                    enumfields.fields.EnumField(
+                        default="pending",
+                        enum=application_form.enums.ApplicationIntakeState,
+                        max_length=15,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "errors",
+                    models.JSONField(blank=True, default=dict, verbose_name="errors"),
+                ),
+                (
+                    "processed_at",
+                    models.DateTimeField(null=True, verbose_name="processed at"),
+                ),
+                (
+                    "application",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="application_form.application",
+                        verbose_name="application",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="user",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("id",),
+                "indexes": [
+                    models.Index(
+                        fields=["state", "id"], name="applicationintake_state_idx"
+                    )
+                ],
+            },
+        ),
+    ]
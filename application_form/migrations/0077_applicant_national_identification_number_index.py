@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+from users.blind_index import national_identification_number_index
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def backfill_national_identification_number_index(apps, schema_editor):
+    Applicant = apps.get_model("application_form", "Applicant")
+    last_pk = 0
+    while True:
+        chunk = list(
+            Applicant.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .only("pk", "date_of_birth", "ssn_suffix")[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            return
+        for applicant in chunk:
+            if applicant.date_of_birth and applicant.ssn_suffix:
+                applicant.national_identification_number_index = (
+                    national_identification_number_index(
+                        applicant.date_of_birth.strftime("%d%m%y")
+                        + applicant.ssn_suffix
+                    )
+                )
+        Applicant.objects.bulk_update(chunk, ["national_identification_number_index"])
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("application_form", "0076_add_applicationintake"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="applicant",
+            name="national_identification_number_index",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=64,
+                null=True,
+                verbose_name="national identification number index",
+            ),
+        ),
+        migrations.RunPython(
+            backfill_national_identification_number_index, migrations.RunPython.noop
+        ),
+    ]
@@ -3,7 +3,8 @@ from application_form.models.application import (
     Application,
     ApplicationApartment,
 )
-from application_form.models.lottery import LotteryEvent, LotteryEventResult
+from application_form.models.intake import ApplicationIntake
+from application_form.models.lottery import LotteryEvent, LotteryEventResult, LotteryJob
 from application_form.models.offer import Offer
 from application_form.models.reservation import (
     ApartmentQueueChangeEvent,
@@ -15,8 +16,10 @@ __all__ = [
     "Applicant",
     "Application",
     "ApplicationApartment",
+    "ApplicationIntake",
     "LotteryEvent",
     "LotteryEventResult",
+    "LotteryJob",
     "ApartmentReservation",
     "ApartmentQueueChangeEvent",
     "ApartmentReservationStateChangeEvent",
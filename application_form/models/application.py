@@ -9,6 +9,7 @@ from pgcrypto.fields import CharPGPPublicKeyField, DatePGPPublicKeyField
 from apartment_application_service.models import CommonApplicationData, TimestampedModel
 from application_form.enums import ApplicationArrivalMethod, ApplicationType
 from customer.models import Customer
+from users.blind_index import national_identification_number_index
 from users.models import Profile
 
 
@@ -62,11 +63,39 @@ class Applicant(TimestampedModel):
         null=True,
     )
     is_primary_applicant = models.BooleanField(_("is primary applicant"), default=False)
+    # Maintained on save, see users.blind_index
+    national_identification_number_index = models.CharField(
+        _("national identification number index"),
+        max_length=64,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+    )
 
     application = models.ForeignKey(
         Application, on_delete=models.CASCADE, related_name="applicants"
     )
 
+    def set_national_identification_number_index(self) -> None:
+        """Update the blind index from the date of birth and the SSN suffix. This has
+        to be called explicitly before a bulk_create."""
+        self.national_identification_number_index = None
+        if self.date_of_birth and self.ssn_suffix:
+            self.national_identification_number_index = (
+                national_identification_number_index(
+                    self.date_of_birth.strftime("%d%m%y") + self.ssn_suffix
+                )
+            )
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.set_national_identification_number_index()
+        if update_fields is not None:
+            update_fields = list(update_fields) + [
+                "national_identification_number_index"
+            ]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class ApplicationApartment(models.Model):
     application = models.ForeignKey(
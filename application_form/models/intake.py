@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from enumfields import EnumField
+from pgcrypto.fields import TextPGPPublicKeyField
+
+from apartment_application_service.models import TimestampedModel
+from application_form.enums import ApplicationIntakeSource, ApplicationIntakeState
+from application_form.models.application import Application
+
+User = get_user_model()
+
+
+class ApplicationIntake(TimestampedModel):
+    """
+    A received application waiting to be created by the process_application_intake
+    worker.
+    """
+
+    # The application UUID doubles as the idempotency key of the intake
+    external_uuid = models.UUIDField(_("application identifier"), unique=True)
+    source = EnumField(ApplicationIntakeSource, max_length=15, verbose_name=_("source"))
+    # The request data as JSON. It contains personal data, so it is encrypted.
+    payload = TextPGPPublicKeyField(_("payload"))
+    state = EnumField(
+        ApplicationIntakeState,
+        max_length=15,
+        verbose_name=_("state"),
+        default=ApplicationIntakeState.PENDING,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("user"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    application = models.ForeignKey(
+        Application,
+        verbose_name=_("application"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    errors = models.JSONField(_("errors"), default=dict, blank=True)
+    processed_at = models.DateTimeField(verbose_name=_("processed at"), null=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=["state", "id"], name="applicationintake_state_idx")
+        ]
@@ -1,8 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
+from enumfields import EnumField
 from pgcrypto.fields import CharPGPPublicKeyField
 
+from apartment_application_service.models import TimestampedModel
+from application_form.enums import LotteryJobState
 from application_form.models.application import ApplicationApartment
 
 User = get_user_model()
@@ -24,3 +28,41 @@ class LotteryEventResult(models.Model):
 
     class Meta:
         unique_together = [("event", "application_apartment")]
+
+
+class LotteryJob(TimestampedModel):
+    """A lottery of a project, run in the background by the run_lottery_jobs worker."""
+
+    project_uuid = models.UUIDField(verbose_name=_("project uuid"), db_index=True)
+    state = EnumField(
+        LotteryJobState,
+        max_length=15,
+        verbose_name=_("state"),
+        default=LotteryJobState.PENDING,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("user"),
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+    )
+    started_at = models.DateTimeField(verbose_name=_("started at"), null=True)
+    finished_at = models.DateTimeField(verbose_name=_("finished at"), null=True)
+    error = models.TextField(verbose_name=_("error"), blank=True)
+
+    class Meta:
+        ordering = ("id",)
+        constraints = [
+            # A project can only have one lottery waiting or running at a time
+            models.UniqueConstraint(
+                fields=["project_uuid"],
+                condition=Q(
+                    state__in=[
+                        LotteryJobState.PENDING.value,
+                        LotteryJobState.RUNNING.value,
+                    ]
+                ),
+                name="lotteryjob_one_active_per_project",
+            )
+        ]
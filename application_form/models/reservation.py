@@ -4,7 +4,8 @@ from typing import Optional
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
-from django.db.models import Deferrable, UniqueConstraint
+from django.db.models import Deferrable, F, UniqueConstraint, Window
+from django.db.models.functions import RowNumber
 from django.utils.translation import gettext_lazy as _
 from enumfields import EnumField
 from pgcrypto.fields import BooleanPGPPublicKeyField, CharPGPPublicKeyField
@@ -42,6 +43,18 @@ class ApartmentReservationQuerySet(models.QuerySet):
     def active(self):
         return self.exclude(state=ApartmentReservationState.CANCELED)
 
+    def with_list_rank(self):
+        """Annotate `list_rank`, the dense 1-based position of each reservation in its
+        apartment's list. Unlike `list_position`, it has no gaps even when
+        SPARSE_LIST_POSITIONS is enabled."""
+        return self.annotate(
+            list_rank=Window(
+                RowNumber(),
+                partition_by=[F("apartment_uuid")],
+                order_by=F("list_position").asc(),
+            )
+        )
+
     def first_in_queue(
         self, apartment_uuid: uuid.UUID
     ) -> Optional["ApartmentReservation"]:
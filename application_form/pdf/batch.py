@@ -0,0 +1,232 @@
+"""
+Contracts and invoices of all the reserved apartments of a project.
+
+The data of the documents is fetched up front: the reservations, customers and
+installments with a few queries and the apartments with a single ElasticSearch search.
+The templates are then filled in a pool of `PDF_RENDER_PROCESSES` processes, and
+`bundle_project_documents` returns the documents either as a ZIP file or merged into
+a single PDF.
+"""
+
+import dataclasses
+import zipfile
+from collections import defaultdict
+from io import BytesIO
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db.models import QuerySet
+
+from apartment.elastic.cache import document_cache_scope
+from apartment.elastic.documents import ApartmentDocument
+from apartment.elastic.queries import (
+    get_apartment_uuids,
+    get_apartments_by_uuids,
+    get_project,
+)
+from apartment.enums import OwnershipType
+from apartment_application_service.pdf import create_pdfs, merge_pdfs
+from apartment_application_service.utils import SafeAttributeObject
+from application_form.models import ApartmentReservation
+from application_form.pdf.haso import (
+    get_haso_contract_pdf_data,
+    HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+)
+from application_form.pdf.hitas import (
+    get_hitas_contract_pdf_data,
+    HITAS_COMPLETE_APARTMENT_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+    HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+)
+from application_form.utils import get_apartment_number_sort_tuple
+from invoicing.enums import InstallmentType
+from invoicing.models import ApartmentInstallment, ProjectInstallmentTemplate
+from invoicing.pdf import (
+    get_invoice_pdf_data_from_installments,
+    INVOICE_PDF_TEMPLATE_FILE_NAME,
+)
+from users.models import User
+
+BATCH_OUTPUT_ZIP = "zip"
+BATCH_OUTPUT_PDF = "pdf"
+BATCH_OUTPUTS = [BATCH_OUTPUT_ZIP, BATCH_OUTPUT_PDF]
+
+
+@dataclasses.dataclass
+class ProjectDocument:
+    file_name: str
+    content: bytes
+
+
+def render_project_contracts(
+    project_uuid,
+    salesperson: Optional[User] = None,
+    sales_price_paid_place: Optional[str] = None,
+    sales_price_paid_time: Optional[str] = None,
+) -> List[ProjectDocument]:
+    """Render the contracts of the reserved apartments of the project.
+
+    A salesperson is required for Hitas contracts."""
+    with document_cache_scope():
+        project = get_project(project_uuid)
+        reservations, apartments = _get_reservations_and_apartments(
+            project_uuid,
+            ApartmentReservation.objects.prefetch_related("apartment_installments"),
+        )
+
+        ownership_type = project.project_ownership_type.lower()
+        if ownership_type == OwnershipType.HITAS.value:
+            if salesperson is None:
+                raise ValueError("Hitas contracts require a salesperson")
+            installment_templates = list(
+                ProjectInstallmentTemplate.objects.filter(project_uuid=project_uuid)
+            )
+            template_file_name = (
+                HITAS_COMPLETE_APARTMENT_CONTRACT_PDF_TEMPLATE_FILE_NAME
+                if project.project_use_complete_contract
+                else HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME
+            )
+            file_name_prefix = "hitas_sopimus"
+            pdf_data_list = [
+                get_hitas_contract_pdf_data(
+                    apartment=SafeAttributeObject(apartment),
+                    reservation=reservation,
+                    sales_price_paid_place=sales_price_paid_place or "",
+                    sales_price_paid_time=sales_price_paid_time or "",
+                    salesperson=salesperson,
+                    installment_templates=installment_templates,
+                )
+                for reservation, apartment in zip(reservations, apartments)
+            ]
+        elif ownership_type == OwnershipType.HASO.value:
+            template_file_name = HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME
+            file_name_prefix = "haso_sopimus"
+            pdf_data_list = [
+                get_haso_contract_pdf_data(
+                    reservation,
+                    salesperson=salesperson,
+                    sales_price_paid_place=sales_price_paid_place,
+                    sales_price_paid_time=sales_price_paid_time,
+                )
+                for reservation in reservations
+            ]
+        else:
+            raise ValueError(
+                f"Unknown ownership_type: {project.project_ownership_type}"
+            )
+
+    # the fields are given unique names so that the documents can be merged
+    contents = create_pdfs(template_file_name, pdf_data_list, unique_field_names=True)
+    return [
+        ProjectDocument(_get_file_name(file_name_prefix, apartment), content)
+        for apartment, content in zip(apartments, contents)
+    ]
+
+
+def render_project_invoices(
+    project_uuid,
+    installment_types: Optional[Iterable[InstallmentType]] = None,
+) -> List[ProjectDocument]:
+    """Render the invoices of the reserved apartments of the project, one document of
+    all the invoices of each reservation."""
+    with document_cache_scope():
+        # the project of the apartments is needed for each invoice
+        get_project(project_uuid)
+        reservations, apartments = _get_reservations_and_apartments(
+            project_uuid, ApartmentReservation.objects.all()
+        )
+
+        installments = (
+            ApartmentInstallment.objects.filter(apartment_reservation__in=reservations)
+            .select_related(
+                "apartment_reservation__customer__primary_profile",
+                "apartment_reservation__customer__secondary_profile",
+            )
+            .order_by("id")
+        )
+        if installment_types is not None:
+            installments = installments.filter(type__in=installment_types)
+        installments = list(installments)
+        installments_by_reservation_id = defaultdict(list)
+        for installment, pdf_data in zip(
+            installments, get_invoice_pdf_data_from_installments(installments)
+        ):
+            installments_by_reservation_id[installment.apartment_reservation_id].append(
+                pdf_data
+            )
+
+        invoiced = [
+            (apartment, installments_by_reservation_id[reservation.id])
+            for reservation, apartment in zip(reservations, apartments)
+            if reservation.id in installments_by_reservation_id
+        ]
+
+    contents = create_pdfs(
+        INVOICE_PDF_TEMPLATE_FILE_NAME,
+        [pdf_data_list for _, pdf_data_list in invoiced],
+        unique_field_names=True,
+    )
+    return [
+        ProjectDocument(_get_file_name("laskut", apartment), content)
+        for (apartment, _), content in zip(invoiced, contents)
+    ]
+
+
+def bundle_project_documents(
+    documents: List[ProjectDocument], output: str = BATCH_OUTPUT_ZIP
+) -> BytesIO:
+    """Return the documents as a ZIP file or merged into a single PDF."""
+    if output == BATCH_OUTPUT_PDF:
+        return merge_pdfs(document.content for document in documents)
+    if output != BATCH_OUTPUT_ZIP:
+        raise ValueError(f"Unknown output: {output}")
+
+    zip_bytes = BytesIO()
+    file_names = defaultdict(int)
+    with zipfile.ZipFile(zip_bytes, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for document in documents:
+            file_name = document.file_name
+            # apartments without a title would all get the same file name
+            file_names[file_name] += 1
+            if file_names[file_name] > 1:
+                file_name = f"{file_name}_{file_names[file_name]}"
+            zip_file.writestr(f"{file_name}.pdf", document.content)
+    zip_bytes.seek(0)
+    return zip_bytes
+
+
+def _get_reservations_and_apartments(
+    project_uuid, queryset: QuerySet
+) -> Tuple[List[ApartmentReservation], List[ApartmentDocument]]:
+    """Get the reservations that hold the apartments of the project, and the apartments
+    of the reservations, sorted by the apartment number."""
+    reservations = list(
+        queryset.reserved()
+        .filter(
+            apartment_uuid__in=get_apartment_uuids(project_uuid),
+            queue_position=1,
+        )
+        .select_related("customer__primary_profile", "customer__secondary_profile")
+    )
+    apartments: Dict[str, ApartmentDocument] = get_apartments_by_uuids(
+        (reservation.apartment_uuid for reservation in reservations),
+        include_project_fields=True,
+    )
+
+    reservations_and_apartments = sorted(
+        (
+            (reservation, apartments[str(reservation.apartment_uuid)])
+            for reservation in reservations
+            if str(reservation.apartment_uuid) in apartments
+        ),
+        key=lambda item: get_apartment_number_sort_tuple(
+            item[1].apartment_number or ""
+        ),
+    )
+    return (
+        [reservation for reservation, _ in reservations_and_apartments],
+        [apartment for _, apartment in reservations_and_apartments],
+    )
+
+
+def _get_file_name(prefix: str, apartment: ApartmentDocument) -> str:
+    title = (apartment.title or "").strip().lower().replace(" ", "_").replace(",", "")
+    return f"{prefix}_{title}" if title else prefix
@@ -0,0 +1,222 @@
+"""
+Benchmark of the PDF pipelines.
+
+Each pipeline fills its template with fixture data for a given number of records, like
+`create_pdf` does for the invoices of a reservation. Every run is done in a forked
+process of its own, so that the peak memory of the run can be read from the resource
+usage of that process: most of the memory is allocated by qpdf outside of the Python
+heap, where `tracemalloc` cannot see it.
+
+The contract pipelines are filled with the contract data of the PDF tests, so the
+benchmark is run with the test settings.
+
+The results are compared against a baseline with `find_regressions`. The measurements
+are absolute and only comparable on the machine they were made on, so no baseline is
+stored in the repository: it is recorded locally with `benchmark_pdfs
+--update-baseline` before the changes to be measured. Even on the same machine the wall
+time varies from run to run, so by default only the peak memory and the output size
+fail the check, and slower runs are only reported.
+"""
+
+import dataclasses
+import json
+import multiprocessing
+import resource
+import time
+from datetime import date
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+from apartment_application_service.pdf import (
+    create_pdf,
+    get_pdf_template,
+    PDF_TEMPLATE_DIRECTORY,
+    PDFCurrencyField,
+    PDFData,
+)
+from application_form.pdf.haso import (
+    HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME,
+    HASO_RELEASE_PDF_TEMPLATE_FILE_NAME,
+    HasoReleasePDFData,
+)
+from application_form.pdf.hitas import HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME
+from invoicing.pdf import INVOICE_PDF_TEMPLATE_FILE_NAME, InvoicePDFData
+
+DEFAULT_RECORD_COUNTS = [1, 10, 100]
+METRICS = ["seconds", "peak_memory_kib", "output_bytes"]
+# The metrics that fail the check by default, see the module docstring
+CHECKED_METRICS = ["peak_memory_kib", "output_bytes"]
+
+
+@dataclasses.dataclass
+class PDFPipeline:
+    template_file_name: str
+    get_pdf_data: Callable[[], PDFData]
+
+
+@dataclasses.dataclass
+class PDFBenchmarkResult:
+    pipeline: str
+    records: int
+    seconds: float
+    peak_memory_kib: int
+    output_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.pipeline}:{self.records}"
+
+
+def _get_hitas_contract_pdf_data() -> PDFData:
+    # The contract data belongs to the tests, so it is imported only here
+    from application_form.tests.test_pdf_hitas import CONTRACT_PDF_DATA
+
+    return CONTRACT_PDF_DATA
+
+
+def _get_haso_contract_pdf_data() -> PDFData:
+    from application_form.tests.test_pdf_haso import CONTRACT_PDF_DATA
+
+    return CONTRACT_PDF_DATA
+
+
+def _get_haso_release_pdf_data() -> PDFData:
+    return HasoReleasePDFData(
+        project_housing_company="Lämmin Koti Oy",
+        project_street_address="Lämpimäntie 9 00100 Helsinki",
+        project_completion_date=date(2021, 5, 31),
+        apartment_number="C 12",
+        occupant_names="Asta Asukas, Bertta Asukas",
+        occupant_phone_numbers="040 123 4567, 050 987 6543",
+        right_of_residence_number="1234",
+        release_date=date(2024, 3, 1),
+        original_right_of_occupancy_payment=PDFCurrencyField(cents=4521400),
+        payment_1_date=date(2020, 8, 19),
+        payment_1_cost_index=Decimal("112.40"),
+        release_date_cost_index=Decimal("131.25"),
+        adjusted_right_of_occupancy_payment=PDFCurrencyField(cents=5279650),
+        alteration_work=PDFCurrencyField(cents=120000),
+        refund=PDFCurrencyField(cents=0),
+        release_payment=PDFCurrencyField(cents=5399650),
+        document_date=date(2024, 2, 1),
+        sales_person_name="Maija Myyjä",
+    )
+
+
+def _get_invoice_pdf_data() -> PDFData:
+    return InvoicePDFData(
+        recipient="Lämmin Koti Oy",
+        recipient_account_number="Pankki FI12 3456 7890 1234 56",
+        payer_name_and_address="Matti Meikäläinen\n\nAstankuja 12a5\n00100 Helsinki",
+        reference_number="RF12 3456 7890",
+        due_date=date(2024, 3, 1),
+        amount=Decimal("46537.45"),
+        apartment="Huoneisto C 12\n\n1. maksuerä" + 20 * " " + "46537,45 €",
+    )
+
+
+PDF_PIPELINES: Dict[str, PDFPipeline] = {
+    "hitas_contract": PDFPipeline(
+        HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME, _get_hitas_contract_pdf_data
+    ),
+    "haso_contract": PDFPipeline(
+        HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME, _get_haso_contract_pdf_data
+    ),
+    "haso_release": PDFPipeline(
+        HASO_RELEASE_PDF_TEMPLATE_FILE_NAME, _get_haso_release_pdf_data
+    ),
+    "invoice": PDFPipeline(INVOICE_PDF_TEMPLATE_FILE_NAME, _get_invoice_pdf_data),
+}
+
+
+def run_pdf_benchmark(
+    pipelines: Optional[Iterable[str]] = None,
+    record_counts: Iterable[int] = DEFAULT_RECORD_COUNTS,
+    repeat: int = 3,
+) -> List[PDFBenchmarkResult]:
+    """Run the given pipelines, by default all of them, for each record count.
+
+    Of the repeated runs the fastest one and the smallest peak memory are reported.
+    """
+    context = multiprocessing.get_context("fork")
+    results = []
+    for name in pipelines or PDF_PIPELINES:
+        # the template is loaded before the runs are forked, as it is cached for the
+        # lifetime of an application process
+        get_pdf_template(
+            f"{PDF_TEMPLATE_DIRECTORY}/{PDF_PIPELINES[name].template_file_name}"
+        )
+        for records in record_counts:
+            with context.Pool(processes=1, maxtasksperchild=1) as pool:
+                runs = [
+                    pool.apply(_run_pipeline, (name, records)) for _ in range(repeat)
+                ]
+            results.append(
+                PDFBenchmarkResult(
+                    pipeline=name,
+                    records=records,
+                    seconds=min(seconds for seconds, _, _ in runs),
+                    peak_memory_kib=min(peak for _, peak, _ in runs),
+                    output_bytes=runs[0][2],
+                )
+            )
+    return results
+
+
+def _run_pipeline(name: str, records: int):
+    pipeline = PDF_PIPELINES[name]
+    pdf_data = pipeline.get_pdf_data()
+    memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    pdf = create_pdf(pipeline.template_file_name, [pdf_data] * records)
+    seconds = time.perf_counter() - start
+
+    peak_memory_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory_before
+    return seconds, peak_memory_kib, len(pdf.getvalue())
+
+
+def read_baseline(path: str) -> Dict[str, Dict[str, float]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_baseline(path: str, results: Iterable[PDFBenchmarkResult]) -> None:
+    baseline = {}
+    try:
+        baseline = read_baseline(path)
+    except FileNotFoundError:
+        pass
+    for result in results:
+        baseline[result.key] = {
+            metric: round(getattr(result, metric), 4) for metric in METRICS
+        }
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(
+    results: Iterable[PDFBenchmarkResult],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float = 0.25,
+    metrics: Iterable[str] = CHECKED_METRICS,
+) -> List[str]:
+    """Return a description of each measurement of the given metrics that exceeds its
+    baseline value by more than the tolerance. Results without a baseline are not
+    checked."""
+    regressions = []
+    for result in results:
+        if (expected := baseline.get(result.key)) is None:
+            continue
+        for metric in metrics:
+            if metric not in expected:
+                continue
+            value = getattr(result, metric)
+            limit = expected[metric] * (1 + tolerance)
+            if value > limit:
+                regressions.append(
+                    f"{result.key} {metric} {value:g} exceeds the baseline "
+                    f"{expected[metric]:g} by more than {tolerance:.0%}"
+                )
+    return regressions
@@ -11,6 +11,7 @@ from apartment_application_service.pdf import create_pdf, PDFCurrencyField, PDFD
 from apartment_application_service.utils import SafeAttributeObject
 from application_form.models import ApartmentReservation
 from invoicing.enums import InstallmentType
+from invoicing.utils import get_reservation_installment
 from users.models import User
 
 HASO_CONTRACT_PDF_TEMPLATE_FILE_NAME = "haso_contract_template.pdf"
@@ -166,9 +167,9 @@ def get_haso_contract_pdf_data(
     apartment = get_apartment(reservation.apartment_uuid, include_project_fields=True)
 
     first_payment = SafeAttributeObject(
-        reservation.apartment_installments.filter(
-            type=InstallmentType.RIGHT_OF_OCCUPANCY_PAYMENT
-        ).first()
+        get_reservation_installment(
+            reservation, InstallmentType.RIGHT_OF_OCCUPANCY_PAYMENT
+        )
     )
 
     completion_start = apartment.project_contract_estimated_handover_date_start
@@ -18,7 +18,7 @@ from invoicing.enums import (
     InstallmentUnit,
 )
 from invoicing.models import ApartmentInstallment, ProjectInstallmentTemplate
-from invoicing.utils import remove_exponent
+from invoicing.utils import get_reservation_installment, remove_exponent
 from users.models import User
 
 HITAS_CONTRACT_PDF_TEMPLATE_FILE_NAME = "hitas_contract_template.pdf"
@@ -396,7 +396,10 @@ def get_hitas_contract_pdf_data(
     sales_price_paid_place: str,
     sales_price_paid_time: str,
     salesperson: User,
+    installment_templates: Optional[List[ProjectInstallmentTemplate]] = None,
 ) -> Union[HitasContractPDFData, HitasCompleteApartmentContractPDFData]:
+    """`installment_templates` can be given to avoid fetching the installment templates
+    of the project for every contract."""
     customer = SafeAttributeObject(reservation.customer)
     primary_profile = SafeAttributeObject(customer.primary_profile)
     secondary_profile = SafeAttributeObject(customer.secondary_profile)
@@ -413,12 +416,10 @@ def get_hitas_contract_pdf_data(
         payment_5,
         payment_6,
         payment_7,
-    ) = _get_numbered_installments(apartment, reservation)
+    ) = _get_numbered_installments(apartment, reservation, installment_templates)
 
     down_payment = SafeAttributeObject(
-        reservation.apartment_installments.filter(
-            type=InstallmentType.DOWN_PAYMENT
-        ).first()
+        get_reservation_installment(reservation, InstallmentType.DOWN_PAYMENT)
     )
 
     sales_price_paid_place_and_time = (
@@ -679,16 +680,30 @@ def create_hitas_contract_pdf_from_data(
 
 
 def _get_numbered_installments(
-    apartment, reservation: ApartmentReservation
+    apartment,
+    reservation: ApartmentReservation,
+    installment_templates: Optional[List[ProjectInstallmentTemplate]] = None,
 ) -> List[ApartmentInstallment]:
-    try:
-        flexible_type = ProjectInstallmentTemplate.objects.get(
-            project_uuid=apartment.project_uuid,
-            unit=InstallmentUnit.PERCENT,
-            percentage_specifier=InstallmentPercentageSpecifier.SALES_PRICE_FLEXIBLE,
-        ).type
-    except ProjectInstallmentTemplate.DoesNotExist:
-        flexible_type = None
+    if installment_templates is None:
+        try:
+            flexible_type = ProjectInstallmentTemplate.objects.get(
+                project_uuid=apartment.project_uuid,
+                unit=InstallmentUnit.PERCENT,
+                percentage_specifier=InstallmentPercentageSpecifier.SALES_PRICE_FLEXIBLE,  # noqa: E501
+            ).type
+        except ProjectInstallmentTemplate.DoesNotExist:
+            flexible_type = None
+    else:
+        flexible_type = next(
+            (
+                template.type
+                for template in installment_templates
+                if template.unit == InstallmentUnit.PERCENT
+                and template.percentage_specifier
+                == InstallmentPercentageSpecifier.SALES_PRICE_FLEXIBLE
+            ),
+            None,
+        )
 
     numbered_installments = []
     flexible_installment = None
@@ -703,9 +718,7 @@ def _get_numbered_installments(
         InstallmentType.PAYMENT_6,
         InstallmentType.PAYMENT_7,
     ):
-        if installment := reservation.apartment_installments.filter(
-            type=payment_type
-        ).first():
+        if installment := get_reservation_installment(reservation, payment_type):
             if installment.type == flexible_type:
                 flexible_installment = installment
             else:
@@ -1,7 +1,7 @@
 import logging
 import uuid
 from datetime import date
-from typing import Iterable, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from django.contrib.auth import get_user_model
 from django.core.mail import EmailMessage
@@ -30,6 +30,7 @@ from application_form.services.queue import (
 )
 from audit_log import audit_logging
 from audit_log.enums import Operation
+from customer.models import Customer
 from customer.services import get_or_create_customer_from_profiles
 from users.models import Profile
 
@@ -92,85 +93,149 @@ def create_application(
     user: Optional[User] = None,
     submitted_late: bool = False,
 ) -> Application:
-    _logger.debug(
-        "Creating a new application with external UUID %s",
-        application_data["external_uuid"],
-    )
-    data = application_data.copy()
-    profile = data.pop("profile")
-    applicant_data = data.pop("applicant")
-    additional_applicant_data = data.pop("additional_applicant", None)
-    customer = get_or_create_customer_from_profiles(
-        profile, additional_applicant_data, data.get("has_children")
-    )
-    update_profile_from_application_data(profile, application_data)
-    application = Application.objects.create(
-        external_uuid=data.pop("external_uuid"),
-        applicants_count=2 if additional_applicant_data else 1,
-        type=data.pop("type"),
-        has_children=data.pop("has_children"),
-        right_of_residence=data.pop("right_of_residence"),
-        right_of_residence_is_old_batch=data.pop(
-            "right_of_residence_is_old_batch", None
-        ),
-        has_hitas_ownership=data.pop("has_hitas_ownership"),
-        is_right_of_occupancy_housing_changer=data.pop(
-            "is_right_of_occupancy_housing_changer"
-        ),
-        customer=customer,
-        process_number=data.pop("process_number"),
-        handler_information=data.pop("handler_information"),
-        method_of_arrival=data.pop("method_of_arrival"),
-        sender_names=data.pop("sender_names"),
-        submitted_late=submitted_late,
-    )
+    return create_applications([application_data], user, [submitted_late])[0]
 
-    Applicant.objects.create(
-        first_name=applicant_data["first_name"],
-        last_name=applicant_data["last_name"],
-        email=applicant_data["email"],
-        phone_number=applicant_data["phone_number"],
-        street_address=applicant_data["street_address"],
-        city=applicant_data["city"],
-        postal_code=applicant_data["postal_code"],
-        age=_calculate_age(applicant_data["date_of_birth"]),
-        date_of_birth=applicant_data["date_of_birth"],
-        ssn_suffix=applicant_data["ssn_suffix"],
-        contact_language=applicant_data.get(
-            "contact_language", profile.contact_language
-        ),
-        is_primary_applicant=True,
-        application=application,
-    )
-    if additional_applicant_data:
-        Applicant.objects.create(
-            first_name=additional_applicant_data["first_name"],
-            last_name=additional_applicant_data["last_name"],
-            email=additional_applicant_data["email"],
-            phone_number=additional_applicant_data["phone_number"],
-            street_address=additional_applicant_data["street_address"],
-            city=additional_applicant_data["city"],
-            postal_code=additional_applicant_data["postal_code"],
-            age=_calculate_age(additional_applicant_data["date_of_birth"]),
-            date_of_birth=additional_applicant_data["date_of_birth"],
-            ssn_suffix=additional_applicant_data["ssn_suffix"],
-            application=application,
+
+@transaction.atomic
+def create_applications(
+    applications_data: List[dict],
+    user: Optional[User] = None,
+    submitted_late: Optional[List[bool]] = None,
+) -> List[Application]:
+    """
+    Create the given applications and add them to the apartment queues.
+
+    The applications, applicants and applied apartments of all the applications are
+    inserted with a single query each, and the customer of each pair of applicants
+    is resolved only once. The applications are added to the queues in the given
+    order, since each queue insertion depends on the previous ones.
+    """
+    if submitted_late is None:
+        submitted_late = [False] * len(applications_data)
+
+    customers = {}
+    applications = []
+    applicants = []
+    application_apartments = []
+    for application_data, is_submitted_late in zip(applications_data, submitted_late):
+        _logger.debug(
+            "Creating a new application with external UUID %s",
+            application_data["external_uuid"],
+        )
+        data = application_data.copy()
+        profile = data.pop("profile")
+        applicant_data = data.pop("applicant")
+        additional_applicant_data = data.pop("additional_applicant", None)
+        customer = _get_or_create_customer(
+            customers, profile, additional_applicant_data, data.get("has_children")
         )
-    apartment_data = data.pop("apartments")
-    for apartment_item in apartment_data:
-        ApplicationApartment.objects.create(
-            application=application,
-            apartment_uuid=apartment_item["identifier"],
-            priority_number=apartment_item["priority"],
+        update_profile_from_application_data(profile, application_data)
+        application = Application(
+            external_uuid=data.pop("external_uuid"),
+            applicants_count=2 if additional_applicant_data else 1,
+            type=data.pop("type"),
+            has_children=data.pop("has_children"),
+            right_of_residence=data.pop("right_of_residence"),
+            right_of_residence_is_old_batch=data.pop(
+                "right_of_residence_is_old_batch", None
+            ),
+            has_hitas_ownership=data.pop("has_hitas_ownership"),
+            is_right_of_occupancy_housing_changer=data.pop(
+                "is_right_of_occupancy_housing_changer"
+            ),
+            customer=customer,
+            process_number=data.pop("process_number"),
+            handler_information=data.pop("handler_information"),
+            method_of_arrival=data.pop("method_of_arrival"),
+            sender_names=data.pop("sender_names"),
+            submitted_late=is_submitted_late,
         )
+        applications.append(application)
+
+        applicants.append(
+            Applicant(
+                first_name=applicant_data["first_name"],
+                last_name=applicant_data["last_name"],
+                email=applicant_data["email"],
+                phone_number=applicant_data["phone_number"],
+                street_address=applicant_data["street_address"],
+                city=applicant_data["city"],
+                postal_code=applicant_data["postal_code"],
+                age=_calculate_age(applicant_data["date_of_birth"]),
+                date_of_birth=applicant_data["date_of_birth"],
+                ssn_suffix=applicant_data["ssn_suffix"],
+                contact_language=applicant_data.get(
+                    "contact_language", profile.contact_language
+                ),
+                is_primary_applicant=True,
+                application=application,
+            )
+        )
+        if additional_applicant_data:
+            applicants.append(
+                Applicant(
+                    first_name=additional_applicant_data["first_name"],
+                    last_name=additional_applicant_data["last_name"],
+                    email=additional_applicant_data["email"],
+                    phone_number=additional_applicant_data["phone_number"],
+                    street_address=additional_applicant_data["street_address"],
+                    city=additional_applicant_data["city"],
+                    postal_code=additional_applicant_data["postal_code"],
+                    age=_calculate_age(additional_applicant_data["date_of_birth"]),
+                    date_of_birth=additional_applicant_data["date_of_birth"],
+                    ssn_suffix=additional_applicant_data["ssn_suffix"],
+                    application=application,
+                )
+            )
+        for apartment_item in data.pop("apartments"):
+            application_apartments.append(
+                ApplicationApartment(
+                    application=application,
+                    apartment_uuid=apartment_item["identifier"],
+                    priority_number=apartment_item["priority"],
+                )
+            )
 
-    _logger.debug(
-        "Application created with external UUID %s", application_data["external_uuid"]
-    )
+    for application in applications:
+        application.set_right_of_residence_is_old_batch()
+    Application.objects.bulk_create(applications)
+    for applicant in applicants:
+        applicant.set_national_identification_number_index()
+    Applicant.objects.bulk_create(applicants)
+    ApplicationApartment.objects.bulk_create(application_apartments)
+
+    for application in applications:
+        _logger.debug(
+            "Application created with external UUID %s", application.external_uuid
+        )
+        add_application_to_queues(application, user=user)
+
+    return applications
 
-    add_application_to_queues(application, user=user)
 
-    return application
+def _get_or_create_customer(
+    customers: Dict[Tuple, Customer],
+    profile: Profile,
+    additional_applicant_data: Optional[dict],
+    has_children: Optional[bool],
+) -> Customer:
+    """Resolve the customer of the applicants, reusing the customers already resolved
+    for the same applicants in the given dict."""
+    key = (profile.pk,)
+    if additional_applicant_data:
+        key += (
+            additional_applicant_data["date_of_birth"],
+            additional_applicant_data["ssn_suffix"],
+        )
+    customer = customers.get(key)
+    if customer is None:
+        customer = customers[key] = get_or_create_customer_from_profiles(
+            profile, additional_applicant_data, has_children
+        )
+    elif customer.has_children != has_children:
+        customer.has_children = has_children
+        customer.save(update_fields=["has_children", "updated_at"])
+    return customer
 
 
 def update_profile_from_application_data(profile: Profile, data: dict) -> None:
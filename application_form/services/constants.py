@@ -4,3 +4,8 @@ from typing import Final
 # the [1..N] range that the shuffle/reorder will assign. Must be
 # larger than any realistic queue size for a single apartment.
 LIST_POSITION_BUMP_OFFSET: Final[int] = 10_000
+
+# Distance between consecutive list_positions when SPARSE_LIST_POSITIONS is enabled.
+# A queue is respaced when a reservation has to be inserted between two adjacent
+# list positions.
+LIST_POSITION_GAP: Final[int] = 1024
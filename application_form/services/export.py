@@ -1,4 +1,6 @@
+import codecs
 import csv
+import itertools
 import logging
 import operator
 import re
@@ -6,12 +8,11 @@ from abc import abstractmethod
 from datetime import datetime
 from decimal import Decimal
 from io import BytesIO, StringIO
-from typing import List, Literal, Union
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
 
 import xlsxwriter
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import CharField, Max, Q, QuerySet
-from django.db.models.functions import Cast
+from django.db.models import Max, Q, QuerySet
 
 from apartment.elastic.documents import ApartmentDocument
 from apartment.elastic.queries import (
@@ -19,10 +20,16 @@ from apartment.elastic.queries import (
     get_apartment_project_uuid,
     get_apartment_uuids,
     get_apartments,
+    get_apartments_by_project_uuids,
+    get_apartments_by_uuids,
     get_project,
+    iter_projects,
 )
 from apartment.enums import ApartmentState, OwnershipType
-from apartment.utils import get_apartment_state_from_apartment_uuid
+from apartment.utils import (
+    get_apartment_state_from_apartment_uuid,
+    get_apartment_states_from_apartment_uuids,
+)
 from application_form.enums import (
     ApartmentReservationCancellationReason,
     ApartmentReservationState,
@@ -137,16 +144,45 @@ def _get_reservation_cell_value(
     return ""
 
 
+def _get_apartment_from_map(apartments: dict, apartment_uuid) -> ApartmentDocument:
+    try:
+        return apartments[str(apartment_uuid)]
+    except KeyError:
+        raise ObjectDoesNotExist("Apartment does not exist in ElasticSearch.")
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
 class XlsxExportService:
     COL_WIDTH = 4
+    # Number of columns the colored rows are padded to. If not set, all rows are
+    # built before writing the workbook to find out the widest row.
+    COLUMN_COUNT: Optional[int] = None
 
     @abstractmethod
     def get_rows(self):
         pass
 
-    def write_xlsx_file(self) -> BytesIO:
+    def iter_rows(self) -> Iterator[list]:
+        """Yield the rows of the export. Services that can produce their rows lazily
+        override this, the others build all rows with `get_rows`."""
+        return iter(self.get_rows())
+
+    def write_xlsx_file(self, constant_memory: bool = True) -> BytesIO:
+        """
+        Write the workbook into a `BytesIO`.
+
+        With `constant_memory` the rows are flushed to a temporary file as they are
+        written, so the memory use does not grow with the number of rows. Otherwise
+        the whole workbook is built in memory.
+        """
         output = BytesIO()
-        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
+        options = {"constant_memory": True} if constant_memory else {"in_memory": True}
+        workbook = xlsxwriter.Workbook(output, options)
         self._make_xlsx(workbook)
         workbook.close()
         output.seek(0)
@@ -157,40 +193,52 @@ class XlsxExportService:
     ) -> xlsxwriter.workbook.Workbook:
         worksheet = workbook.add_worksheet()
 
-        rows = self.get_rows()
-        last_column_idx = max(len(r) for r in rows)
+        rows = self.iter_rows()
+        column_count = self.COLUMN_COUNT
+        if column_count is None:
+            rows = list(rows)
+            column_count = max((len(row) for row in rows), default=0)
 
-        cell_format_default = workbook.add_format()
-        cell_format_default.set_text_wrap()
+        # the columns must be set up before any rows are written in constant memory
+        # mode
+        worksheet.set_column(0, column_count, self.COL_WIDTH)
 
+        cell_formats = {}
         for i, row in enumerate(rows):
+            row = list(row)
             # if the last item in the row is a hex representation of a color
             # use it as the row's background. Not the smartest way to do this
-            if str(row[-1]).startswith("#"):
-                cell_format = workbook.add_format({"bg_color": row.pop()})
-                cell_format.set_text_wrap()
-
-            for j, cell in enumerate(row):
-                worksheet.write(i, j, cell, cell_format)
-
-            if cell_format.bg_color is not False:
+            bg_color = row.pop() if row and str(row[-1]).startswith("#") else None
+            if bg_color is not None:
                 # color rows to the same width regardless of content
-                for k in range(j, last_column_idx):
-                    try:
-                        cell = rows[i][k]
-                    except IndexError:
-                        cell = ""
-                    worksheet.write(i, k, cell, cell_format)
+                row += [""] * (column_count - len(row))
 
-            cell_format = cell_format_default
+            worksheet.write_row(
+                i, 0, row, self._get_cell_format(workbook, cell_formats, bg_color)
+            )
 
-        worksheet.set_column(0, last_column_idx, self.COL_WIDTH)
+    def _get_cell_format(
+        self,
+        workbook: xlsxwriter.workbook.Workbook,
+        cell_formats: Dict[Optional[str], xlsxwriter.format.Format],
+        bg_color: Optional[str],
+    ) -> xlsxwriter.format.Format:
+        """Get the cell format of the background color, creating each format only
+        once per workbook."""
+        if bg_color not in cell_formats:
+            properties = {"text_wrap": True}
+            if bg_color is not None:
+                properties["bg_color"] = bg_color
+            cell_formats[bg_color] = workbook.add_format(properties)
+        return cell_formats[bg_color]
 
 
 class CSVExportService:
     CSV_DELIMITER = ";"
     FILE_ENCODING = "utf-8-sig"
     COLUMNS = []
+    # Rows are encoded and handed out in chunks of about this many bytes
+    CHUNK_SIZE = 64 * 1024
 
     @abstractmethod
     def get_rows(self):
@@ -200,29 +248,56 @@ class CSVExportService:
     def get_row(self, *args, **kwargs):
         pass
 
+    def iter_rows(self) -> Iterator[list]:
+        """Yield the rows of the export. Services that can produce their rows lazily
+        override this, the others build all rows with `get_rows`."""
+        return iter(self.get_rows())
+
     def _get_header_row(self):
         return [col[0] for col in self.COLUMNS]
 
     def write_csv_file(self, path):
-        csv_string = self.get_csv_string()
-        with open(path, encoding=self.FILE_ENCODING, mode="w") as f:
-            f.write(csv_string)
+        with open(path, mode="wb") as f:
+            for chunk in self.iter_csv_chunks():
+                f.write(chunk)
 
     def get_csv_string(self):
         return self._make_csv(self.get_rows())
 
-    def _make_csv(self, lines):
-        if len(lines) == 0:
-            return ""
+    def iter_csv_chunks(self) -> Iterator[bytes]:
+        """
+        Yield the export as `FILE_ENCODING` encoded CSV in chunks of about
+        `CHUNK_SIZE` bytes, starting with the byte order mark.
 
+        The first chunk is produced only after the first row has been built, so errors
+        in setting up the export are raised before anything has been sent.
+        """
+        chunk = [codecs.BOM_UTF8]
+        size = 0
+        for line in self._iter_csv_lines(self.iter_rows()):
+            encoded = line.encode("utf-8")
+            chunk.append(encoded)
+            size += len(encoded)
+            if size >= self.CHUNK_SIZE:
+                yield b"".join(chunk)
+                chunk = []
+                size = 0
+        if chunk:
+            yield b"".join(chunk)
+
+    def _iter_csv_lines(self, lines: Iterable[list]) -> Iterator[str]:
         io = StringIO()
         csv_writer = csv.writer(
             io, delimiter=self.CSV_DELIMITER, quoting=csv.QUOTE_NONNUMERIC
         )
         for line in lines:
             csv_writer.writerow(line)
+            yield io.getvalue()
+            io.seek(0)
+            io.truncate()
 
-        return io.getvalue()
+    def _make_csv(self, lines):
+        return "".join(self._iter_csv_lines(lines))
 
 
 class ApplicantMailingListExportService(CSVExportService):
@@ -385,13 +460,15 @@ class ApplicantMailingListExportService(CSVExportService):
         return reservations
 
     def get_rows(self):
-        self.filter_reservations()
+        reservations = list(self.filter_reservations())
         rows = [self._get_header_row()]
 
-        for reservation in self.reservations:
-            apartment = get_apartment(
-                reservation.apartment_uuid, include_project_fields=True
-            )
+        apartments = get_apartments_by_uuids(
+            (reservation.apartment_uuid for reservation in reservations),
+            include_project_fields=True,
+        )
+        for reservation in reservations:
+            apartment = _get_apartment_from_map(apartments, reservation.apartment_uuid)
             row = self.get_row(reservation, apartment)
             rows.append(row)
 
@@ -450,6 +527,9 @@ class ApplicantExportService(CSVExportService):
         ("Apartment area", "living_area"),
     ]
 
+    # Number of reservations whose apartments are fetched from ElasticSearch at once
+    BATCH_SIZE = 500
+
     def __init__(self, reservations):
         self.reservations = reservations
 
@@ -457,14 +537,23 @@ class ApplicantExportService(CSVExportService):
         return self.reservations
 
     def get_rows(self):
-        rows = [self._get_header_row()]
-        for reservation in self.reservations:
-            apartment = get_apartment(
-                reservation.apartment_uuid, include_project_fields=True
+        return list(self.iter_rows())
+
+    def iter_rows(self):
+        yield self._get_header_row()
+        reservations = self.reservations
+        if isinstance(reservations, QuerySet):
+            reservations = reservations.iterator(chunk_size=self.BATCH_SIZE)
+        for batch in _batched(reservations, self.BATCH_SIZE):
+            apartments = get_apartments_by_uuids(
+                (reservation.apartment_uuid for reservation in batch),
+                include_project_fields=True,
             )
-            row = self.get_row(reservation, apartment)
-            rows.append(row)
-        return rows
+            for reservation in batch:
+                apartment = _get_apartment_from_map(
+                    apartments, reservation.apartment_uuid
+                )
+                yield self.get_row(reservation, apartment)
 
     def get_row(self, reservation, apartment):
         line = []
@@ -522,33 +611,39 @@ class ProjectLotteryResultExportService(CSVExportService):
         ]
 
     def get_rows(self):
-        apartment_uuids = get_apartment_uuids(self.project.project_uuid)
-        rows = [*self._get_document_title(apartment_uuids), self._get_header_row()]
-
-        # collect rows first to this dict grouped by apartment number so that they can
-        # be sorted by apartment number for the final result
-        apartment_dict = {}
-
-        for apartment_uuid in apartment_uuids:
-            reservations = self.get_reservations_by_apartment_uuid(apartment_uuid)
-            apartment = get_apartment(apartment_uuid, include_project_fields=True)
-            apartment_dict[apartment.apartment_number] = [
-                self.get_row(apartment=apartment if idx == 0 else None, reservation=r)
-                for idx, r in enumerate(reservations)
-            ] or [
-                # no reservations, just apartment fields
-                self.get_row(apartment)
-            ]
+        return list(self.iter_rows())
 
-        for apartment_rows in dict(
-            sorted(
-                apartment_dict.items(),
-                key=lambda item: get_apartment_number_sort_tuple(item[0]),
-            )
-        ).values():
-            rows.extend(apartment_rows)
+    def iter_rows(self):
+        apartment_uuids = get_apartment_uuids(self.project.project_uuid)
+        yield from self._get_document_title(apartment_uuids)
+        yield self._get_header_row()
 
-        return rows
+        # Only the apartments are sorted by apartment number up front, the rows of
+        # each apartment are yielded as its reservations are read
+        apartments = get_apartments_by_uuids(
+            apartment_uuids, include_project_fields=True
+        )
+        sorted_apartments = sorted(
+            (
+                _get_apartment_from_map(apartments, apartment_uuid)
+                for apartment_uuid in apartment_uuids
+            ),
+            key=lambda apartment: get_apartment_number_sort_tuple(
+                apartment.apartment_number
+            ),
+        )
+        for apartment in sorted_apartments:
+            reservations = self.get_reservations_by_apartment_uuid(apartment.uuid)
+            has_reservations = False
+            for reservation in reservations.iterator():
+                yield self.get_row(
+                    apartment=None if has_reservations else apartment,
+                    reservation=reservation,
+                )
+                has_reservations = True
+            if not has_reservations:
+                # no reservations, just apartment fields
+                yield self.get_row(apartment)
 
     def get_row(self, apartment=None, reservation=None):
         line = []
@@ -560,6 +655,8 @@ class ProjectLotteryResultExportService(CSVExportService):
 
 class XlsxSalesReportExportService(XlsxExportService):
     COL_WIDTH = 26
+    # the widest rows are the header row and the termination sub-header rows
+    COLUMN_COUNT = 7
     HIGHLIGHT_COLOR = "#E8E8E8"
     ROW_TYPE_SALE = "sale"
     ROW_TYPE_TERMINATION = "termination"
@@ -572,18 +669,24 @@ class XlsxSalesReportExportService(XlsxExportService):
         self.state_events = state_events
         self.project_uuids = project_uuids
 
-        # cast uuidfield to charfield for comparison
-        self.sold_apartment_uuids = (
-            state_events.filter(state=ApartmentReservationState.SOLD)
-            .annotate(
-                auuid=Cast("reservation__apartment_uuid", output_field=CharField())
-            )
-            .order_by()
-            .distinct()
-            .values_list("auuid", flat=True)
-        )
+        self.latest_event_timestamps = self._get_latest_event_timestamps()
+        self.sold_apartment_uuids = {
+            apartment_uuid
+            for apartment_uuid, state in self.latest_event_timestamps
+            if state == ApartmentReservationState.SOLD
+        }
+        self.terminated_apartment_uuids = {
+            apartment_uuid
+            for apartment_uuid, state in self.latest_event_timestamps
+            if state == ApartmentReservationState.CANCELED
+        }
+        self._apartment_states: Dict[str, str] = {}
 
         self.projects = self._get_projects()
+        self.apartments_by_project_uuid = get_apartments_by_project_uuids(
+            (project.project_uuid for project in self.projects),
+            include_project_fields=True,
+        )
         _logger.info(
             "Creating XlsxSalesReport with projects %s and sold_apartment_uuids %s",
             self.projects,
@@ -612,9 +715,7 @@ class XlsxSalesReportExportService(XlsxExportService):
             }
             ```
         """
-        project_apartments = get_apartments(
-            project.project_uuid, include_project_fields=True
-        )
+        project_apartments = self._get_project_apartments(project)
         sold_apartments = self._get_sold_apartments(project_apartments)
         sold_hitas_apartments = self._get_hitas_apartments(sold_apartments)
         sold_haso_apartments = self._get_haso_apartments(sold_apartments)
@@ -645,17 +746,25 @@ class XlsxSalesReportExportService(XlsxExportService):
         }
 
     def get_rows(self):
-        apartments = []
-        rows = []
+        return list(self.iter_rows())
 
-        project_rows = []
+    def iter_rows(self):
+        apartments = []
         first = True
 
+        yield [
+            "Kohteen osoite",
+            "Asuntoja yhteensä",
+            "Myydyt HITAS-asunnot",
+            "Myydyt HASO-asunnot",
+            "Myymättömät asunnot",
+            "Puretut/irtisanotut kaupat",
+            self.HIGHLIGHT_COLOR,
+        ]
+
         for project in self.projects:
 
-            project_apartments = get_apartments(
-                project.project_uuid, include_project_fields=True
-            )
+            project_apartments = self._get_project_apartments(project)
 
             apartments += project_apartments
             rows_for_project = self._get_project_rows(
@@ -667,41 +776,22 @@ class XlsxSalesReportExportService(XlsxExportService):
             # if len(rows_for_project) > 0:
             #     first = False
 
-            project_rows += rows_for_project
+            yield from rows_for_project
 
         hitas_sold = self._get_sold_hitas_apartments(apartments)
         haso_sold = self._get_sold_haso_apartments(apartments)
 
-        header_rows = [
-            [
-                "Kohteen osoite",
-                "Asuntoja yhteensä",
-                "Myydyt HITAS-asunnot",
-                "Myydyt HASO-asunnot",
-                "Myymättömät asunnot",
-                "Puretut/irtisanotut kaupat",
-                self.HIGHLIGHT_COLOR,
-            ],
-        ]
-
-        sum_rows = [
-            [""],
-            [""],
-            self._get_total_sold_row(apartments),
-            [
-                "Kauppahinnat yhteensä",
-                self._sum_cents(x.sales_price or 0 for x in hitas_sold),
-                self._sum_cents(x.debt_free_sales_price or 0 for x in hitas_sold),
-                self._sum_cents(x.right_of_occupancy_payment or 0 for x in haso_sold),
-                self.HIGHLIGHT_COLOR,
-            ],
-            self._get_total_terminated_row(apartments),
+        yield [""]
+        yield [""]
+        yield self._get_total_sold_row(apartments)
+        yield [
+            "Kauppahinnat yhteensä",
+            self._sum_cents(x.sales_price or 0 for x in hitas_sold),
+            self._sum_cents(x.debt_free_sales_price or 0 for x in hitas_sold),
+            self._sum_cents(x.right_of_occupancy_payment or 0 for x in haso_sold),
+            self.HIGHLIGHT_COLOR,
         ]
-
-        rows += header_rows
-        rows += project_rows
-        rows += sum_rows
-        return rows
+        yield self._get_total_terminated_row(apartments)
 
     def _get_project_rows(
         self,
@@ -915,12 +1005,7 @@ class XlsxSalesReportExportService(XlsxExportService):
     ) -> List:
         cells = [
             self._get_apartment_date_of_event(
-                apartment,
-                event=self._get_latest_apartment_event(
-                    apartment,
-                    state=ApartmentReservationState.CANCELED,
-                    cancellation_reason=ApartmentReservationCancellationReason.TERMINATED,  # noqa: E501
-                ),
+                apartment, state=ApartmentReservationState.CANCELED
             )
         ]
         return cells
@@ -941,33 +1026,10 @@ class XlsxSalesReportExportService(XlsxExportService):
         self, apartments: List[ApartmentDocument]
     ) -> List[ApartmentDocument]:
 
-        return self._get_canceled_apartments_with_cancellation_reason(
-            apartments=apartments,
-            cancellation_reason=ApartmentReservationCancellationReason.TERMINATED,
-        )
-
-    def _get_canceled_apartments_with_cancellation_reason(
-        self,
-        apartments: List[ApartmentDocument],
-        cancellation_reason: ApartmentReservationCancellationReason,
-    ):
-        apartment_uuids = [ap.uuid for ap in apartments]
-        filtered_apartment_uuids = (
-            self.state_events.filter(
-                reservation__apartment_uuid__in=apartment_uuids,
-                cancellation_reason=cancellation_reason.value,
-            )
-            .annotate(
-                auuid=Cast("reservation__apartment_uuid", output_field=CharField())
-            )
-            .values_list("auuid", flat=True)
-            .values_list("auuid", flat=True)
-        )
-
         return [
             apartment
             for apartment in apartments
-            if apartment.uuid in filtered_apartment_uuids
+            if str(apartment.uuid) in self.terminated_apartment_uuids
         ]
 
     def _get_sold_apartments(
@@ -986,7 +1048,7 @@ class XlsxSalesReportExportService(XlsxExportService):
         return [
             apartment
             for apartment in self._get_sold_apartments_based_on_state(apartments)
-            if apartment.uuid in self.sold_apartment_uuids
+            if str(apartment.uuid) in self.sold_apartment_uuids
         ]
 
     def _get_sold_apartments_based_on_state(
@@ -999,15 +1061,27 @@ class XlsxSalesReportExportService(XlsxExportService):
         Returns:
             List[ApartmentDocument]: filtered ApartmentDocument list
         """
+        apartment_states = self._get_apartment_states(apartments)
         return [
             apartment
             for apartment in apartments
-            if (
-                get_apartment_state_from_apartment_uuid(apartment.uuid)
-                == ApartmentState.SOLD.value
-            )
+            if apartment_states[str(apartment.uuid)] == ApartmentState.SOLD.value
         ]
 
+    def _get_apartment_states(
+        self, apartments: List[ApartmentDocument]
+    ) -> Dict[str, str]:
+        """Gets the states of the apartments keyed by the apartment uuid. The states
+        are fetched once per report."""
+        missing_uuids = {
+            str(apartment.uuid) for apartment in apartments
+        } - self._apartment_states.keys()
+        if missing_uuids:
+            self._apartment_states.update(
+                get_apartment_states_from_apartment_uuids(missing_uuids)
+            )
+        return self._apartment_states
+
     def _get_sold_hitas_apartments(
         self, apartments: List[ApartmentDocument]
     ) -> List[ApartmentDocument]:
@@ -1046,55 +1120,53 @@ class XlsxSalesReportExportService(XlsxExportService):
     def _get_haso_apartments(self, apartments: List[ApartmentDocument]):
         return [apartment for apartment in apartments if self._is_haso(apartment)]
 
-    def _get_apartment_sold_event(
-        self, apartment: ApartmentDocument
-    ) -> Union[ApartmentReservationStateChangeEvent, None]:
-        return self._get_latest_apartment_event(
-            apartment, state=ApartmentReservationState.SOLD
-        )
-
-    def _get_latest_apartment_event(self, apartment: ApartmentDocument, **kwargs):
-        """
-        Shorthand for getting latest ApartmentReservationStateChangeEvent
-        related to `apartment` by the given `kwargs`
-
-        For example to get all termination events:
-        ```self._get_latest_apartment_event(
-            apartment,
-            state=ApartmentReservationState.CANCELED
-            cancellation_reason=ApartmentReservationCancellationReason.TERMINATED
-        )```
+    def _get_latest_event_timestamps(
+        self,
+    ) -> Dict[Tuple[str, ApartmentReservationState], datetime]:
+        """Gets the timestamps of the latest sale and termination events of the
+        apartments, keyed by the apartment uuid and the state of the event.
 
+        The events are fetched with a single `DISTINCT ON` query instead of one
+        query per apartment.
         """
-
-        return (
+        events = (
             self.state_events.filter(
-                reservation__apartment_uuid=apartment.uuid,
-                **kwargs,
+                Q(state=ApartmentReservationState.SOLD)
+                | Q(
+                    state=ApartmentReservationState.CANCELED,
+                    cancellation_reason=(
+                        ApartmentReservationCancellationReason.TERMINATED
+                    ),
+                )
             )
-            .order_by("-id")
-            .first()
+            .order_by("reservation__apartment_uuid", "state", "-id")
+            .distinct("reservation__apartment_uuid", "state")
+            .values_list("reservation__apartment_uuid", "state", "timestamp")
         )
+        return {
+            (str(apartment_uuid), state): timestamp
+            for apartment_uuid, state, timestamp in events
+        }
 
     def _get_apartment_date_of_sale(
         self, apartment: ApartmentDocument
-    ) -> Union[datetime, None]:
+    ) -> Union[str, None]:
         """Get the date of sale for the apartment.
-        TODO: optimize!!
 
         Args:
             apartment (ApartmentDocument):
         """
         return self._get_apartment_date_of_event(
-            apartment, event=self._get_apartment_sold_event(apartment)
+            apartment, state=ApartmentReservationState.SOLD
         )
 
     def _get_apartment_date_of_event(
-        self, apartment: ApartmentDocument, event: ApartmentReservationStateChangeEvent
-    ):
-        if not event:
+        self, apartment: ApartmentDocument, state: ApartmentReservationState
+    ) -> Union[str, None]:
+        timestamp = self.latest_event_timestamps.get((str(apartment.uuid), state))
+        if not timestamp:
             return None
-        return event.timestamp.strftime("%d.%m.%Y")
+        return timestamp.strftime("%d.%m.%Y")
 
     def _is_haso(self, project: ApartmentDocument):
         if not project.project_ownership_type:
@@ -1109,21 +1181,32 @@ class XlsxSalesReportExportService(XlsxExportService):
         return project.project_ownership_type.lower() == OwnershipType.HITAS.value
 
     def _get_projects(self):
-        projects = []
-        uuids = []
-        for project_uuid in self.project_uuids:
-            try:
-                if project_uuid not in uuids:
-                    projects.append(get_project(project_uuid))
-                    uuids.append(project_uuid)
-            except ObjectDoesNotExist:
-                _logger.error(
-                    "Project %s does not exist in ElasticSearch",
-                    project_uuid,
-                )
+        project_uuids = {str(project_uuid) for project_uuid in self.project_uuids}
+        if not project_uuids:
+            return []
+        projects = list(iter_projects(project_uuids))
+
+        for project_uuid in project_uuids.difference(
+            str(project.project_uuid) for project in projects
+        ):
+            _logger.error(
+                "Project %s does not exist in ElasticSearch",
+                project_uuid,
+            )
 
         return sorted(projects, key=lambda x: x.project_street_address)
 
+    def _get_project_apartments(
+        self, project: ApartmentDocument
+    ) -> List[ApartmentDocument]:
+        project_uuid = str(project.project_uuid)
+        if project_uuid not in self.apartments_by_project_uuid:
+            # not one of the projects of the report
+            self.apartments_by_project_uuid[project_uuid] = get_apartments(
+                project.project_uuid, include_project_fields=True
+            )
+        return self.apartments_by_project_uuid[project_uuid]
+
     def _sum_cents(self, cents: List[int]):
         return sum(self._cents_to_eur(cent) for cent in cents)
 
@@ -0,0 +1,190 @@
+"""
+Queued intake of applications.
+
+With the `APPLICATION_INTAKE_QUEUED` setting the application endpoints only validate
+the received application and store it as an `ApplicationIntake`, so that peaks of
+applications at the application deadline do not pile up waiting for the locks of the
+apartment queues. The `process_application_intake` worker creates the applications
+one at a time; the number of workers running sets how many are created concurrently.
+
+The worker validates each application again with the serializer of the endpoint that
+received it, which the worker passes in for each source of intakes.
+
+The row of an intake is locked while its application is created, and the outcome is
+stored in the same transaction. If the worker is killed, the transaction is rolled
+back and the lock released, so an intake that has been processing for longer than
+`APPLICATION_INTAKE_TIMEOUT` without a lock is known to be abandoned and is put back
+in the queue.
+"""
+
+import json
+import logging
+import uuid
+from datetime import timedelta
+from typing import Dict, Optional, Type
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer
+
+from application_form.enums import ApplicationIntakeSource, ApplicationIntakeState
+from application_form.models import ApplicationIntake
+from audit_log import audit_logging
+from audit_log.enums import Operation
+
+_logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+class _IntakeRequest:
+    """Stands in for the original request in the serializer context."""
+
+    def __init__(self, user: User):
+        self.user = user
+
+
+def enqueue_application(
+    external_uuid: uuid.UUID,
+    data: dict,
+    source: ApplicationIntakeSource,
+    user: User = None,
+) -> ApplicationIntake:
+    """
+    Store the received application to be created by the worker.
+
+    The application UUID is the idempotency key: if the user has already sent an
+    application with the same UUID, that intake is returned and the data is ignored.
+    An application UUID already used by another user is rejected.
+    """
+    try:
+        with transaction.atomic():
+            return ApplicationIntake.objects.create(
+                external_uuid=external_uuid,
+                source=source,
+                payload=json.dumps(data, cls=DjangoJSONEncoder),
+                user=user,
+            )
+    except IntegrityError:
+        intake = ApplicationIntake.objects.filter(
+            external_uuid=external_uuid, user=user
+        ).first()
+        if intake is None:
+            raise ValidationError(
+                {"application_uuid": "The application identifier is already in use."}
+            )
+        return intake
+
+
+def claim_next_application_intake() -> Optional[ApplicationIntake]:
+    """Mark the oldest waiting intake as processing and return it.
+
+    Intakes locked by other workers are skipped, so several workers can claim intakes
+    at the same time.
+    """
+    requeue_stale_application_intakes()
+    with transaction.atomic():
+        intake = (
+            ApplicationIntake.objects.select_for_update(skip_locked=True)
+            .filter(state=ApplicationIntakeState.PENDING)
+            .order_by("id")
+            .first()
+        )
+        if intake is not None:
+            intake.state = ApplicationIntakeState.PROCESSING
+            intake.save(update_fields=["state", "updated_at"])
+    return intake
+
+
+def process_application_intake(
+    intake: ApplicationIntake,
+    serializer_classes: Dict[ApplicationIntakeSource, Type[BaseSerializer]],
+) -> None:
+    """Create the application of the intake and record the outcome on the intake.
+
+    The application is validated again with the serializer class of the source of the
+    intake, since the situation of the project may have changed after it was received.
+    """
+    serializer = serializer_classes[intake.source](
+        data=json.loads(intake.payload),
+        context={"request": _IntakeRequest(intake.user)},
+    )
+
+    try:
+        with transaction.atomic():
+            # held until the outcome is stored, see requeue_stale_application_intakes()
+            ApplicationIntake.objects.select_for_update().get(pk=intake.pk)
+            if intake.user is None:
+                raise ValidationError({"detail": "The user has been removed."})
+            serializer.is_valid(raise_exception=True)
+            application = serializer.save()
+            audit_logging.log(
+                getattr(intake.user, "profile", intake.user),
+                Operation.CREATE,
+                application,
+            )
+            intake.state = ApplicationIntakeState.SUCCEEDED
+            intake.application = application
+            _save_outcome(intake)
+    except ValidationError as e:
+        intake.state = ApplicationIntakeState.FAILED
+        intake.errors = e.detail
+        intake.application = None
+        _save_outcome(intake)
+    except Exception as e:
+        _logger.exception("Application intake %s failed", intake.external_uuid)
+        intake.state = ApplicationIntakeState.FAILED
+        intake.errors = {"detail": str(e)}
+        intake.application = None
+        _save_outcome(intake)
+
+
+def _save_outcome(intake: ApplicationIntake) -> None:
+    intake.processed_at = timezone.now()
+    intake.save(
+        update_fields=["state", "errors", "application", "processed_at", "updated_at"]
+    )
+
+
+def requeue_stale_application_intakes() -> int:
+    """Put the processing intakes whose worker has stopped back in the queue, and
+    return how many there were.
+
+    An intake is stale when it was claimed more than `APPLICATION_INTAKE_TIMEOUT`
+    seconds ago and its row is not locked by a worker creating its application. The
+    application of a stale intake was rolled back with the transaction of the worker,
+    so it is safe to create it again.
+    """
+    claimed_before = timezone.now() - timedelta(
+        seconds=settings.APPLICATION_INTAKE_TIMEOUT
+    )
+    with transaction.atomic():
+        stale_intakes = list(
+            ApplicationIntake.objects.select_for_update(skip_locked=True).filter(
+                state=ApplicationIntakeState.PROCESSING, updated_at__lt=claimed_before
+            )
+        )
+        for intake in stale_intakes:
+            _logger.error(
+                "Application intake %s was left processing by a stopped worker",
+                intake.external_uuid,
+            )
+            intake.state = ApplicationIntakeState.PENDING
+            intake.save(update_fields=["state", "updated_at"])
+    return len(stale_intakes)
+
+
+def process_pending_application_intakes(
+    serializer_classes: Dict[ApplicationIntakeSource, Type[BaseSerializer]]
+) -> int:
+    """Process waiting intakes until there are none left, and return how many were
+    processed."""
+    count = 0
+    while (intake := claim_next_application_intake()) is not None:
+        process_application_intake(intake, serializer_classes)
+        count += 1
+    return count
@@ -0,0 +1,230 @@
+"""
+In-memory model of the reservation queues of a project's apartments.
+
+The lottery loads every reservation of the project once, resolves the winners and the
+resulting cancellations against the loaded objects, and writes the outcome with a
+handful of bulk queries. The queue operations mirror their database counterparts
+in `application_form.services.queue` and `ApartmentReservation.set_state`.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db.models import Exists, OuterRef
+
+from application_form.enums import (
+    ApartmentQueueChangeEventType,
+    ApartmentReservationCancellationReason,
+    ApartmentReservationState,
+)
+from application_form.models import (
+    ApartmentQueueChangeEvent,
+    ApartmentReservation,
+    ApartmentReservationStateChangeEvent,
+)
+from audit_log import audit_logging
+from audit_log.enums import Operation
+
+_logger = logging.getLogger(__name__)
+
+
+def _queue_order(reservation: ApartmentReservation):
+    # NULL queue positions are sorted last, like in the database
+    return (
+        reservation.queue_position is None,
+        reservation.queue_position or 0,
+        reservation.pk,
+    )
+
+
+class ProjectQueues:
+    """The reservations of the given apartments, and the changes made to them."""
+
+    def __init__(self, apartment_uuids: Iterable[uuid.UUID]):
+        self.apartment_uuids = [
+            str(apartment_uuid) for apartment_uuid in apartment_uuids
+        ]
+        self.reservations: Dict[str, List[ApartmentReservation]] = {
+            apartment_uuid: [] for apartment_uuid in self.apartment_uuids
+        }
+        self._reservations_by_application: Dict[int, List[ApartmentReservation]] = (
+            defaultdict(list)
+        )
+        self._changed: Dict[int, ApartmentReservation] = {}
+        self._canceled: List[ApartmentReservation] = []
+        self._state_change_events: List[ApartmentReservationStateChangeEvent] = []
+        self._queue_change_events: List[ApartmentQueueChangeEvent] = []
+
+        reservations = (
+            ApartmentReservation.objects.filter(apartment_uuid__in=self.apartment_uuids)
+            .select_related("application_apartment__application")
+            .only(
+                "apartment_uuid",
+                "state",
+                "queue_position",
+                "queue_position_before_cancelation",
+                "list_position",
+                "right_of_residence",
+                "right_of_residence_is_old_batch",
+                "application_apartment__apartment_uuid",
+                "application_apartment__priority_number",
+                "application_apartment__application__has_children",
+                "application_apartment__application__right_of_residence",
+                "application_apartment__application__right_of_residence_is_old_batch",
+            )
+            .annotate(
+                removed_from_queue=Exists(
+                    ApartmentQueueChangeEvent.objects.filter(
+                        queue_application=OuterRef("pk"),
+                        type=ApartmentQueueChangeEventType.REMOVED,
+                    )
+                )
+            )
+            .order_by("pk")
+        )
+        for reservation in reservations:
+            self.reservations[str(reservation.apartment_uuid)].append(reservation)
+            if reservation.application_apartment_id is not None:
+                application_id = reservation.application_apartment.application_id
+                self._reservations_by_application[application_id].append(reservation)
+
+    def mark_changed(self, reservation: ApartmentReservation) -> None:
+        self._changed[reservation.pk] = reservation
+
+    def in_queue(self, apartment_uuid) -> List[ApartmentReservation]:
+        """Return the reservations of the applications that are still in the queue of
+        the apartment, ordered by their queue position."""
+        return sorted(
+            (
+                reservation
+                for reservation in self.reservations[str(apartment_uuid)]
+                if reservation.application_apartment_id is not None
+                and not reservation.removed_from_queue
+            ),
+            key=_queue_order,
+        )
+
+    def first_active(self, apartment_uuid) -> Optional[ApartmentReservation]:
+        """Return the first non-canceled reservation in the queue of the apartment."""
+        return min(
+            (
+                reservation
+                for reservation in self.reservations[str(apartment_uuid)]
+                if reservation.state != ApartmentReservationState.CANCELED
+            ),
+            key=_queue_order,
+            default=None,
+        )
+
+    def first_in_queue(self, apartment_uuid) -> Optional[ApartmentReservation]:
+        """Return the reservation that would win the apartment.
+
+        Reservations of applications that are still in the queue take precedence, and
+        if there are none, the first non-canceled reservation wins.
+        """
+        in_queue = self.in_queue(apartment_uuid)
+        if in_queue:
+            return in_queue[0]
+        return self.first_active(apartment_uuid)
+
+    def lower_priority_reservations(
+        self,
+        reservation: ApartmentReservation,
+        states: List[ApartmentReservationState],
+    ) -> List[ApartmentReservation]:
+        """Return the reservations in the given states that the same application has
+        made for apartments with a lower priority."""
+        priority_number = reservation.application_apartment.priority_number
+        siblings = self._reservations_by_application[
+            reservation.application_apartment.application_id
+        ]
+        return sorted(
+            (
+                sibling
+                for sibling in siblings
+                if sibling.application_apartment.priority_number > priority_number
+                and sibling.state in states
+            ),
+            key=lambda sibling: sibling.application_apartment.priority_number,
+        )
+
+    def set_state(
+        self,
+        reservation: ApartmentReservation,
+        state: ApartmentReservationState,
+        cancellation_reason: ApartmentReservationCancellationReason = None,
+    ) -> None:
+        self._state_change_events.append(
+            ApartmentReservationStateChangeEvent(
+                reservation=reservation,
+                state=state,
+                comment="",
+                cancellation_reason=cancellation_reason,
+            )
+        )
+        reservation.state = state
+        self.mark_changed(reservation)
+
+    def cancel(
+        self,
+        reservation: ApartmentReservation,
+        cancellation_reason: ApartmentReservationCancellationReason,
+    ) -> bool:
+        """Cancel the reservation and remove it from the queue of its apartment.
+
+        Returns whether the reservation was past the SUBMITTED state, in which case
+        the winner of the apartment has to be resolved again.
+        """
+        was_reserved = reservation.state != ApartmentReservationState.SUBMITTED
+        old_queue_position = reservation.queue_position
+        if old_queue_position is not None:
+            reservation.queue_position_before_cancelation = old_queue_position
+            reservation.queue_position = None
+            for other in self.reservations[str(reservation.apartment_uuid)]:
+                if (
+                    other.queue_position is not None
+                    and other.queue_position >= old_queue_position
+                ):
+                    other.queue_position -= 1
+                    self.mark_changed(other)
+        else:
+            _logger.warning(
+                "from_position is None, bad reservation data in apartment uuid %s?",
+                reservation.apartment_uuid,
+            )
+
+        self.set_state(
+            reservation,
+            ApartmentReservationState.CANCELED,
+            cancellation_reason=cancellation_reason,
+        )
+        self._queue_change_events.append(
+            ApartmentQueueChangeEvent(
+                queue_application=reservation,
+                type=ApartmentQueueChangeEventType.REMOVED,
+                comment="",
+            )
+        )
+        reservation.removed_from_queue = True
+        self._canceled.append(reservation)
+        return was_reserved
+
+    def save(self, fields: List[str]) -> None:
+        """Write the changed reservations and the recorded events.
+
+        Only the given reservation fields are written.
+        """
+        ApartmentReservation.objects.bulk_update(self._changed.values(), fields)
+        self._changed = {}
+
+        state_change_events = ApartmentReservationStateChangeEvent.objects.bulk_create(
+            self._state_change_events
+        )
+        ApartmentQueueChangeEvent.objects.bulk_create(self._queue_change_events)
+        audit_logging.log_many(None, Operation.CREATE, state_change_events)
+        audit_logging.log_many(None, Operation.UPDATE, self._canceled)
+        self._state_change_events = []
+        self._queue_change_events = []
+        self._canceled = []
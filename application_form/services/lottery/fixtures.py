@@ -0,0 +1,147 @@
+"""
+Generated projects and applications for benchmarking the lottery.
+
+The apartments are written to the index of `settings.APARTMENT_INDEX_NAME` through the
+default ElasticSearch connection, so these builders must only be used with settings
+that point to a disposable cluster, such as the test settings.
+"""
+
+import random
+import uuid
+from datetime import date, timedelta
+from typing import List
+
+from django.conf import settings
+from django.utils import timezone
+from elasticsearch_dsl import connections, Document
+
+from apartment.elastic.documents import ApartmentDocument
+from apartment_application_service.settings import (
+    METADATA_HANDLER_INFORMATION,
+    METADATA_HASO_PROCESS_NUMBER,
+    METADATA_HITAS_PROCESS_NUMBER,
+)
+from application_form.enums import ApplicationType
+from application_form.models import Applicant, Application, ApplicationApartment
+from customer.models import Customer
+from users.models import Profile
+
+
+def create_apartment_index() -> None:
+    client = connections.get_connection()
+    if not client.indices.exists(index=settings.APARTMENT_INDEX_NAME):
+        client.indices.create(index=settings.APARTMENT_INDEX_NAME)
+
+
+def create_project_apartments(
+    ownership_type: str, count: int, rng: random.Random
+) -> List[ApartmentDocument]:
+    """Write `count` apartments of a new project whose application period has ended
+    to ElasticSearch and return them."""
+    project_uuid = str(uuid.UUID(int=rng.getrandbits(128)))
+    project_fields = {
+        "project_id": rng.randint(0, 999),
+        "project_uuid": project_uuid,
+        "project_ownership_type": ownership_type.capitalize(),
+        "project_housing_company": "Benchmark Oy",
+        "project_holding_type": "RIGHT_OF_RESIDENCE_APARTMENT",
+        "project_street_address": "Benchmarkinkatu 1",
+        "project_postal_code": "00100",
+        "project_city": "Helsinki",
+        "project_contract_business_id": "1234567-8",
+        "project_district": "Kallio",
+        "project_realty_id": "091-001-0001-0001",
+        "project_new_development_status": "UNDER_CONSTRUCTION",
+        "project_new_housing": True,
+        "project_apartment_count": count,
+        "project_estimated_completion": "2030-01",
+        "project_application_end_time": timezone.now() - timedelta(days=1),
+    }
+    apartments = []
+    for number in range(1, count + 1):
+        apartment = ApartmentDocument(
+            uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+            apartment_number=f"A {number}",
+            room_count=rng.randint(1, 5),
+            _language="fi",
+            **project_fields,
+        )
+        # The documents are read-only in the application code
+        Document.save(
+            apartment, index=settings.APARTMENT_INDEX_NAME, refresh="wait_for"
+        )
+        apartments.append(apartment)
+    return apartments
+
+
+def delete_apartments(apartments: List[ApartmentDocument]) -> None:
+    for apartment in apartments:
+        Document.delete(apartment, index=settings.APARTMENT_INDEX_NAME, refresh=True)
+
+
+def create_application(
+    application_type: ApplicationType,
+    apartments: List[ApartmentDocument],
+    rng: random.Random,
+) -> Application:
+    """Create an application with a single applicant to the given apartments, in
+    the given order of priority."""
+    date_of_birth = date(rng.randint(1940, 2000), rng.randint(1, 12), 1)
+    right_of_residence = (
+        rng.randint(1, 100000) if application_type == ApplicationType.HASO else None
+    )
+    profile = Profile.objects.create(
+        first_name="Bertta",
+        last_name="Benchmark",
+        email="bertta.benchmark@example.com",
+        phone_number="0401234567",
+        street_address="Benchmarkinkatu 1",
+        city="Helsinki",
+        postal_code="00100",
+        date_of_birth=date_of_birth,
+        contact_language="fi",
+    )
+    has_children = rng.random() < 0.5
+    customer = Customer.objects.create(
+        primary_profile=profile,
+        has_children=has_children,
+        right_of_residence=right_of_residence,
+    )
+    application = Application.objects.create(
+        customer=customer,
+        applicants_count=1,
+        type=application_type,
+        has_children=has_children,
+        right_of_residence=right_of_residence,
+        process_number=(
+            METADATA_HASO_PROCESS_NUMBER
+            if application_type == ApplicationType.HASO
+            else METADATA_HITAS_PROCESS_NUMBER
+        ),
+        handler_information=METADATA_HANDLER_INFORMATION,
+        sender_names="Bertta Benchmark",
+    )
+    Applicant.objects.create(
+        application=application,
+        first_name=profile.first_name,
+        last_name=profile.last_name,
+        email=profile.email,
+        phone_number=profile.phone_number,
+        street_address=profile.street_address,
+        city=profile.city,
+        postal_code=profile.postal_code,
+        date_of_birth=date_of_birth,
+        age=(date.today() - date_of_birth).days // 365,
+        ssn_suffix="-123A",
+        contact_language="fi",
+        is_primary_applicant=True,
+    )
+    ApplicationApartment.objects.bulk_create(
+        ApplicationApartment(
+            application=application,
+            apartment_uuid=apartment.uuid,
+            priority_number=priority_number,
+        )
+        for priority_number, apartment in enumerate(apartments, 1)
+    )
+    return application
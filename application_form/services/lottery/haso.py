@@ -1,29 +1,141 @@
 import uuid
+from typing import Callable, List, Optional
 
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from apartment.elastic.queries import get_apartment_uuids
-from application_form.services.application import _reserve_haso_apartment
-from application_form.services.lottery.utils import _save_application_order
+from application_form.enums import (
+    ApartmentReservationCancellationReason,
+    ApartmentReservationState,
+)
+from application_form.models import ApartmentReservation
+from application_form.services.lottery.engine import ProjectQueues
+from application_form.services.lottery.report import lottery_phase
+from application_form.services.lottery.utils import _save_application_orders
 
 User = get_user_model()
 
 
-def _distribute_haso_apartments(project_uuid: uuid.UUID, user: User = None) -> None:
+@transaction.atomic
+def _distribute_haso_apartments(
+    project_uuid: uuid.UUID,
+    user: User = None,
+    on_apartment_done: Optional[Callable[[str], None]] = None,
+) -> None:
     """
     Declares a winner for each apartment in the project.
 
     This goes through each apartment in the given project, calculates the winner for
     each, and marks the winning application as reserved. Before declaring a winner, the
     state of the apartment queue will be persisted to the database.
+
+    The reservations of the whole project are loaded once, the winners and the
+    resulting cancellations are resolved in memory, and the results are written with
+    bulk queries.
     """
     apartment_uuids = get_apartment_uuids(project_uuid)
 
     # Persist the initial order of applications
-    for apartment_uuid in apartment_uuids:
-        _save_application_order(apartment_uuid, user)
+    with lottery_phase("order_persistence"):
+        _save_application_orders(apartment_uuids, user)
 
     # Reserve each apartment. This will modify the queue of each apartment, since
     # apartment applications with lower priority may get canceled.
-    for apartment_uuid in apartment_uuids:
-        _reserve_haso_apartment(apartment_uuid)
+    with lottery_phase("reservation"):
+        queues = ProjectQueues(apartment_uuids)
+        for apartment_uuid in queues.apartment_uuids:
+            _reserve_haso_apartment(queues, apartment_uuid)
+            if on_apartment_done:
+                on_apartment_done(apartment_uuid)
+        queues.save(["state", "queue_position", "queue_position_before_cancelation"])
+
+
+def _reserve_haso_apartment(queues: ProjectQueues, apartment_uuid: str) -> None:
+    """
+    Declare a winner for the given apartment.
+
+    The application with the smallest right of residence number will be the winner.
+    If there is a single winner, the state of that application will be changed to
+    "RESERVED". If there are multiple winner candidates with the same right of residence
+    number, their state will be changed to "REVIEW".
+
+    If a winner has applied to other apartments in the same project with lower priority,
+    then the applications with lower priority will be canceled and removed from their
+    respective queues.
+    """
+    # There can be a single winner, or multiple winners if there are several
+    # winning candidates with the same right of residence number.
+    winning_reservations = _find_winning_candidates(queues.in_queue(apartment_uuid))
+
+    if winning_reservations:
+        # Set the reservation state to either "RESERVED" or "REVIEW"
+        state = ApartmentReservationState.RESERVED
+        if len(winning_reservations) > 1:
+            state = ApartmentReservationState.REVIEW
+        for reservation in winning_reservations:
+            queues.set_state(reservation, state)
+
+        # At this point the winner has been decided, but the winner may have outstanding
+        # applications to other apartments. If they are lower priority, they should be
+        # marked as "CANCELED" and deleted from the respective queues.
+        _cancel_lower_priority_haso_reservations(queues, winning_reservations)
+    else:
+        # There are no applications so the winning reservation is the one that is first
+        # in the queue.
+        winning_reservation = queues.first_active(apartment_uuid)
+        if winning_reservation:
+            queues.set_state(winning_reservation, ApartmentReservationState.RESERVED)
+
+
+def _find_winning_candidates(
+    reservations: List[ApartmentReservation],
+) -> List[ApartmentReservation]:
+    """Return the reservations of all applications that have the same right of
+    residence number as the first application in the queue."""
+    if not reservations:
+        return []
+
+    def right_of_residence(reservation: ApartmentReservation):
+        application = reservation.application_apartment.application
+        return (
+            application.right_of_residence,
+            application.right_of_residence_is_old_batch,
+        )
+
+    first_right_of_residence = right_of_residence(reservations[0])
+    return [
+        reservation
+        for reservation in reservations
+        if right_of_residence(reservation) == first_right_of_residence
+    ]
+
+
+def _cancel_lower_priority_haso_reservations(
+    queues: ProjectQueues,
+    winning_reservations: List[ApartmentReservation],
+) -> None:
+    """
+    Go through the given winning reservations, and cancel each reservation of the same
+    application made for an apartment that has a lower priority than the reserved
+    apartment. Only cancel RESERVED or SUBMITTED reservations.
+    The canceled reservation is removed from the queue of the corresponding apartment.
+    """
+    with lottery_phase("cancellation_cascade"):
+        for winning_reservation in winning_reservations:
+            for reservation in queues.lower_priority_reservations(
+                winning_reservation,
+                [
+                    ApartmentReservationState.SUBMITTED,
+                    ApartmentReservationState.RESERVED,
+                ],
+            ):
+                # A reservation may have been canceled by an earlier cascade
+                if reservation.state == ApartmentReservationState.CANCELED:
+                    continue
+                was_reserved = queues.cancel(
+                    reservation, ApartmentReservationCancellationReason.LOWER_PRIORITY
+                )
+                if was_reserved:
+                    # The apartment lost its winner, so it has to be reserved again
+                    _reserve_haso_apartment(queues, str(reservation.apartment_uuid))
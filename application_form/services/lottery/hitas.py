@@ -1,16 +1,20 @@
 import secrets
 import uuid
+from typing import Callable, Iterable, List, Optional
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import F, QuerySet
 
-from apartment.elastic.queries import get_apartment, get_apartment_uuids
-from application_form.enums import ApartmentReservationState
-from application_form.models import ApartmentReservation, ApplicationApartment
-from application_form.services.application import _reserve_apartments
+from apartment.elastic.queries import get_apartment_uuids, get_apartments_by_uuids
+from application_form.enums import (
+    ApartmentReservationCancellationReason,
+    ApartmentReservationState,
+)
+from application_form.models import ApartmentReservation
 from application_form.services.constants import LIST_POSITION_BUMP_OFFSET
-from application_form.services.lottery.utils import _save_application_order
+from application_form.services.lottery.engine import ProjectQueues
+from application_form.services.lottery.report import lottery_phase
+from application_form.services.lottery.utils import _save_application_orders
 
 User = get_user_model()
 # If the number of rooms in an apartment is greater or equal to this threshold,
@@ -18,27 +22,52 @@ User = get_user_model()
 _PRIORITIZE_CHILDREN_ROOM_THRESHOLD = 3
 
 
-def _distribute_hitas_apartments(project_uuid: uuid.UUID, user: User = None) -> None:
+@transaction.atomic
+def _distribute_hitas_apartments(
+    project_uuid: uuid.UUID,
+    user: User = None,
+    on_apartment_done: Optional[Callable[[str], None]] = None,
+) -> None:
     """
     Declares a winner for each apartment in the project.
 
     This goes through each apartment in the given project, calculates the winner for
     each, and marks the winning application as reserved. Before declaring a winner, the
     state of the apartment queue will be persisted to the database.
+
+    The reservations of the whole project are loaded once, and the shuffling as well
+    as the winners and the resulting cancellations are resolved in memory. The results
+    are written with bulk queries.
     """
 
     apartment_uuids = get_apartment_uuids(project_uuid)
 
     # Perform lottery and persist the initial order of applications
-    for apartment_uuid in apartment_uuids:
-        _shuffle_applications(apartment_uuid)
-        _save_application_order(apartment_uuid, user)
+    with lottery_phase("shuffle"):
+        apartments = get_apartments_by_uuids(apartment_uuids)
+        queues = ProjectQueues(apartment_uuids)
+        shuffled = []
+        for apartment_uuid in queues.apartment_uuids:
+            apartment = apartments.get(apartment_uuid)
+            # room_count could be None if apartment data is invalid in ElasticSearch
+            room_count = (apartment.room_count if apartment else None) or 0
+            shuffled += _shuffle_applications(queues, apartment_uuid, room_count)
+        ApartmentReservation.objects.bulk_update(
+            shuffled, ["list_position", "queue_position"]
+        )
+    with lottery_phase("order_persistence"):
+        _save_application_orders(queues.apartment_uuids, user)
 
-    _reserve_apartments(apartment_uuids)
+    with lottery_phase("reservation"):
+        _reserve_apartments(
+            queues, queues.apartment_uuids, on_apartment_done=on_apartment_done
+        )
+        queues.save(["state", "queue_position", "queue_position_before_cancelation"])
 
 
-@transaction.atomic
-def _shuffle_applications(apartment_uuid: uuid.UUID) -> None:
+def _shuffle_applications(
+    queues: ProjectQueues, apartment_uuid: str, room_count: int
+) -> List[ApartmentReservation]:
     """
     Randomize the order of the applications to the given apartment.
 
@@ -51,68 +80,152 @@ def _shuffle_applications(apartment_uuid: uuid.UUID) -> None:
     The first positions in the apartment queue will go to applications with children, in
     random order. The remaining positions will go to the applications without children,
     in random order.
+
+    Returns the reservations whose positions were changed.
     """
-    apartment = get_apartment(apartment_uuid)
-    apartment_apps = ApplicationApartment.objects.filter(
-        apartment_uuid=apartment_uuid,
-        apartment_reservation__isnull=False,
-    ).exclude(apartment_reservation__state=ApartmentReservationState.CANCELED)
-    active_count = apartment_apps.count()
-    if active_count:
-        # Only bump canceled rows whose list_position falls within the
-        # [1..active_count] range that _shuffle_queue_segment will assign.
-        # Rows above active_count are already safe from collisions.
-        # Using a targeted filter also prevents unbounded growth on re-runs.
-        ApartmentReservation.objects.filter(
-            apartment_uuid=apartment_uuid,
-            state=ApartmentReservationState.CANCELED,
-            list_position__lte=active_count,
-        ).update(list_position=F("list_position") + LIST_POSITION_BUMP_OFFSET)
-    # room_count could be None if apartment data is invalid in ElasticSearch
-    room_count: int = apartment.room_count or 0
+    reservations = queues.reservations[apartment_uuid]
+    canceled = [
+        reservation
+        for reservation in reservations
+        if reservation.state == ApartmentReservationState.CANCELED
+    ]
+    active = [
+        reservation
+        for reservation in reservations
+        if reservation.application_apartment_id is not None
+        and reservation.state != ApartmentReservationState.CANCELED
+    ]
+    # Only bump canceled rows whose list_position falls within the
+    # [1..active_count] range that _shuffle_queue_segment will assign.
+    # Rows above active_count are already safe from collisions.
+    # Using a targeted filter also prevents unbounded growth on re-runs.
+    bumped = [
+        reservation
+        for reservation in canceled
+        if reservation.list_position <= len(active)
+    ]
+    for reservation in bumped:
+        reservation.list_position += LIST_POSITION_BUMP_OFFSET
+
     # If the apartment has enough rooms, applications with children should have priority
     prioritize_children = room_count >= _PRIORITIZE_CHILDREN_ROOM_THRESHOLD
     if prioritize_children:
         # Split applications into two pools
-        apps_with_children = apartment_apps.filter(application__has_children=True)
-        apps_without_children = apartment_apps.exclude(application__has_children=True)
+        with_children = [
+            reservation
+            for reservation in active
+            if reservation.application_apartment.application.has_children
+        ]
+        without_children = [
+            reservation
+            for reservation in active
+            if not reservation.application_apartment.application.has_children
+        ]
         # The first queue segment go to applications with children, in random order
-        _shuffle_queue_segment(apps_with_children)
+        _shuffle_queue_segment(with_children)
         # The remaining segment go to applications without children
-        _shuffle_queue_segment(apps_without_children, apps_with_children.count() + 1)
+        _shuffle_queue_segment(without_children, len(with_children) + 1)
     else:
         # Each application stays in the same pool and is assigned a random position
-        _shuffle_queue_segment(apartment_apps)
+        _shuffle_queue_segment(active)
+    return bumped + active
 
 
 def _shuffle_queue_segment(
-    application_apartments: QuerySet,
+    reservations: List[ApartmentReservation],
     start_position: int = 1,
 ) -> None:
     """
-    Randomizes the queue segment of the given applications, starting at the given
+    Randomizes the queue segment of the given reservations, starting at the given
     position. A unique queue position between start_position (inclusive) and
-    start_position + number of application apartments (exclusive) will be assigned
-    randomly for each application in the queue.
+    start_position + number of reservations (exclusive) will be assigned
+    randomly for each reservation in the queue.
     """
-    end_position = start_position + application_apartments.count()
+    end_position = start_position + len(reservations)
 
     # Create a list of all possible queue positions between start and end position
     possible_positions = list(range(start_position, end_position))
 
-    reservations_to_update = []
-
-    for app_apartment in application_apartments.order_by("id").all():
+    for reservation in sorted(
+        reservations, key=lambda reservation: reservation.application_apartment_id
+    ):
         # Remove a random queue position from the list assign it to the application
         random_index = secrets.randbelow(len(possible_positions))
         position = possible_positions.pop(random_index)
-        apartment_reservation = app_apartment.apartment_reservation
-        apartment_reservation.list_position = position
-        apartment_reservation.queue_position = position
-        reservations_to_update.append(apartment_reservation)
+        reservation.list_position = position
+        reservation.queue_position = position
 
-    if reservations_to_update:
-        ApartmentReservation.objects.bulk_update(
-            reservations_to_update,
-            ["list_position", "queue_position"],
-        )
+
+def _reserve_apartments(
+    queues: ProjectQueues,
+    apartment_uuids: Iterable[str],
+    cancel_lower_priority_reserved: bool = True,
+    on_apartment_done: Optional[Callable[[str], None]] = None,
+) -> None:
+    # A dict is used as an insertion-ordered set
+    apartments_to_process = dict.fromkeys(apartment_uuids)
+    while apartments_to_process:
+        apartment_uuid = next(iter(apartments_to_process))
+        del apartments_to_process[apartment_uuid]
+        # Mark the winner as "RESERVED"
+        winner = _reserve_apartment(queues, apartment_uuid)
+        if winner is not None and winner.application_apartment_id is not None:
+            # If the winner has lower priority applications, we should cancel them.
+            # This will modify the queues of other apartments, and if the apartment's
+            # winner gets canceled, that apartment must be processed again.
+            canceled_winners = _cancel_lower_priority_apartments(
+                queues, winner, cancel_lower_priority_reserved
+            )
+            apartments_to_process.update(
+                dict.fromkeys(
+                    str(reservation.apartment_uuid) for reservation in canceled_winners
+                )
+            )
+        if on_apartment_done:
+            on_apartment_done(apartment_uuid)
+
+
+def _reserve_apartment(queues: ProjectQueues, apartment_uuid: str):
+    winner = queues.first_in_queue(apartment_uuid)
+    if winner is not None:
+        queues.set_state(winner, ApartmentReservationState.RESERVED)
+    return winner
+
+
+def _cancel_lower_priority_apartments(
+    queues: ProjectQueues,
+    reservation: ApartmentReservation,
+    cancel_reserved: bool = True,
+) -> List[ApartmentReservation]:
+    """
+    Given the winning reservation, cancel each reservation of the same application
+    that has a lower priority than the reserved apartment, no matter what position
+    they are in the queue. The canceled reservation is removed from the queue of the
+    corresponding apartment.
+
+    An applicant can only have one apartment reserved at a time. If the applicant has,
+    for example, priority 2 apartment reserved, then the lower priority apartments will
+    be given to other applicants. However, the applicant will still be queuing for the
+    first-priority apartment.
+    """
+    states_to_cancel = [ApartmentReservationState.SUBMITTED]
+    if cancel_reserved:
+        states_to_cancel.append(ApartmentReservationState.RESERVED)
+    canceled_winners = []
+    with lottery_phase("cancellation_cascade"):
+        for lower_priority in queues.lower_priority_reservations(
+            reservation, states_to_cancel
+        ):
+            # A reservation may have been canceled by an earlier cancellation's cascade
+            if lower_priority.state == ApartmentReservationState.CANCELED:
+                continue
+            if lower_priority.queue_position == 1:
+                canceled_winners.append(lower_priority)
+            was_reserved = queues.cancel(
+                lower_priority,
+                ApartmentReservationCancellationReason.LOWER_PRIORITY,
+            )
+            if was_reserved:
+                # The apartment lost its winner, so it has to be reserved again
+                _reserve_apartments(queues, [str(lower_priority.apartment_uuid)], False)
+    return canceled_winners
@@ -0,0 +1,172 @@
+"""
+Background execution of project lotteries.
+
+A lottery is requested by creating a `LotteryJob`, which the `run_lottery_jobs` worker
+picks up and runs. With the `LOTTERY_JOBS_RUN_INLINE` setting the job is run right
+away in the process that created it, which is how the tests run lotteries.
+
+The lottery itself runs in a single transaction, so the per-apartment progress of a
+running job is kept in the cache, where it is visible before the transaction commits.
+The row of the job is locked for the duration of that transaction. If the worker is
+killed, the lottery is rolled back and the lock released, so a job that has been
+running for longer than `LOTTERY_JOB_TIMEOUT` without a lock is known to be dead and
+is marked as failed. Until then it would block any new lottery of its project.
+"""
+
+import logging
+import uuid
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apartment.elastic.queries import get_apartment_uuids
+from application_form.enums import LotteryJobState
+from application_form.models import LotteryJob
+from application_form.services.lottery.machine import distribute_apartments
+
+_logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+_PROGRESS_TIMEOUT = 24 * 60 * 60
+
+
+def _progress_key(job: LotteryJob) -> str:
+    return f"lottery-job:{job.pk}:processed-apartments"
+
+
+def create_lottery_job(project_uuid: uuid.UUID, user: User = None) -> LotteryJob:
+    """
+    Request a lottery for the given project.
+
+    If the project already has a lottery waiting or running, that job is returned
+    instead of creating another one.
+    """
+    fail_stale_lottery_jobs()
+    try:
+        with transaction.atomic():
+            job = LotteryJob.objects.create(project_uuid=project_uuid, user=user)
+    except IntegrityError:
+        return LotteryJob.objects.get(
+            project_uuid=project_uuid,
+            state__in=[LotteryJobState.PENDING, LotteryJobState.RUNNING],
+        )
+
+    if settings.LOTTERY_JOBS_RUN_INLINE:
+        run_lottery_job(job)
+    return job
+
+
+def claim_next_lottery_job() -> Optional[LotteryJob]:
+    """Mark the oldest waiting job as running and return it.
+
+    Jobs locked by other workers are skipped, so several workers can claim jobs at
+    the same time.
+    """
+    fail_stale_lottery_jobs()
+    with transaction.atomic():
+        job = (
+            LotteryJob.objects.select_for_update(skip_locked=True)
+            .filter(state=LotteryJobState.PENDING)
+            .order_by("created_at", "pk")
+            .first()
+        )
+        if job is not None:
+            _start(job)
+    return job
+
+
+def run_lottery_job(job: LotteryJob) -> None:
+    """Run the lottery of the job and record its outcome on the job."""
+    if job.state == LotteryJobState.PENDING:
+        _start(job)
+
+    processed: List[str] = []
+
+    def on_apartment_done(apartment_uuid: str) -> None:
+        if apartment_uuid not in processed:
+            processed.append(apartment_uuid)
+            cache.set(_progress_key(job), processed, _PROGRESS_TIMEOUT)
+
+    try:
+        with transaction.atomic():
+            # held until the lottery is committed or rolled back, see
+            # fail_stale_lottery_jobs()
+            LotteryJob.objects.select_for_update().get(pk=job.pk)
+            distribute_apartments(job.project_uuid, job.user, on_apartment_done)
+    except Exception as e:
+        _logger.exception(
+            "Lottery job %s of project %s failed", job.pk, job.project_uuid
+        )
+        job.state = LotteryJobState.FAILED
+        job.error = str(e)
+        # The lottery was rolled back, so none of the apartments were processed
+        cache.delete(_progress_key(job))
+    else:
+        job.state = LotteryJobState.SUCCEEDED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["state", "error", "finished_at", "updated_at"])
+
+
+def fail_stale_lottery_jobs() -> int:
+    """Mark the running jobs whose worker has stopped as failed, and return how many
+    there were.
+
+    A job is stale when it was started more than `LOTTERY_JOB_TIMEOUT` seconds ago
+    and its row is not locked by the transaction of a running lottery.
+    """
+    started_before = timezone.now() - timedelta(seconds=settings.LOTTERY_JOB_TIMEOUT)
+    with transaction.atomic():
+        stale_jobs = list(
+            LotteryJob.objects.select_for_update(skip_locked=True).filter(
+                state=LotteryJobState.RUNNING, started_at__lt=started_before
+            )
+        )
+        for job in stale_jobs:
+            _logger.error(
+                "Lottery job %s of project %s was left running by a stopped worker",
+                job.pk,
+                job.project_uuid,
+            )
+            job.state = LotteryJobState.FAILED
+            job.error = "The worker running the lottery stopped."
+            job.finished_at = timezone.now()
+            job.save(update_fields=["state", "error", "finished_at", "updated_at"])
+            cache.delete(_progress_key(job))
+    return len(stale_jobs)
+
+
+def run_pending_lottery_jobs() -> int:
+    """Run waiting jobs until there are none left, and return how many were run."""
+    count = 0
+    while (job := claim_next_lottery_job()) is not None:
+        run_lottery_job(job)
+        count += 1
+    return count
+
+
+def get_lottery_job_progress(job: LotteryJob) -> Dict[str, bool]:
+    """Return whether the winner of each apartment of the project has been resolved,
+    keyed by the apartment uuid."""
+    apartment_uuids = [
+        str(apartment_uuid) for apartment_uuid in get_apartment_uuids(job.project_uuid)
+    ]
+    if job.state == LotteryJobState.SUCCEEDED:
+        processed = set(apartment_uuids)
+    else:
+        processed = set(cache.get(_progress_key(job), []))
+    return {
+        apartment_uuid: apartment_uuid in processed
+        for apartment_uuid in apartment_uuids
+    }
+
+
+def _start(job: LotteryJob) -> None:
+    job.state = LotteryJobState.RUNNING
+    job.started_at = timezone.now()
+    job.save(update_fields=["state", "started_at", "updated_at"])
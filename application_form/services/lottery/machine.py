@@ -1,4 +1,5 @@
 import uuid
+from typing import Callable, Optional
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
@@ -8,6 +9,10 @@ from apartment.elastic.queries import get_project
 from apartment.enums import OwnershipType
 from application_form.services.lottery.haso import _distribute_haso_apartments
 from application_form.services.lottery.hitas import _distribute_hitas_apartments
+from application_form.services.lottery.report import (
+    collect_lottery_report,
+    LotteryReport,
+)
 from application_form.services.lottery.utils import (
     _validate_project_application_time_has_finished,
     _validate_project_has_applications,
@@ -16,19 +21,56 @@ from application_form.services.lottery.utils import (
 User = get_user_model()
 
 
+class _DryRunRollback(Exception):
+    pass
+
+
+def distribute_apartments(
+    project_uuid: uuid.UUID,
+    user: User = None,
+    on_apartment_done: Optional[Callable[[str], None]] = None,
+    dry_run: bool = False,
+) -> Optional[LotteryReport]:
+    """
+    Run the lottery of the given project.
+
+    `on_apartment_done` is called with the uuid of each apartment whose winner has
+    been resolved, e.g. to report the progress of a lottery job.
+
+    With `dry_run` the lottery is rolled back after it has run, and a report of the
+    timings, query counts and ElasticSearch call counts of its phases is returned.
+    """
+    if not dry_run:
+        _distribute_apartments(project_uuid, user, on_apartment_done)
+        return None
+
+    with collect_lottery_report() as report:
+        try:
+            with transaction.atomic():
+                _distribute_apartments(project_uuid, user, on_apartment_done)
+                raise _DryRunRollback()
+        except _DryRunRollback:
+            pass
+    return report
+
+
 @transaction.atomic
-def distribute_apartments(project_uuid: uuid.UUID, user: User = None) -> None:
+def _distribute_apartments(
+    project_uuid: uuid.UUID,
+    user: User = None,
+    on_apartment_done: Optional[Callable[[str], None]] = None,
+) -> None:
     _validate_project_has_applications(project_uuid)
     _validate_project_application_time_has_finished(project_uuid)
 
     project = get_project(project_uuid)
     if project.project_ownership_type.lower() == OwnershipType.HASO.value:
-        _distribute_haso_apartments(project_uuid, user)
+        _distribute_haso_apartments(project_uuid, user, on_apartment_done)
     elif project.project_ownership_type.lower() in [
         OwnershipType.HITAS.value,
         OwnershipType.PUOLIHITAS.value,
     ]:
-        _distribute_hitas_apartments(project_uuid, user)
+        _distribute_hitas_apartments(project_uuid, user, on_apartment_done)
     else:
         raise NotImplementedError(
             _(
@@ -0,0 +1,125 @@
+"""
+Timings, database query counts and ElasticSearch call counts of the phases of a lottery.
+
+The lottery code marks its phases with `lottery_phase`, which does nothing unless a
+report is being collected with `collect_lottery_report`. Phases can be nested, and the
+costs are charged to the innermost phase only. Costs outside of any phase are charged
+to the "other" phase.
+
+ElasticSearch calls are counted by wrapping `Search.execute` and `Search.scan`, which
+all the searches of the apartment documents go through. A scan counts as a single call
+however many scroll requests it takes.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.db import connection
+from elasticsearch_dsl import Search
+
+OTHER_PHASE = "other"
+
+_current_report: ContextVar[Optional["LotteryReport"]] = ContextVar(
+    "lottery_report", default=None
+)
+
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0
+    queries: int = 0
+    es_calls: int = 0
+
+
+class LotteryReport:
+    def __init__(self):
+        self.phases: Dict[str, PhaseStats] = {}
+        self._stack: List[str] = []
+        self._charged_until = time.perf_counter()
+
+    @property
+    def current_phase(self) -> str:
+        return self._stack[-1] if self._stack else OTHER_PHASE
+
+    @property
+    def total(self) -> PhaseStats:
+        return PhaseStats(
+            seconds=sum(stats.seconds for stats in self.phases.values()),
+            queries=sum(stats.queries for stats in self.phases.values()),
+            es_calls=sum(stats.es_calls for stats in self.phases.values()),
+        )
+
+    def _stats(self) -> PhaseStats:
+        return self.phases.setdefault(self.current_phase, PhaseStats())
+
+    def _charge_time(self) -> None:
+        now = time.perf_counter()
+        self._stats().seconds += now - self._charged_until
+        self._charged_until = now
+
+    def _enter(self, name: str) -> None:
+        self._charge_time()
+        self._stack.append(name)
+
+    def _exit(self) -> None:
+        self._charge_time()
+        self._stack.pop()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self._stats().queries += 1
+        return execute(sql, params, many, context)
+
+    def _count_es_call(self) -> None:
+        self._stats().es_calls += 1
+
+
+def _count_es_calls(method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        report = _current_report.get()
+        if report is not None:
+            report._count_es_call()
+        return method(*args, **kwargs)
+
+    wrapper._counts_es_calls = True
+    return wrapper
+
+
+# The wrappers only count while a report is collected in the calling context, so they
+# are installed once instead of for each report
+for _method_name in ("execute", "scan"):
+    _method = getattr(Search, _method_name)
+    if not getattr(_method, "_counts_es_calls", False):
+        setattr(Search, _method_name, _count_es_calls(_method))
+
+
+@contextmanager
+def collect_lottery_report():
+    """Collect a report of the lottery phases run within the block."""
+    report = LotteryReport()
+    token = _current_report.set(report)
+    try:
+        with connection.execute_wrapper(report._count_query):
+            yield report
+        report._charge_time()
+    finally:
+        _current_report.reset(token)
+
+
+@contextmanager
+def lottery_phase(name: str):
+    """Charge the costs of the block to the given phase of the current report."""
+    report = _current_report.get()
+    if report is None:
+        yield
+        return
+
+    report._enter(name)
+    try:
+        yield
+    finally:
+        report._exit()
@@ -1,4 +1,5 @@
 import uuid
+from typing import Iterable
 
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -6,7 +7,12 @@ from django.utils import timezone
 from apartment.elastic.queries import get_apartment_uuids, get_project
 from apartment_application_service.settings import METADATA_HANDLER_INFORMATION
 from application_form.exceptions import ProjectDoesNotHaveApplicationsException
-from application_form.models import ApartmentReservation, Application, LotteryEvent
+from application_form.models import (
+    ApartmentReservation,
+    Application,
+    LotteryEvent,
+    LotteryEventResult,
+)
 from application_form.services.lottery.exceptions import (
     ApplicationTimeNotFinishedException,
 )
@@ -16,38 +22,71 @@ from audit_log.enums import Operation
 User = get_user_model()
 
 
-def _save_application_order(apartment_uuid: uuid.UUID, user: User = None) -> None:
+def _save_application_orders(
+    apartment_uuids: Iterable[uuid.UUID], user: User = None
+) -> None:
     """
-    Persist the apartment queue for the given apartment in the database.
-    This creates a new lottery event for the apartment and associates the apartment
+    Persist the apartment queues for the given apartments in the database.
+    This creates a new lottery event for each apartment and associates the apartment
     applications to that event in the order of their current queue position.
 
-    If the apartment queue has already been recorded, then this function does nothing;
+    If the apartment queue has already been recorded, then the apartment is skipped;
     a lottery is performed only once and therefore its result is stored only once.
 
     The salesperson's name who initiate the lottery will be stored in the DB
+
+    The events, their results and the handlers of the reservations are written with a
+    query each, regardless of the number of apartments.
     """
-    if LotteryEvent.objects.filter(apartment_uuid=apartment_uuid).exists():
-        return  # don't record it twice
+    recorded = {
+        str(apartment_uuid)
+        for apartment_uuid in LotteryEvent.objects.filter(
+            apartment_uuid__in=apartment_uuids
+        ).values_list("apartment_uuid", flat=True)
+    }
+    # don't record them twice
+    apartment_uuids = [
+        str(apartment_uuid)
+        for apartment_uuid in apartment_uuids
+        if str(apartment_uuid) not in recorded
+    ]
+    if not apartment_uuids:
+        return
 
-    event = LotteryEvent.objects.create(
-        apartment_uuid=apartment_uuid,
+    handler = ""
+    if user:
+        handler = METADATA_HANDLER_INFORMATION + " / " + user.profile_or_user_full_name
+    events = LotteryEvent.objects.bulk_create(
+        [
+            LotteryEvent(apartment_uuid=apartment_uuid, handler=handler)
+            for apartment_uuid in apartment_uuids
+        ]
+    )
+    events_by_apartment = {str(event.apartment_uuid): event for event in events}
+
+    reservations = (
+        ApartmentReservation.objects.filter(apartment_uuid__in=apartment_uuids)
+        .with_list_rank()
+        .values_list("apartment_uuid", "application_apartment_id", "list_rank")
+    )
+    LotteryEventResult.objects.bulk_create(
+        [
+            LotteryEventResult(
+                event=events_by_apartment[str(apartment_uuid)],
+                application_apartment_id=application_apartment_id,
+                result_position=list_rank,
+            )
+            for apartment_uuid, application_apartment_id, list_rank in reservations
+            # Late reservations without an application have no result to record
+            if application_apartment_id is not None
+        ]
     )
     if user:
-        event.handler = (
-            METADATA_HANDLER_INFORMATION + " / " + user.profile_or_user_full_name
-        )
-        event.save()
-    reservations = ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
-    for apartment_reservation in reservations:
-        event.results.create(
-            application_apartment=apartment_reservation.application_apartment,
-            result_position=apartment_reservation.list_position,
+        # A plain value, so that the handler is encrypted by the database
+        ApartmentReservation.objects.filter(apartment_uuid__in=apartment_uuids).update(
+            handler=user.profile_or_user_full_name
         )
-        if user:
-            apartment_reservation.handler = user.profile_or_user_full_name
-            apartment_reservation.save()
-    audit_logging.log(user, Operation.CREATE, event)
+    audit_logging.log_many(user, Operation.CREATE, events)
 
 
 def _validate_project_has_applications(project_uuid: uuid.UUID):
@@ -1,13 +1,15 @@
 import uuid
 from logging import getLogger
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import F, Max
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Min, Q
 
 from apartment.elastic.documents import ApartmentDocument
 from apartment.elastic.queries import get_apartment
+from apartment_application_service.models import RIGHT_OF_RESIDENCE_NEW_BATCH_OFFSET
 from application_form.enums import (
     ApartmentQueueChangeEventType,
     ApartmentReservationCancellationReason,
@@ -15,13 +17,15 @@ from application_form.enums import (
     ApplicationType,
 )
 from application_form.models import (
+    ApartmentQueueChangeEvent,
     ApartmentReservation,
     ApartmentReservationStateChangeEvent,
     Application,
-    ApplicationApartment,
 )
-from application_form.services.constants import LIST_POSITION_BUMP_OFFSET
-from application_form.utils import lock_table
+from application_form.services.constants import LIST_POSITION_GAP
+from application_form.utils import lock_apartments
+from audit_log import audit_logging
+from audit_log.enums import Operation
 from customer.models import Customer
 
 logger = getLogger(__name__)
@@ -34,80 +38,98 @@ def add_application_to_queues(
 ) -> None:
     """
     Adds the given application to the queues of all the apartments applied to.
-    """
 
-    for application_apartment in application.application_apartments.all():
+    The positions in all the queues are calculated with a fixed number of queries and
+    the reservations and their events are bulk-created, so the cost does not grow
+    with the number of apartments applied to.
+    """
+    if application.type not in [
+        ApplicationType.HASO,
+        ApplicationType.HITAS,
+        ApplicationType.PUOLIHITAS,
+    ]:
+        raise ValueError(f"unsupported application type {application.type}")
+
+    application_apartments = list(application.application_apartments.all())
+    if not application_apartments:
+        return
+    apartment_uuids = [
+        application_apartment.apartment_uuid
+        for application_apartment in application_apartments
+    ]
 
-        apartment_uuid = application_apartment.apartment_uuid
-        with lock_table(ApartmentReservation):
-            if application.type == ApplicationType.HASO:
-                # For HASO applications, the queue position is determined by the
-                # right of residence number.
-                # The list position will be the same as queue position
-                queue_position = _calculate_queue_position(
-                    apartment_uuid, application_apartment
+    with lock_apartments(apartment_uuids):
+        if application.type == ApplicationType.HASO:
+            # For HASO applications, the queue position is determined by the
+            # right of residence number.
+            queue_positions = _calculate_queue_positions(application, apartment_uuids)
+            if settings.SPARSE_LIST_POSITIONS:
+                # The new reservations are placed in the gaps of the lists, so only
+                # the queue positions need to be shifted
+                list_positions = _free_list_positions_at_queue_positions(
+                    queue_positions
                 )
-                list_position = queue_position
+                _make_room_for_reservations(queue_positions, ["queue_position"])
+            else:
+                # The list position will be the same as queue position
                 # Need to shift both list position and queue position
-                res = ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
-
-                _make_room_for_reservation(res, list_position, queue_position)
-            elif application.type in [
-                ApplicationType.HITAS,
-                ApplicationType.PUOLIHITAS,
-            ]:
-                # HITAS and PUOLIHITAS work the same way from the apartment lottery
-                # perspective, and should always be added to the end of the queue.
-                try:
-                    queue_position = (
-                        ApartmentReservation.objects.active()
-                        .filter(apartment_uuid=apartment_uuid)
-                        .order_by("-queue_position")[0]
-                        .queue_position
-                        + 1
-                    )
-                except IndexError:
-                    queue_position = 1
-
-                apartment_reservations = ApartmentReservation.objects.filter(
-                    apartment_uuid=apartment_uuid
+                list_positions = queue_positions
+                _make_room_for_reservations(
+                    queue_positions, ["list_position", "queue_position"]
                 )
-                if not apartment_reservations.exists():
-                    list_position = 1
-                else:
-                    # Use Max("list_position") instead of reservation count
-                    # to fix a corner case where the queue has an empty gap in
-                    # list_positions
-                    list_position = (
-                        apartment_reservations.aggregate(
-                            max_list_position=Max("list_position")
-                        )["max_list_position"]
-                        + 1
-                    )
-            else:
-                raise ValueError(f"unsupported application type {application.type}")
-
-            application = application_apartment.application
-            apartment_reservation = ApartmentReservation(
-                customer=application.customer,
-                queue_position=queue_position,
-                list_position=list_position,
-                application_apartment=application_apartment,
-                apartment_uuid=apartment_uuid,
-                right_of_residence=application.right_of_residence,
-                right_of_residence_is_old_batch=application.right_of_residence_is_old_batch,  # noqa: E501
-                has_children=application.has_children,
-                has_hitas_ownership=application.has_hitas_ownership,
-                is_age_over_55=application.customer.is_age_over_55,
-                is_right_of_occupancy_housing_changer=application.is_right_of_occupancy_housing_changer,  # noqa: E501
-                submitted_late=application.submitted_late,
+        else:
+            # HITAS and PUOLIHITAS work the same way from the apartment lottery
+            # perspective, and should always be added to the end of the queue.
+            queue_positions, list_positions = _get_end_of_queue_positions(
+                apartment_uuids
             )
-            apartment_reservation.save(user=user)
 
-            apartment_reservation.queue_change_events.create(
-                type=ApartmentQueueChangeEventType.ADDED,
-                comment=comment,
-            )
+        customer = application.customer
+        apartment_reservations = ApartmentReservation.objects.bulk_create(
+            [
+                ApartmentReservation(
+                    customer=customer,
+                    queue_position=queue_positions[
+                        str(application_apartment.apartment_uuid)
+                    ],
+                    list_position=list_positions[
+                        str(application_apartment.apartment_uuid)
+                    ],
+                    application_apartment=application_apartment,
+                    apartment_uuid=application_apartment.apartment_uuid,
+                    right_of_residence=application.right_of_residence,
+                    right_of_residence_is_old_batch=application.right_of_residence_is_old_batch,  # noqa: E501
+                    has_children=application.has_children,
+                    has_hitas_ownership=application.has_hitas_ownership,
+                    is_age_over_55=customer.is_age_over_55,
+                    is_right_of_occupancy_housing_changer=application.is_right_of_occupancy_housing_changer,  # noqa: E501
+                    submitted_late=application.submitted_late,
+                )
+                for application_apartment in application_apartments
+            ]
+        )
+        # bulk_create() bypasses ApartmentReservation.save(), so the initial state
+        # change events are created here
+        ApartmentReservationStateChangeEvent.objects.bulk_create(
+            [
+                ApartmentReservationStateChangeEvent(
+                    reservation=apartment_reservation,
+                    state=apartment_reservation.state,
+                    user=user,
+                )
+                for apartment_reservation in apartment_reservations
+            ]
+        )
+        ApartmentQueueChangeEvent.objects.bulk_create(
+            [
+                ApartmentQueueChangeEvent(
+                    queue_application=apartment_reservation,
+                    type=ApartmentQueueChangeEventType.ADDED,
+                    comment=comment,
+                )
+                for apartment_reservation in apartment_reservations
+            ]
+        )
 
 
 @transaction.atomic
@@ -147,12 +169,14 @@ def remove_reservation_from_queue(
 
 
 def remove_queue_gaps(apartment: ApartmentDocument):
-    """Goes through `ApartmentReservation` rows and removes any gaps in the
-    `queue_position` and `list_position` numbers.
+    """Renumbers the `queue_position` and `list_position` of the apartment's
+    `ApartmentReservation` rows, removing any gaps in them.
 
-    Orders the reservations by queue_position, loops through them
-    and assigns iterator+1 as the `ApartmentReservation.queue_position`-attribute
-    removing the gaps and preserving the current order.
+    Orders the reservations by queue_position and assigns the row number in that
+    order to both positions with a single UPDATE, preserving the current order. With
+    SPARSE_LIST_POSITIONS the list positions are spaced LIST_POSITION_GAP apart.
+    Reservations whose queue position changed get a state change event (with an
+    unchanged state) and an audit log entry, which are bulk-inserted.
 
     e.g. queue_positions `<empty> -> 2. -> <empty> -> 4. -> 5.`
     become `1. -> 2. -> 3.`
@@ -164,79 +188,268 @@ def remove_queue_gaps(apartment: ApartmentDocument):
     Args:
         apartment (ApartmentDocument): The apartment whose queue is being modified
     """
-    reservations = ApartmentReservation.objects.filter(
-        apartment_uuid=apartment.uuid
-    ).order_by("queue_position")
+    table = ApartmentReservation._meta.db_table
+    # The unique constraint of (apartment_uuid, list_position) is deferred, so the
+    # list positions can be permuted in place
+    sql = f"""
+        WITH renumbered AS (
+            SELECT
+                id,
+                queue_position AS old_queue_position,
+                row_number() OVER (
+                    ORDER BY queue_position ASC NULLS LAST, list_position
+                ) AS position
+            FROM {table}
+            WHERE apartment_uuid = %(apartment_uuid)s
+        )
+        UPDATE {table} AS reservation
+        SET queue_position = renumbered.position,
+            list_position = renumbered.position * %(step)s
+        FROM renumbered
+        WHERE reservation.id = renumbered.id
+            AND (
+                reservation.queue_position IS DISTINCT FROM renumbered.position
+                OR reservation.list_position <> renumbered.position * %(step)s
+            )
+        RETURNING
+            reservation.id,
+            reservation.state,
+            renumbered.old_queue_position IS DISTINCT FROM renumbered.position
+    """
 
-    # workaround:
-    # list_position has an unique_together constraint with apartment_uuid
-    # it also cannot be NULL
-    # so we just temporarily move the list_positions out of the way
-    # so we can set them into order with their queue_positions
-    reservations.update(list_position=F("list_position") + LIST_POSITION_BUMP_OFFSET)
+    with lock_apartments([apartment.uuid]):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                sql,
+                {"apartment_uuid": str(apartment.uuid), "step": _list_position_step()},
+            )
+            updated_rows = cursor.fetchall()
 
-    for idx, res in enumerate(reservations, 1):
-        res.set_state(state=res.state, queue_position=idx)
-        res.list_position = idx
-        res.save()
+        state_change_events = ApartmentReservationStateChangeEvent.objects.bulk_create(
+            [
+                ApartmentReservationStateChangeEvent(
+                    reservation_id=reservation_id,
+                    state=ApartmentReservationState(state),
+                )
+                for reservation_id, state, queue_position_changed in updated_rows
+                if queue_position_changed
+            ]
+        )
+        audit_logging.log_many(None, Operation.CREATE, state_change_events)
 
 
-def _calculate_queue_position(
-    apartment_uuid: uuid.UUID,
-    application_apartment: ApplicationApartment,
-) -> int:
+def _calculate_queue_positions(
+    application: Application, apartment_uuids: List[uuid.UUID]
+) -> Dict[str, int]:
     """
-    Finds the new position in the queue for the given application based on its right
-    of residence number. The smaller the number, the smaller the position in the queue.
+    Finds the new position in the queue of each of the given apartments for the given
+    HASO application based on its right of residence number. The smaller the number,
+    the smaller the position in the queue.
 
     Late applications form a pool of their own and should be kept in the order of their
     right of residence number within that pool.
+
+    The position is the first queue position held by an application of the same pool
+    with a greater right of residence ordering number that hasn't been offered or sold
+    the apartment, or the end of the queue if there is none. It is computed for all the
+    apartments with a single aggregate query.
+
+    Returns the positions keyed by apartment uuid string.
     """
-    right_of_residence_ordering_number = (
-        application_apartment.application.right_of_residence_ordering_number
+    queue_positions = {str(apartment_uuid): 1 for apartment_uuid in apartment_uuids}
+    annotations = {"active_count": Count("pk")}
+
+    ordering_number = application.right_of_residence_ordering_number
+    if ordering_number is not None:
+        is_old_batch = (
+            "application_apartment__application__right_of_residence_is_old_batch"
+        )
+        right_of_residence = "application_apartment__application__right_of_residence"
+        submitted_late = "application_apartment__application__submitted_late"
+        # Equivalent to comparing `right_of_residence_ordering_number` of the other
+        # application, written as plain column comparisons
+        has_greater_ordering_number = Q(
+            **{is_old_batch: True, f"{right_of_residence}__gt": ordering_number}
+        ) | (
+            (Q(**{is_old_batch: False}) | Q(**{f"{is_old_batch}__isnull": True}))
+            & Q(
+                **{
+                    f"{right_of_residence}__gt": ordering_number
+                    - RIGHT_OF_RESIDENCE_NEW_BATCH_OFFSET
+                }
+            )
+        )
+        annotations["first_lower_priority_position"] = Min(
+            "queue_position",
+            filter=Q(**{submitted_late: application.submitted_late})
+            & has_greater_ordering_number
+            & ~Q(
+                state__in=[
+                    ApartmentReservationState.OFFER_ACCEPTED,
+                    ApartmentReservationState.OFFERED,
+                    ApartmentReservationState.SOLD,
+                ]
+            ),
+        )
+
+    rows = (
+        ApartmentReservation.objects.active()
+        .filter(apartment_uuid__in=apartment_uuids)
+        .values("apartment_uuid")
+        .annotate(**annotations)
+        .order_by()
     )
-    submitted_late = application_apartment.application.submitted_late
-    all_reservations = ApartmentReservation.objects.filter(
-        apartment_uuid=apartment_uuid
-    ).only(
-        "queue_position",
-        "state",
-        "application_apartment__application__right_of_residence",
-        "application_apartment__application__right_of_residence_is_old_batch",
+    for row in rows:
+        queue_position = row.get("first_lower_priority_position")
+        if queue_position is None:
+            queue_position = row["active_count"] + 1
+        queue_positions[str(row["apartment_uuid"])] = queue_position
+    return queue_positions
+
+
+def _get_end_of_queue_positions(
+    apartment_uuids: List[uuid.UUID],
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    Finds the queue and list positions at the end of the queue of each of the given
+    apartments, keyed by apartment uuid string.
+
+    Uses the maximum list position instead of the reservation count to fix a corner
+    case where the queue has an empty gap in list positions.
+    """
+    queue_positions = {str(apartment_uuid): 1 for apartment_uuid in apartment_uuids}
+    list_positions = queue_positions.copy()
+    maximums = (
+        ApartmentReservation.objects.filter(apartment_uuid__in=apartment_uuids)
+        .values("apartment_uuid")
+        .annotate(
+            max_queue_position=Max(
+                "queue_position", filter=~Q(state=ApartmentReservationState.CANCELED)
+            ),
+            max_list_position=Max("list_position"),
+        )
+        .order_by()
     )
-    all_reservations = all_reservations.active()
-    reservations = all_reservations.filter(
-        application_apartment__application__submitted_late=submitted_late
-    ).order_by("queue_position")
-
-    offered_or_sold_states = [
-        ApartmentReservationState.OFFER_ACCEPTED,
-        ApartmentReservationState.OFFERED,
-        ApartmentReservationState.SOLD,
-    ]
-    for apartment_reservation in reservations:
-        other_application = apartment_reservation.application_apartment.application
+    for row in maximums:
+        apartment_uuid = str(row["apartment_uuid"])
+        queue_positions[apartment_uuid] = (row["max_queue_position"] or 0) + 1
+        list_positions[apartment_uuid] = (
+            row["max_list_position"] + _list_position_step()
+        )
+    return queue_positions, list_positions
 
-        if (
-            right_of_residence_ordering_number
-            < other_application.right_of_residence_ordering_number
-            and apartment_reservation.state not in offered_or_sold_states
-        ):
-            return apartment_reservation.queue_position
-    return all_reservations.count() + 1
 
+def _make_room_for_reservations(
+    new_positions: Dict[str, int], position_fields: List[str]
+) -> None:
+    """
+    Make room for new reservations by shifting list and/or queue positions.
 
-def _make_room_for_reservation(res, new_list_position, new_queue_position):
+    This function is used when adding new reservations to the queues of several
+    apartments. For each apartment, it shifts all reservations that are >= the new
+    position by one, with one UPDATE per position field.
     """
-    Make room for a new reservation by shifting list and queue
-    positions.
+    for position_field in position_fields:
+        condition = Q()
+        for apartment_uuid, new_position in new_positions.items():
+            condition |= Q(
+                apartment_uuid=apartment_uuid,
+                **{position_field + "__gte": new_position},
+            )
+        ApartmentReservation.objects.filter(condition).update(
+            **{position_field: F(position_field) + 1}
+        )
+
+
+def _list_position_step() -> int:
+    """Distance between the list positions of consecutive reservations."""
+    return LIST_POSITION_GAP if settings.SPARSE_LIST_POSITIONS else 1
+
 
-    This function is used when adding a new reservation to the queue. It
-    shifts all reservations that are >= the new list position and >= the
-    new queue position by one.
+def _free_list_position_before(
+    apartment_uuid: uuid.UUID, list_position: Optional[int]
+) -> int:
+    """
+    Return a free list position directly before the reservation at the given list
+    position of the apartment, or at the end of the list if list_position is None.
+
+    With dense list positions, the reservations from the given list position onwards
+    are shifted by one to make room. With SPARSE_LIST_POSITIONS, the middle of the gap
+    before the reservation is returned, and the list positions of the apartment are
+    respaced only when there is no gap left.
+    """
+    reservations = ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
+    if list_position is None:
+        max_list_position = reservations.aggregate(
+            max_list_position=Max("list_position")
+        )["max_list_position"]
+        return (max_list_position or 0) + _list_position_step()
+
+    if not settings.SPARSE_LIST_POSITIONS:
+        _adjust_positions(reservations, "list_position", list_position, by=1)
+        return list_position
+
+    previous_list_position = (
+        reservations.filter(list_position__lt=list_position).aggregate(
+            max_list_position=Max("list_position")
+        )["max_list_position"]
+        or 0
+    )
+    if list_position - previous_list_position < 2:
+        rank = reservations.filter(list_position__lte=list_position).count()
+        _respace_list_positions(apartment_uuid)
+        list_position = rank * LIST_POSITION_GAP
+        previous_list_position = list_position - LIST_POSITION_GAP
+    return previous_list_position + (list_position - previous_list_position) // 2
+
+
+def _free_list_positions_at_queue_positions(
+    queue_positions: Dict[str, int],
+) -> Dict[str, int]:
+    """
+    Return a free list position for each apartment directly before the active
+    reservation that currently holds the given queue position, or at the end of the
+    list if there is none.
+    """
+    condition = Q()
+    for apartment_uuid, queue_position in queue_positions.items():
+        condition |= Q(apartment_uuid=apartment_uuid, queue_position=queue_position)
+    displaced_list_positions = {
+        str(apartment_uuid): list_position
+        for apartment_uuid, list_position in ApartmentReservation.objects.active()
+        .filter(condition)
+        .values_list("apartment_uuid", "list_position")
+    }
+    return {
+        apartment_uuid: _free_list_position_before(
+            apartment_uuid, displaced_list_positions.get(apartment_uuid)
+        )
+        for apartment_uuid in queue_positions
+    }
+
+
+def _respace_list_positions(apartment_uuid: uuid.UUID) -> None:
+    """
+    Spread the list positions of the apartment's reservations LIST_POSITION_GAP apart,
+    keeping their order.
+    """
+    table = ApartmentReservation._meta.db_table
+    sql = f"""
+        WITH respaced AS (
+            SELECT
+                id,
+                row_number() OVER (ORDER BY list_position) * %s AS list_position
+            FROM {table}
+            WHERE apartment_uuid = %s
+        )
+        UPDATE {table} AS reservation
+        SET list_position = respaced.list_position
+        FROM respaced
+        WHERE reservation.id = respaced.id
+            AND reservation.list_position <> respaced.list_position
     """
-    _adjust_positions(res, "list_position", new_list_position, by=1)
-    _adjust_positions(res, "queue_position", new_queue_position, by=1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [LIST_POSITION_GAP, str(apartment_uuid)])
 
 
 def _remove_queue_position(apartment_uuid, queue_position):
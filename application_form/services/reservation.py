@@ -3,7 +3,7 @@ from typing import Optional, Tuple
 
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import F, Max, QuerySet
+from django.db.models import Max, Min, QuerySet
 from rest_framework.exceptions import ValidationError
 
 from apartment.elastic.queries import get_apartment
@@ -13,8 +13,12 @@ from application_form.enums import (
     ApartmentReservationState,
 )
 from application_form.models import ApartmentReservation
-from application_form.services.queue import _adjust_positions
-from application_form.utils import lock_table
+from application_form.services.queue import (
+    _adjust_positions,
+    _free_list_position_before,
+    _list_position_step,
+)
+from application_form.utils import lock_apartments
 from customer.models import Customer
 
 _logger = logging.getLogger(__name__)
@@ -35,26 +39,23 @@ def transfer_reservation_to_another_customer(
     created instead. The new reservation will get a list position right after the
     cancelled old one."""
 
-    # Get the new reservation's field values ready but don't save it yet to keep it from
-    # messing up reservation shifting
+    # Make room for the new reservation between the old reservation and the one after
+    # it. We don't need to update queue positions because they will stay the same when
+    # transferring a reservation.
+    next_list_position = ApartmentReservation.objects.filter(
+        apartment_uuid=old_reservation.apartment_uuid,
+        list_position__gt=old_reservation.list_position,
+    ).aggregate(min_list_position=Min("list_position"))["min_list_position"]
     new_reservation = ApartmentReservation(
         apartment_uuid=old_reservation.apartment_uuid,
         queue_position=old_reservation.queue_position,
-        list_position=old_reservation.list_position + 1,
+        list_position=_free_list_position_before(
+            old_reservation.apartment_uuid, next_list_position
+        ),
         state=old_reservation.state,
         customer=customer,
         handler=user.profile_or_user_full_name,
     )
-
-    # Shift reservations after the old reservation one step back to make room for the
-    # new reservation. We don't need to update queue positions because they will stay
-    # the same when transferring a reservation.
-    reservations_after_old_reservation = ApartmentReservation.objects.filter(
-        apartment_uuid=old_reservation.apartment_uuid,
-        list_position__gt=old_reservation.list_position,
-    )
-    reservations_after_old_reservation.update(list_position=F("list_position") + 1)
-
     new_reservation.save()
     new_reservation.queue_change_events.create(
         type=ApartmentQueueChangeEventType.ADDED,
@@ -97,10 +98,10 @@ def calculate_haso_positions(
 def create_late_reservation(
     reservation_data: dict, user: User = None
 ) -> ApartmentReservation:
-    with lock_table(ApartmentReservation):
+    apartment_uuid = reservation_data["apartment_uuid"]
+    with lock_apartments([apartment_uuid]):
         requested_queue_position = reservation_data.pop("queue_position", None)
         requested_submitted_late = reservation_data.pop("submitted_late", None)
-        apartment_uuid = reservation_data["apartment_uuid"]
         apartment = get_apartment(apartment_uuid, include_project_fields=True)
         existing_reservations = get_existing_reservations(apartment_uuid)
 
@@ -131,7 +132,7 @@ def create_late_reservation(
                 new_queue_position,
                 by=1,
             )
-            new_list_position = (max_list_position or 0) + 1
+            new_list_position = (max_list_position or 0) + _list_position_step()
         else:
             new_list_position, new_queue_position = calculate_new_positions(
                 max_list_position,
@@ -184,7 +185,7 @@ def calculate_new_positions(
     right_of_residence_ordering_number: int,
     existing_reservations: QuerySet,
 ) -> tuple:
-    new_list_position = (max_list_position or 0) + 1
+    new_list_position = (max_list_position or 0) + _list_position_step()
     new_queue_position = (max_queue_position or 0) + 1
 
     if ownership_type.lower() == "haso":
@@ -199,12 +200,9 @@ def calculate_new_positions(
                 right_of_residence_ordering_number,
             )
             if positions is not None:
-                new_queue_position, new_list_position = positions
-                _adjust_positions(
-                    existing_reservations,
-                    "list_position",
-                    new_list_position,
-                    by=1,
+                new_queue_position, displaced_list_position = positions
+                new_list_position = _free_list_position_before(
+                    late_reservations[0].apartment_uuid, displaced_list_position
                 )
                 _adjust_positions(
                     late_reservations,
@@ -4,6 +4,7 @@ from unittest.mock import MagicMock, patch
 from uuid import UUID
 
 import pytest
+from django.core.management import call_command
 from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
@@ -21,9 +22,10 @@ from application_form import error_codes
 from application_form.enums import (
     ApartmentReservationState,
     ApplicationArrivalMethod,
+    ApplicationIntakeState,
     ApplicationType,
 )
-from application_form.models import ApartmentReservation, Application
+from application_form.models import ApartmentReservation, Application, ApplicationIntake
 from application_form.services.application import cancel_reservation
 from application_form.services.lottery.machine import distribute_apartments
 from application_form.services.queue import add_application_to_queues
@@ -1496,3 +1498,174 @@ def test_application_to_already_reserved_project(
     )
 
     assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_application_bulk_post(api_client, elastic_single_project_with_apartments):
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    items = [create_application_data(profile) for _ in range(2)]
+
+    response = api_client.post(
+        reverse("application_form:application-bulk"), items, format="json"
+    )
+
+    assert response.status_code == 201
+    assert response.data == [
+        {"application_uuid": item["application_uuid"], "status": 201} for item in items
+    ]
+    applications = Application.objects.filter(
+        external_uuid__in=[item["application_uuid"] for item in items]
+    )
+    assert applications.count() == 2
+    for application in applications:
+        assert application.applicants.count() == 2
+        assert application.application_apartments.count() == 5
+    audit_events = [log.message["audit_event"] for log in AuditLog.objects.all()]
+    assert sorted(event["target"]["id"] for event in audit_events) == sorted(
+        item["application_uuid"] for item in items
+    )
+    assert {event["operation"] for event in audit_events} == {"CREATE"}
+
+
+@pytest.mark.django_db
+def test_application_bulk_post_requires_a_list(
+    api_client, elastic_single_project_with_apartments
+):
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+
+    response = api_client.post(
+        reverse("application_form:application-bulk"),
+        create_application_data(profile),
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert not Application.objects.exists()
+
+
+@pytest.mark.django_db
+def test_application_post_with_queued_intake(
+    api_client, elastic_single_project_with_apartments, settings
+):
+    settings.APPLICATION_INTAKE_QUEUED = True
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    data = create_application_data(profile)
+    status_url = reverse(
+        "application_form:application-intake-status",
+        kwargs={"application_uuid": data["application_uuid"]},
+    )
+
+    for _ in range(2):
+        # A retried request is stored only once
+        response = api_client.post(
+            reverse("application_form:application-list"), data, format="json"
+        )
+        assert response.status_code == 202
+        assert response.data["application_uuid"] == data["application_uuid"]
+        assert response.data["state"] == "pending"
+    assert ApplicationIntake.objects.count() == 1
+    assert not Application.objects.exists()
+
+    response = api_client.get(status_url)
+    assert response.status_code == 200
+    assert response.data["state"] == "pending"
+
+    call_command("process_application_intake", "--once")
+
+    response = api_client.get(status_url)
+    assert response.data["state"] == "succeeded"
+    assert response.data["errors"] == {}
+    application = Application.objects.get(external_uuid=data["application_uuid"])
+    assert application.customer.primary_profile == profile
+    assert ApartmentReservation.objects.filter(
+        application_apartment__application=application
+    ).count() == len(data["apartments"])
+    audit_event = AuditLog.objects.get().message["audit_event"]
+    assert audit_event["actor"] == {"role": "USER", "profile_id": str(profile.pk)}
+    assert audit_event["target"] == {
+        "id": data["application_uuid"],
+        "type": "Application",
+    }
+
+    # Other users cannot see the intake
+    other_profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(other_profile)}")
+    assert api_client.get(status_url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_application_post_with_queued_intake_validates_the_application(
+    api_client, elastic_single_project_with_apartments, settings
+):
+    settings.APPLICATION_INTAKE_QUEUED = True
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    data = create_application_data(profile)
+    del data["apartments"]
+
+    response = api_client.post(
+        reverse("application_form:application-list"), data, format="json"
+    )
+
+    assert response.status_code == 400
+    assert not ApplicationIntake.objects.exists()
+
+
+@pytest.mark.django_db
+def test_application_post_with_queued_intake_rejects_uuid_of_another_user(
+    api_client, elastic_single_project_with_apartments, settings
+):
+    settings.APPLICATION_INTAKE_QUEUED = True
+    profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+    data = create_application_data(profile)
+    response = api_client.post(
+        reverse("application_form:application-list"), data, format="json"
+    )
+    assert response.status_code == 202
+
+    other_profile = ProfileFactory()
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(other_profile)}")
+    other_data = create_application_data(other_profile)
+    other_data["application_uuid"] = data["application_uuid"]
+    response = api_client.post(
+        reverse("application_form:application-list"), other_data, format="json"
+    )
+
+    assert response.status_code == 400
+    assert "application_uuid" in response.data
+    assert ApplicationIntake.objects.get().user == profile.user
+
+
+@pytest.mark.django_db
+def test_process_application_intake_requeues_stale_intakes(
+    api_client, elastic_single_project_with_apartments, settings
+):
+    settings.APPLICATION_INTAKE_QUEUED = True
+    settings.APPLICATION_INTAKE_TIMEOUT = 60
+    profiles = [ProfileFactory(), ProfileFactory()]
+    for profile in profiles:
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {_create_token(profile)}")
+        response = api_client.post(
+            reverse("application_form:application-list"),
+            create_application_data(profile),
+            format="json",
+        )
+        assert response.status_code == 202
+    # left processing by a worker that was killed, and by one that is still running
+    stale_intake, processing_intake = ApplicationIntake.objects.order_by("id")
+    ApplicationIntake.objects.update(state=ApplicationIntakeState.PROCESSING)
+    ApplicationIntake.objects.filter(pk=stale_intake.pk).update(
+        updated_at=timezone.now() - timedelta(hours=1)
+    )
+
+    call_command("process_application_intake", "--once")
+
+    stale_intake.refresh_from_db()
+    processing_intake.refresh_from_db()
+    assert stale_intake.state == ApplicationIntakeState.SUCCEEDED
+    assert stale_intake.application.customer.primary_profile == profiles[0]
+    assert processing_intake.state == ApplicationIntakeState.PROCESSING
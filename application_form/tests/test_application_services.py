@@ -6,6 +6,7 @@ from application_form.enums import ApplicationType
 from application_form.models import ApartmentReservation
 from application_form.services.application import (
     create_application,
+    create_applications,
     get_ordered_applications,
 )
 from application_form.tests.conftest import (
@@ -104,6 +105,30 @@ def test_create_old_batch_haso_application(elastic_single_project_with_apartment
         assert reservation.right_of_residence_is_old_batch is True
 
 
+@pytest.mark.django_db
+def test_create_applications_defaults_right_of_residence_is_old_batch(
+    elastic_single_project_with_apartments,
+):
+    applications_data = []
+    for _ in range(2):
+        profile = ProfileFactory()
+        data = create_validated_application_data(profile, ApplicationType.HASO)
+        data = prepare_metadata(data, profile)
+        data.pop("right_of_residence_is_old_batch", None)
+        applications_data.append(data)
+
+    applications = create_applications(applications_data)
+
+    for application in applications:
+        application.refresh_from_db()
+        assert application.right_of_residence is not None
+        assert application.right_of_residence_is_old_batch is False
+        for reservation in ApartmentReservation.objects.filter(
+            application_apartment__application=application
+        ):
+            assert reservation.right_of_residence_is_old_batch is False
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("application_type", list(ApplicationType))
 def test_create_application_type(
@@ -1,11 +1,35 @@
+import uuid
+import zipfile
 from datetime import timedelta
+from io import StringIO
 
 import pytest
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import override_settings
 from django.utils import timezone
 
-from application_form.enums import ApartmentReservationState, OfferState
-from application_form.tests.factories import OfferFactory
+from apartment.tests.factories import ApartmentDocumentFactory
+from application_form.enums import (
+    ApartmentReservationState,
+    ApplicationType,
+    LotteryJobState,
+    OfferState,
+)
+from application_form.models import ApartmentReservation, Application, LotteryJob
+from application_form.pdf.benchmark import find_regressions, PDFBenchmarkResult
+from application_form.services.lottery.jobs import (
+    create_lottery_job,
+    fail_stale_lottery_jobs,
+)
+from application_form.services.queue import add_application_to_queues
+from application_form.tests.factories import (
+    ApartmentReservationFactory,
+    ApplicationFactory,
+    OfferFactory,
+)
+from invoicing.enums import InstallmentType
+from invoicing.tests.factories import ApartmentInstallmentFactory
 
 
 @pytest.mark.django_db
@@ -70,3 +94,215 @@ def test_update_reservations_based_on_offer_expiration():
     for offer, expected_state in zip(offers, expected_states):
         offer.apartment_reservation.refresh_from_db()
         assert offer.apartment_reservation.state == expected_state
+
+
+@pytest.mark.django_db
+def test_run_lottery_jobs(elastic_hitas_project_application_end_time_finished):
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+    job = LotteryJob.objects.create(project_uuid=project_uuid)
+    # The lottery is not run again for a project whose job failed
+    failed_job = LotteryJob.objects.create(
+        project_uuid=project_uuid, state=LotteryJobState.FAILED
+    )
+
+    call_command("run_lottery_jobs", "--once")
+
+    job.refresh_from_db()
+    failed_job.refresh_from_db()
+    assert job.state == LotteryJobState.SUCCEEDED
+    assert job.started_at <= job.finished_at
+    assert failed_job.state == LotteryJobState.FAILED
+    assert failed_job.started_at is None
+    assert (
+        ApartmentReservation.objects.get(application_apartment__application=app).state
+        == ApartmentReservationState.RESERVED
+    )
+
+
+@pytest.mark.django_db
+def test_run_lottery_jobs_fails_stale_running_jobs(
+    elastic_hitas_project_application_end_time_finished,
+):
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+    # left running by a worker that was killed
+    stale_job = LotteryJob.objects.create(
+        project_uuid=project_uuid,
+        state=LotteryJobState.RUNNING,
+        started_at=timezone.now() - timedelta(hours=1),
+    )
+
+    with override_settings(LOTTERY_JOBS_RUN_INLINE=False, LOTTERY_JOB_TIMEOUT=60):
+        job = create_lottery_job(project_uuid)
+        assert job != stale_job
+        call_command("run_lottery_jobs", "--once")
+
+    stale_job.refresh_from_db()
+    job.refresh_from_db()
+    assert stale_job.state == LotteryJobState.FAILED
+    assert stale_job.finished_at is not None
+    assert job.state == LotteryJobState.SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_recently_started_lottery_jobs_are_not_stale():
+    job = LotteryJob.objects.create(
+        project_uuid=uuid.uuid4(),
+        state=LotteryJobState.RUNNING,
+        started_at=timezone.now(),
+    )
+
+    with override_settings(LOTTERY_JOB_TIMEOUT=60):
+        assert fail_stale_lottery_jobs() == 0
+
+    job.refresh_from_db()
+    assert job.state == LotteryJobState.RUNNING
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ownership_type", ["hitas", "haso"])
+def test_benchmark_lottery(elasticsearch, ownership_type):
+    out = StringIO()
+
+    call_command(
+        "benchmark_lottery",
+        "--apartments=3",
+        "--applicants=5",
+        f"--ownership-type={ownership_type}",
+        "--seed=1",
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "order_persistence" in output
+    assert "reservation" in output
+    assert "total" in output
+    assert not Application.objects.exists()
+    assert not ApartmentReservation.objects.exists()
+
+
+def test_find_pdf_benchmark_regressions():
+    results = [
+        PDFBenchmarkResult(
+            "invoice", 1, seconds=0.5, peak_memory_kib=1000, output_bytes=5000
+        ),
+        PDFBenchmarkResult(
+            "invoice", 10, seconds=0.2, peak_memory_kib=9000, output_bytes=50000
+        ),
+        PDFBenchmarkResult(
+            "haso_release", 1, seconds=9, peak_memory_kib=9000, output_bytes=9000
+        ),
+    ]
+    baseline = {
+        "invoice:1": {"seconds": 0.1, "peak_memory_kib": 1000, "output_bytes": 5000},
+        "invoice:10": {"seconds": 0.2, "peak_memory_kib": 4000, "output_bytes": 50000},
+    }
+
+    regressions = find_regressions(results, baseline, tolerance=0.25)
+
+    # the wall time is not checked by default
+    assert len(regressions) == 1
+    assert regressions[0].startswith("invoice:10 peak_memory_kib 9000")
+
+    regressions = find_regressions(results, baseline, 0.25, metrics=["seconds"])
+    assert len(regressions) == 1
+    assert regressions[0].startswith("invoice:1 seconds 0.5")
+
+
+def test_benchmark_pdfs_checks_the_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    options = {"records": [1], "repeat": 1, "baseline": str(baseline)}
+
+    with pytest.raises(CommandError):
+        call_command("benchmark_pdfs", "invoice", stdout=StringIO(), **options)
+
+    call_command(
+        "benchmark_pdfs",
+        "invoice",
+        update_baseline=True,
+        stdout=StringIO(),
+        **options,
+    )
+    out = StringIO()
+    call_command("benchmark_pdfs", "invoice", stdout=out, tolerance=10, **options)
+    assert "invoice" in out.getvalue()
+
+    baseline.write_text(
+        '{"invoice:1": {"seconds": 1, "peak_memory_kib": 1, "output_bytes": 1}}'
+    )
+    with pytest.raises(CommandError, match="invoice:1 output_bytes"):
+        call_command("benchmark_pdfs", "invoice", stdout=StringIO(), **options)
+
+    # a slower run is only reported, unless the wall time is checked
+    baseline.write_text('{"invoice:1": {"seconds": 0.000001}}')
+    err = StringIO()
+    call_command("benchmark_pdfs", "invoice", stdout=StringIO(), stderr=err, **options)
+    assert "invoice:1 seconds" in err.getvalue()
+    with pytest.raises(CommandError, match="invoice:1 seconds"):
+        call_command(
+            "benchmark_pdfs",
+            "invoice",
+            check_seconds=True,
+            stdout=StringIO(),
+            **options,
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("output", ["zip", "pdf"])
+def test_render_project_invoices(tmp_path, output):
+    project_uuid = uuid.uuid4()
+    apartments = [
+        ApartmentDocumentFactory(project_uuid=project_uuid, apartment_number=number)
+        for number in ("A1", "A2")
+    ]
+    for apartment in apartments:
+        ApartmentInstallmentFactory(
+            apartment_reservation=ApartmentReservationFactory(
+                apartment_uuid=apartment.uuid,
+                state=ApartmentReservationState.RESERVED,
+                queue_position=1,
+                list_position=1,
+            ),
+            type=InstallmentType.PAYMENT_1,
+        )
+    path = tmp_path / f"laskut.{output}"
+    out = StringIO()
+
+    call_command(
+        "render_project_documents",
+        "invoices",
+        str(project_uuid),
+        str(path),
+        f"--output={output}",
+        stdout=out,
+    )
+
+    assert "Wrote 2 document(s)" in out.getvalue()
+    if output == "zip":
+        with zipfile.ZipFile(path) as zip_file:
+            assert len(zip_file.namelist()) == 2
+    else:
+        assert path.read_bytes().startswith(b"%PDF")
+
+
+@pytest.mark.django_db
+def test_render_project_documents_without_documents(tmp_path):
+    project_uuid = uuid.uuid4()
+    ApartmentDocumentFactory(project_uuid=project_uuid)
+    path = tmp_path / "laskut.zip"
+
+    with pytest.raises(CommandError, match="no documents"):
+        call_command(
+            "render_project_documents",
+            "invoices",
+            str(project_uuid),
+            str(path),
+            stdout=StringIO(),
+        )
+    assert not path.exists()
@@ -1,3 +1,4 @@
+import codecs
 import collections
 from datetime import date, datetime, timedelta
 from decimal import Decimal
@@ -5,9 +6,12 @@ from io import BytesIO
 from typing import List, Union
 
 import pytest
+import xlsxwriter
 from _pytest.fixtures import fixture
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from freezegun import freeze_time
 
@@ -35,6 +39,7 @@ from application_form.services.export import (
     ApplicantMailingListExportService,
     ProjectLotteryResultExportService,
     SaleReportExportService,
+    XlsxExportService,
     XlsxSalesReportExportService,
 )
 from application_form.services.lottery.machine import distribute_apartments
@@ -696,6 +701,27 @@ def test_sale_report_invalid_money_amount():
     assert cent_sum == Decimal(3)
 
 
+def test_xlsx_export_reuses_cell_formats():
+    class RowExportService(XlsxExportService):
+        COLUMN_COUNT = 4
+
+        def get_rows(self):
+            return list(self.iter_rows())
+
+        def iter_rows(self):
+            for idx in range(100):
+                yield ["a", idx, "#E8E8E8"] if idx % 2 else ["b", idx]
+
+    workbook = xlsxwriter.Workbook(BytesIO(), {"constant_memory": True})
+    format_count = len(workbook.formats)
+    RowExportService()._make_xlsx(workbook)
+    workbook.close()
+
+    # one format for the plain rows and one for the colored rows
+    assert len(workbook.formats) - format_count == 2
+    assert RowExportService().write_xlsx_file().getvalue().startswith(b"PK")
+
+
 @pytest.mark.django_db
 def test_sale_report_subheader_row():
     sold_events = ApartmentReservationStateChangeEvent.objects.all()
@@ -1154,6 +1180,33 @@ def test_export_sale_report_new(
     assert export_service._get_unsold_count(all_apartments) == expected_unsold_count
 
 
+@pytest.mark.django_db
+def test_export_sale_report_queries_do_not_scale_with_apartments(
+    elastic_hitas_project_with_5_apartments,
+    elastic_haso_project_with_5_apartments,
+):
+    hitas_project, _ = sell_apartments(elastic_hitas_project_with_5_apartments[0], 4)
+    haso_project, _ = sell_apartments(elastic_haso_project_with_5_apartments[0], 4)
+    export_service = XlsxSalesReportExportService(
+        get_state_events_for_export(),
+        [hitas_project.project_uuid, haso_project.project_uuid],
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        rows = export_service.get_rows()
+
+    # the states of the apartments are fetched once per project
+    assert len(queries.captured_queries) <= 2
+    # every sold apartment has a row with its date of sale
+    sale_dates = [
+        row[4]
+        for row in rows
+        if len(row) == 5 and row[4] != XlsxSalesReportExportService.HIGHLIGHT_COLOR
+    ]
+    assert len(sale_dates) == 8
+    assert all(sale_dates)
+
+
 @pytest.mark.django_db
 def test_export_sale_report(
     elastic_hitas_project_with_5_apartments,
@@ -1248,3 +1301,16 @@ def test_write_csv_file(applicant_export_service, tmp_path):
         contents = f.read()
         assert contents.startswith('"Primary applicant";"Primary applicant address"')
         assert "äöÄÖtest" in contents
+
+
+@pytest.mark.django_db
+def test_iter_csv_chunks(applicant_export_service):
+    applicant_export_service.CHUNK_SIZE = 1
+    chunks = list(applicant_export_service.iter_csv_chunks())
+
+    # one chunk per row, the first one starting with the byte order mark
+    assert len(chunks) == len(applicant_export_service.get_rows())
+    assert chunks[0].startswith(codecs.BOM_UTF8)
+    assert b"".join(chunks).decode("utf-8-sig") == (
+        applicant_export_service.get_csv_string()
+    )
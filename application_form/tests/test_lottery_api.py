@@ -1,14 +1,19 @@
 from datetime import timedelta
 
 import pytest
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 
 from apartment.tests.factories import ApartmentDocumentFactory
 from apartment_application_service.settings import METADATA_HANDLER_INFORMATION
-from application_form.enums import ApplicationType
-from application_form.models import ApartmentReservation, LotteryEvent
+from application_form.enums import (
+    ApartmentReservationState,
+    ApplicationType,
+    LotteryJobState,
+)
+from application_form.models import ApartmentReservation, LotteryEvent, LotteryJob
 from application_form.services.queue import add_application_to_queues
 from application_form.tests.factories import ApplicationFactory
 
@@ -98,7 +103,7 @@ def test_execute_hitas_lottery_for_project_post(
     response = sales_ui_salesperson_api_client.post(
         reverse("application_form:execute_lottery_for_project"), data, format="json"
     )
-    assert response.status_code == status.HTTP_200_OK
+    assert response.status_code == status.HTTP_202_ACCEPTED
 
 
 @pytest.mark.django_db
@@ -145,7 +150,7 @@ def test_execute_haso_lottery_for_project_post(
     response = sales_ui_salesperson_api_client.post(
         reverse("application_form:execute_lottery_for_project"), data, format="json"
     )
-    assert response.status_code == status.HTTP_200_OK
+    assert response.status_code == status.HTTP_202_ACCEPTED
 
 
 @pytest.mark.django_db
@@ -187,7 +192,7 @@ def test_execute_lottery_generate_metadata(
     response = sales_ui_salesperson_api_client.post(
         reverse("application_form:execute_lottery_for_project"), data, format="json"
     )
-    assert response.status_code == status.HTTP_200_OK
+    assert response.status_code == status.HTTP_202_ACCEPTED
 
     lottery_event = LotteryEvent.objects.get(apartment_uuid=apartment.uuid)
     assert (
@@ -201,3 +206,92 @@ def test_execute_lottery_generate_metadata(
         assert (
             r.handler == sales_ui_salesperson_api_client.user.profile_or_user_full_name
         )
+
+
+@pytest.mark.django_db
+def test_execute_lottery_for_project_returns_lottery_job(
+    sales_ui_salesperson_api_client, elastic_hitas_project_application_end_time_finished
+):
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+
+    data = {"project_uuid": project_uuid}
+    with override_settings(LOTTERY_JOBS_RUN_INLINE=False):
+        response = sales_ui_salesperson_api_client.post(
+            reverse("application_form:execute_lottery_for_project"),
+            data,
+            format="json",
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.data["id"]
+        assert response.data["state"] == LotteryJobState.PENDING.value
+        assert not any(item["processed"] for item in response.data["apartments"])
+
+        # A retried request does not start another lottery
+        response = sales_ui_salesperson_api_client.post(
+            reverse("application_form:execute_lottery_for_project"),
+            data,
+            format="json",
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data["id"] == job_id
+    assert LotteryJob.objects.count() == 1
+    assert not LotteryEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_lottery_job_status(
+    sales_ui_salesperson_api_client, elastic_hitas_project_application_end_time_finished
+):
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+
+    app = ApplicationFactory(type=ApplicationType.HITAS)
+    app.application_apartments.create(apartment_uuid=apartment.uuid, priority_number=0)
+    add_application_to_queues(app)
+
+    data = {"project_uuid": project_uuid}
+    response = sales_ui_salesperson_api_client.post(
+        reverse("application_form:execute_lottery_for_project"), data, format="json"
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+    response = sales_ui_salesperson_api_client.get(
+        reverse(
+            "application_form:lottery_job_status",
+            kwargs={"lottery_job_id": response.data["id"]},
+        ),
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["state"] == LotteryJobState.SUCCEEDED.value
+    assert response.data["started_at"] is not None
+    assert response.data["finished_at"] is not None
+    assert sorted(
+        str(item["apartment_uuid"]) for item in response.data["apartments"]
+    ) == [str(apartment.uuid)]
+    assert all(item["processed"] for item in response.data["apartments"])
+    assert (
+        ApartmentReservation.objects.get(application_apartment__application=app).state
+        == ApartmentReservationState.RESERVED
+    )
+
+
+@pytest.mark.django_db
+def test_lottery_job_status_not_found(sales_ui_salesperson_api_client):
+    response = sales_ui_salesperson_api_client.get(
+        reverse("application_form:lottery_job_status", kwargs={"lottery_job_id": 1}),
+        format="json",
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_lottery_job_status_unauthorized(user_api_client):
+    response = user_api_client.get(
+        reverse("application_form:lottery_job_status", kwargs={"lottery_job_id": 1}),
+        format="json",
+    )
+    assert response.status_code == 403
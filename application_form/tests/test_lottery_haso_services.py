@@ -1,3 +1,4 @@
+import random
 import uuid
 from types import SimpleNamespace
 
@@ -6,6 +7,7 @@ from django.db import transaction
 from pytest import fixture, mark
 from rest_framework.exceptions import ValidationError
 
+from apartment.elastic.queries import get_apartment_uuids
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.enums import (
     ApartmentReservationCancellationReason,
@@ -14,6 +16,9 @@ from application_form.enums import (
 )
 from application_form.models.lottery import LotteryEvent, LotteryEventResult
 from application_form.models.reservation import ApartmentReservation
+from application_form.services.application import (
+    _reserve_haso_apartment as _reserve_haso_apartment_with_queries,
+)
 from application_form.services.application import (
     cancel_reservation,
     get_ordered_applications,
@@ -593,3 +598,70 @@ def test_winning_does_not_cancel_higher_priority_applications(
     assert app_apt1.apartment_reservation.state == ApartmentReservationState.RESERVED
     assert app_apt2.apartment_reservation.state == ApartmentReservationState.SUBMITTED
     assert app_apt3.apartment_reservation.state == ApartmentReservationState.RESERVED
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _create_random_haso_applications(rng: random.Random, apartment_uuids):
+    for _ in range(8):
+        application = ApplicationFactory(
+            type=ApplicationType.HASO,
+            # A narrow range of numbers, so that there are ties to review
+            right_of_residence=rng.randint(1, 4),
+            right_of_residence_is_old_batch=rng.random() < 0.5,
+        )
+        # The apartments are created in priority order
+        for priority_number, apartment_uuid in enumerate(
+            rng.sample(apartment_uuids, rng.randint(1, len(apartment_uuids)))
+        ):
+            application.application_apartments.create(
+                apartment_uuid=apartment_uuid, priority_number=priority_number
+            )
+        add_application_to_queues(application)
+    for apartment_uuid in apartment_uuids:
+        if rng.random() < 0.2:
+            create_late_reservation(
+                {
+                    "apartment_uuid": apartment_uuid,
+                    "customer": CustomerFactory(right_of_residence=None),
+                }
+            )
+
+
+def _reservation_outcome(apartment_uuids):
+    return {
+        reservation.pk: (
+            reservation.state,
+            reservation.queue_position,
+            reservation.queue_position_before_cancelation,
+            reservation.list_position,
+        )
+        for reservation in ApartmentReservation.objects.filter(
+            apartment_uuid__in=apartment_uuids
+        )
+    }
+
+
+@mark.django_db
+@mark.parametrize("seed", range(10))
+def test_distribute_haso_apartments_matches_reserving_apartments_one_by_one(
+    seed, elastic_haso_project_with_5_apartments
+):
+    project_uuid, apartments = elastic_haso_project_with_5_apartments
+    apartment_uuids = [str(apartment.uuid) for apartment in apartments]
+    _create_random_haso_applications(random.Random(seed), apartment_uuids)
+
+    # Resolve the winners apartment by apartment with database queries, like the
+    # lottery used to, and roll back the results
+    with pytest.raises(_Rollback):
+        with transaction.atomic():
+            for apartment_uuid in get_apartment_uuids(project_uuid):
+                _reserve_haso_apartment_with_queries(apartment_uuid)
+            expected = _reservation_outcome(apartment_uuids)
+            raise _Rollback()
+
+    _distribute_haso_apartments(project_uuid)
+
+    assert _reservation_outcome(apartment_uuids) == expected
@@ -1,7 +1,11 @@
 from unittest.mock import patch
 
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from pytest import fixture, mark
 
+from apartment.elastic.documents import ApartmentDocument
 from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.enums import (
     ApartmentReservationCancellationReason,
@@ -15,10 +19,16 @@ from application_form.services.application import (
     get_ordered_applications,
 )
 from application_form.services.lottery.hitas import _distribute_hitas_apartments
+from application_form.services.lottery.machine import distribute_apartments
+from application_form.services.lottery.report import (
+    collect_lottery_report,
+    lottery_phase,
+)
 from application_form.services.queue import add_application_to_queues
 from application_form.services.reservation import create_late_reservation
 from application_form.tests.factories import ApplicationFactory
 from customer.tests.factories import CustomerFactory
+from users.tests.factories import UserFactory
 
 
 @fixture(autouse=True)
@@ -534,3 +544,134 @@ def test_winning_low_priority_apartment_does_not_cancel_higher_priority_applicat
     assert (
         single_high.apartment_reservation.state == ApartmentReservationState.SUBMITTED
     )
+
+
+@mark.django_db
+def test_lottery_reserves_again_when_reserved_winner_is_canceled(
+    elastic_hitas_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_hitas_project_with_5_apartments
+    first_apartment_uuid = apartments[0].uuid
+    second_apartment_uuid = apartments[1].uuid
+
+    # Both applications are first in the queue of their lower priority apartment
+    app1 = ApplicationFactory(type=ApplicationType.HITAS, has_children=False)
+    app1_low = app1.application_apartments.create(
+        apartment_uuid=first_apartment_uuid, priority_number=1
+    )
+    app1_high = app1.application_apartments.create(
+        apartment_uuid=second_apartment_uuid, priority_number=0
+    )
+    add_application_to_queues(app1)
+    app2 = ApplicationFactory(type=ApplicationType.HITAS, has_children=False)
+    app2_high = app2.application_apartments.create(
+        apartment_uuid=first_apartment_uuid, priority_number=0
+    )
+    app2_low = app2.application_apartments.create(
+        apartment_uuid=second_apartment_uuid, priority_number=1
+    )
+    add_application_to_queues(app2)
+
+    with patch("secrets.randbelow", return_value=0):
+        _distribute_hitas_apartments(project_uuid)
+
+    for app_apartment in [app1_low, app1_high, app2_high, app2_low]:
+        app_apartment.refresh_from_db()
+
+    assert list(get_ordered_applications(first_apartment_uuid)) == [app2]
+    assert list(get_ordered_applications(second_apartment_uuid)) == [app1]
+    for app_apartment in [app1_high, app2_high]:
+        reservation = app_apartment.apartment_reservation
+        assert reservation.state == ApartmentReservationState.RESERVED
+        assert reservation.queue_position == 1
+    for app_apartment in [app1_low, app2_low]:
+        reservation = app_apartment.apartment_reservation
+        assert reservation.state == ApartmentReservationState.CANCELED
+        assert reservation.queue_position is None
+        assert reservation.queue_change_events.count() == 2
+        assert (
+            reservation.state_change_events.last().cancellation_reason
+            == ApartmentReservationCancellationReason.LOWER_PRIORITY
+        )
+    assert app1_low.apartment_reservation.queue_position_before_cancelation == 1
+    assert app2_low.apartment_reservation.queue_position_before_cancelation == 2
+
+
+class _Rollback(Exception):
+    pass
+
+
+@mark.django_db
+def test_lottery_query_count_does_not_grow_with_applications(
+    elastic_hitas_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_hitas_project_with_5_apartments
+
+    query_counts = []
+    for application_count in (2, 10):
+        with pytest.raises(_Rollback):
+            with transaction.atomic():
+                for _ in range(application_count):
+                    app = ApplicationFactory(type=ApplicationType.HITAS)
+                    for priority_number, apartment in enumerate(apartments):
+                        app.application_apartments.create(
+                            apartment_uuid=apartment.uuid,
+                            priority_number=priority_number,
+                        )
+                    add_application_to_queues(app)
+                user = UserFactory()
+                with CaptureQueriesContext(connection) as queries:
+                    _distribute_hitas_apartments(project_uuid, user)
+                query_counts.append(len(queries))
+                assert LotteryEventResult.objects.filter(
+                    event__apartment_uuid__in=[
+                        apartment.uuid for apartment in apartments
+                    ]
+                ).count() == application_count * len(apartments)
+                raise _Rollback()
+
+    assert query_counts[0] == query_counts[1]
+
+
+@mark.django_db
+def test_lottery_dry_run_is_rolled_back_and_reports_phases(
+    elastic_hitas_project_application_end_time_finished,
+):
+    project_uuid, apartment = elastic_hitas_project_application_end_time_finished
+    apps = [ApplicationFactory(type=ApplicationType.HITAS) for _ in range(3)]
+    for app in apps:
+        app.application_apartments.create(
+            apartment_uuid=apartment.uuid, priority_number=0
+        )
+        add_application_to_queues(app)
+
+    report = distribute_apartments(project_uuid, dry_run=True)
+
+    assert not LotteryEvent.objects.filter(apartment_uuid=apartment.uuid).exists()
+    assert {
+        reservation.state
+        for reservation in ApartmentReservation.objects.filter(
+            apartment_uuid=apartment.uuid
+        )
+    } == {ApartmentReservationState.SUBMITTED}
+    assert {"shuffle", "order_persistence", "reservation"} <= set(report.phases)
+    assert report.phases["shuffle"].es_calls >= 1
+    assert report.phases["order_persistence"].queries > 0
+    assert report.phases["reservation"].queries > 0
+    assert report.total.seconds > 0
+
+
+def test_lottery_report_counts_elasticsearch_searches(
+    elastic_hitas_project_application_end_time_finished,
+):
+    with collect_lottery_report() as report:
+        with lottery_phase("shuffle"):
+            ApartmentDocument.search().execute()
+            list(ApartmentDocument.search().scan())
+        ApartmentDocument.search().execute()
+
+    assert report.phases["shuffle"].es_calls == 2
+    assert report.phases["other"].es_calls == 1
+    # Searches outside of a report are not counted anywhere
+    ApartmentDocument.search().execute()
+    assert report.total.es_calls == 3
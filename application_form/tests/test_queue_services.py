@@ -1,7 +1,13 @@
 import logging
+import random
+import threading
+import uuid
 from unittest.mock import Mock
 
+from django.db import connection
 from django.db.models import QuerySet
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from pytest import mark, raises
 
 from apartment.elastic.queries import get_apartment
@@ -12,12 +18,17 @@ from application_form.enums import (
     ApartmentReservationState,
     ApplicationType,
 )
+from application_form.models import Application
 from application_form.models.reservation import (
     ApartmentQueueChangeEvent,
     ApartmentReservation,
+    ApartmentReservationStateChangeEvent,
 )
 from application_form.services.application import get_ordered_applications
+from application_form.services.constants import LIST_POSITION_GAP
 from application_form.services.queue import (
+    _calculate_queue_positions,
+    _free_list_position_before,
     add_application_to_queues,
     remove_queue_gaps,
     remove_reservation_from_queue,
@@ -27,6 +38,7 @@ from application_form.tests.factories import (
     ApartmentReservationFactory,
     ApplicationFactory,
 )
+from application_form.utils import lock_apartments
 from customer.tests.factories import CustomerFactory
 
 
@@ -276,6 +288,176 @@ def test_adding_application_to_queue_creates_change_event(
     ).exists()
 
 
+def _apply_to_apartments(application, apartment_uuids):
+    for priority_number, apartment_uuid in enumerate(apartment_uuids, 1):
+        application.application_apartments.create(
+            apartment_uuid=apartment_uuid, priority_number=priority_number
+        )
+
+
+@mark.django_db
+def test_add_hitas_application_to_multiple_queues(elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuids = [apartment.uuid for apartment in apartments]
+    # Give the first two apartments queues of different lengths
+    for count, apartment_uuid in [(2, apartment_uuids[0]), (1, apartment_uuids[1])]:
+        for _ in range(count):
+            app = ApplicationFactory(type=ApplicationType.HITAS)
+            _apply_to_apartments(app, [apartment_uuid])
+            add_application_to_queues(app)
+
+    application = ApplicationFactory(type=ApplicationType.HITAS)
+    _apply_to_apartments(application, apartment_uuids)
+    add_application_to_queues(application, comment="batch")
+
+    reservations = {
+        str(reservation.apartment_uuid): reservation
+        for reservation in ApartmentReservation.objects.filter(
+            application_apartment__application=application
+        )
+    }
+    expected_positions = [3, 2, 1, 1, 1]
+    for apartment_uuid, position in zip(apartment_uuids, expected_positions):
+        reservation = reservations[str(apartment_uuid)]
+        assert reservation.queue_position == position
+        assert reservation.list_position == position
+        assert reservation.state == ApartmentReservationState.SUBMITTED
+        assert [e.state for e in reservation.state_change_events.all()] == [
+            ApartmentReservationState.SUBMITTED
+        ]
+        assert [(e.type, e.comment) for e in reservation.queue_change_events.all()] == [
+            (ApartmentQueueChangeEventType.ADDED, "batch")
+        ]
+
+
+@mark.django_db
+def test_add_haso_application_to_multiple_queues(elastic_project_with_5_apartments):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuids = [apartment.uuid for apartment in apartments[:3]]
+    existing = [
+        ApplicationFactory(type=ApplicationType.HASO, right_of_residence=1),
+        ApplicationFactory(type=ApplicationType.HASO, right_of_residence=3),
+    ]
+    for app in existing:
+        _apply_to_apartments(app, apartment_uuids[:2])
+        add_application_to_queues(app)
+
+    application = ApplicationFactory(type=ApplicationType.HASO, right_of_residence=2)
+    _apply_to_apartments(application, apartment_uuids)
+    add_application_to_queues(application)
+
+    for apartment_uuid in apartment_uuids[:2]:
+        assert list(get_ordered_applications(apartment_uuid)) == [
+            existing[0],
+            application,
+            existing[1],
+        ]
+        assert list(
+            ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
+            .order_by("list_position")
+            .values_list("list_position", "queue_position")
+        ) == [(1, 1), (2, 2), (3, 3)]
+    assert list(get_ordered_applications(apartment_uuids[2])) == [application]
+
+
+@mark.django_db
+def test_add_application_to_queues_query_count_does_not_grow(
+    elastic_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuids = [apartment.uuid for apartment in apartments]
+    for apartment_uuid in apartment_uuids:
+        app = ApplicationFactory(type=ApplicationType.HASO)
+        _apply_to_apartments(app, [apartment_uuid])
+        add_application_to_queues(app)
+
+    query_counts = []
+    for apartment_count in [1, len(apartment_uuids)]:
+        application = ApplicationFactory(type=ApplicationType.HASO)
+        _apply_to_apartments(application, apartment_uuids[:apartment_count])
+        application = Application.objects.get(pk=application.pk)
+        with CaptureQueriesContext(connection) as queries:
+            add_application_to_queues(application)
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]
+
+
+def _reference_queue_position(apartment_uuid, application):
+    # The original implementation of HASO queue position calculation, which loads
+    # every reservation and compares the ordering numbers in Python
+    all_reservations = ApartmentReservation.objects.active().filter(
+        apartment_uuid=apartment_uuid
+    )
+    reservations = all_reservations.filter(
+        application_apartment__application__submitted_late=application.submitted_late
+    ).order_by("queue_position")
+    offered_or_sold_states = [
+        ApartmentReservationState.OFFER_ACCEPTED,
+        ApartmentReservationState.OFFERED,
+        ApartmentReservationState.SOLD,
+    ]
+    for reservation in reservations:
+        other_application = reservation.application_apartment.application
+        if (
+            application.right_of_residence_ordering_number
+            < other_application.right_of_residence_ordering_number
+            and reservation.state not in offered_or_sold_states
+        ):
+            return reservation.queue_position
+    return all_reservations.count() + 1
+
+
+@mark.django_db
+@mark.parametrize("seed", range(5))
+def test_calculate_queue_positions_matches_reference(
+    seed, elastic_project_with_5_apartments
+):
+    rng = random.Random(seed)
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuids = [apartment.uuid for apartment in apartments[:3]]
+    states = list(ApartmentReservationState)
+
+    for apartment_uuid in apartment_uuids[:2]:
+        queue_position = 0
+        for list_position in range(1, rng.randint(5, 25)):
+            application = ApplicationFactory(
+                type=ApplicationType.HASO,
+                right_of_residence=rng.randint(1, 50),
+                right_of_residence_is_old_batch=rng.choice([True, False]),
+                submitted_late=rng.random() < 0.3,
+            )
+            application_apartment = application.application_apartments.create(
+                apartment_uuid=apartment_uuid, priority_number=1
+            )
+            state = rng.choice(states)
+            if state != ApartmentReservationState.CANCELED:
+                queue_position += 1
+            ApartmentReservation.objects.create(
+                customer=application.customer,
+                apartment_uuid=apartment_uuid,
+                application_apartment=application_apartment,
+                list_position=list_position,
+                queue_position=(
+                    queue_position
+                    if state != ApartmentReservationState.CANCELED
+                    else None
+                ),
+                state=state,
+            )
+
+    for _ in range(20):
+        application = Application(
+            right_of_residence=rng.randint(1, 50),
+            right_of_residence_is_old_batch=rng.choice([True, False]),
+            submitted_late=rng.random() < 0.3,
+        )
+        assert _calculate_queue_positions(application, apartment_uuids) == {
+            str(apartment_uuid): _reference_queue_position(apartment_uuid, application)
+            for apartment_uuid in apartment_uuids
+        }
+
+
 @mark.django_db
 def test_remove_application_from_queue(elastic_project_with_5_apartments):
     # An application should be removed from the queue and all remaining applications
@@ -483,3 +665,268 @@ def test_remove_queue_gaps(elastic_project_with_5_apartments, application_type):
 
         next_qp = reservation_queue_positions[idx + 1]
         assert next_qp == qp + 1
+
+
+@mark.django_db
+def test_remove_queue_gaps_only_creates_events_for_moved_reservations():
+    apartment = ApartmentDocumentFactory()
+    reservations = [
+        ApartmentReservationFactory(
+            apartment_uuid=apartment.uuid,
+            state=ApartmentReservationState.SUBMITTED,
+            queue_position=position,
+            list_position=position,
+        )
+        for position in [1, 2, 4, 5]
+    ]
+    last_event_id = ApartmentReservationStateChangeEvent.objects.last().id
+
+    remove_queue_gaps(apartment)
+
+    assert list(
+        ApartmentReservation.objects.filter(apartment_uuid=apartment.uuid)
+        .order_by("queue_position")
+        .values_list("pk", "queue_position", "list_position")
+    ) == [
+        (reservation.pk, position, position)
+        for position, reservation in enumerate(reservations, 1)
+    ]
+    new_events = ApartmentReservationStateChangeEvent.objects.filter(
+        id__gt=last_event_id
+    )
+    assert sorted(new_events.values_list("reservation_id", "state")) == [
+        (reservations[2].pk, ApartmentReservationState.SUBMITTED),
+        (reservations[3].pk, ApartmentReservationState.SUBMITTED),
+    ]
+
+
+@mark.django_db
+def test_remove_queue_gaps_query_count_does_not_depend_on_queue_length():
+    query_counts = []
+    for queue_length in [3, 15]:
+        apartment = ApartmentDocumentFactory()
+        for position in range(1, queue_length + 1):
+            ApartmentReservationFactory(
+                apartment_uuid=apartment.uuid,
+                queue_position=position * 2,
+                list_position=position * 2,
+            )
+        with CaptureQueriesContext(connection) as queries:
+            remove_queue_gaps(apartment)
+        query_counts.append(len(queries))
+
+    assert query_counts[0] == query_counts[1]
+
+
+@mark.django_db
+@override_settings(SPARSE_LIST_POSITIONS=True)
+def test_sparse_list_positions_hitas_are_appended_with_gaps(
+    elastic_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuid = apartments[0].uuid
+    for _ in range(3):
+        app = ApplicationFactory(type=ApplicationType.HITAS)
+        app.application_apartments.create(
+            apartment_uuid=apartment_uuid, priority_number=1
+        )
+        add_application_to_queues(app)
+
+    assert list(
+        ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
+        .order_by("list_position")
+        .values_list("list_position", "queue_position")
+    ) == [
+        (LIST_POSITION_GAP, 1),
+        (LIST_POSITION_GAP * 2, 2),
+        (LIST_POSITION_GAP * 3, 3),
+    ]
+
+
+@mark.django_db
+@override_settings(SPARSE_LIST_POSITIONS=True)
+def test_sparse_list_positions_haso_insert_does_not_shift_list_positions(
+    elastic_project_with_5_apartments,
+):
+    project_uuid, apartments = elastic_project_with_5_apartments
+    apartment_uuid = apartments[0].uuid
+    apps = []
+    for right_of_residence in [5, 1, 3, 2, 4]:
+        app = ApplicationFactory(
+            type=ApplicationType.HASO, right_of_residence=right_of_residence
+        )
+        app.application_apartments.create(
+            apartment_uuid=apartment_uuid, priority_number=1
+        )
+        list_positions_before = dict(
+            ApartmentReservation.objects.filter(
+                apartment_uuid=apartment_uuid
+            ).values_list("pk", "list_position")
+        )
+        add_application_to_queues(app)
+        apps.append(app)
+
+        # Existing reservations keep their list positions
+        for pk, list_position in list_positions_before.items():
+            assert ApartmentReservation.objects.get(pk=pk).list_position == (
+                list_position
+            )
+
+    expected_order = sorted(apps, key=lambda app: app.right_of_residence)
+    assert list(get_ordered_applications(apartment_uuid)) == expected_order
+    reservations = (
+        ApartmentReservation.objects.filter(apartment_uuid=apartment_uuid)
+        .with_list_rank()
+        .order_by("list_position")
+    )
+    assert [r.application_apartment.application for r in reservations] == (
+        expected_order
+    )
+    assert [(r.list_rank, r.queue_position) for r in reservations] == [
+        (position, position) for position in range(1, 6)
+    ]
+
+
+@mark.django_db
+@override_settings(SPARSE_LIST_POSITIONS=True)
+def test_free_list_position_before_respaces_when_there_is_no_gap():
+    apartment_uuid = uuid.uuid4()
+    reservations = [
+        ApartmentReservationFactory(
+            apartment_uuid=apartment_uuid, list_position=list_position
+        )
+        for list_position in [1, 2, 3]
+    ]
+
+    assert _free_list_position_before(apartment_uuid, 10) == 6
+    assert _free_list_position_before(apartment_uuid, None) == 3 + LIST_POSITION_GAP
+    list_position = _free_list_position_before(apartment_uuid, 2)
+
+    assert [
+        ApartmentReservation.objects.get(pk=r.pk).list_position for r in reservations
+    ] == [LIST_POSITION_GAP, LIST_POSITION_GAP * 2, LIST_POSITION_GAP * 3]
+    assert list_position == LIST_POSITION_GAP + LIST_POSITION_GAP // 2
+
+
+@mark.django_db(transaction=True)
+def test_advisory_locks_only_block_the_same_apartment():
+    apartment_a, apartment_b = uuid.uuid4(), uuid.uuid4()
+    holding_a = threading.Event()
+    release_a = threading.Event()
+    acquired_a_again = threading.Event()
+
+    def hold_lock(apartment_uuid, acquired, release=None):
+        try:
+            with lock_apartments([apartment_uuid]):
+                acquired.set()
+                if release:
+                    release.wait(timeout=10)
+        finally:
+            connection.close()
+
+    holder = threading.Thread(
+        target=hold_lock, args=(apartment_a, holding_a, release_a)
+    )
+    holder.start()
+    assert holding_a.wait(timeout=10)
+
+    # A different apartment can be locked while A is being held
+    acquired_b = threading.Event()
+    other = threading.Thread(target=hold_lock, args=(apartment_b, acquired_b))
+    other.start()
+    assert acquired_b.wait(timeout=10)
+
+    # ...but A cannot until the holder's transaction ends
+    waiter = threading.Thread(target=hold_lock, args=(apartment_a, acquired_a_again))
+    waiter.start()
+    assert not acquired_a_again.wait(timeout=0.5)
+    release_a.set()
+    assert acquired_a_again.wait(timeout=10)
+
+    for thread in (holder, other, waiter):
+        thread.join()
+
+
+def _hold_apartment_lock(apartment_uuid, holding, release):
+    try:
+        with lock_apartments([apartment_uuid]):
+            holding.set()
+            release.wait(timeout=10)
+    finally:
+        connection.close()
+
+
+def _add_to_queues_in_thread(application, errors, barrier=None, done=None):
+    try:
+        if barrier:
+            barrier.wait(timeout=10)
+        add_application_to_queues(application)
+        if done:
+            done.set()
+    except Exception as e:  # pragma: no cover
+        errors.append(e)
+    finally:
+        connection.close()
+
+
+@mark.django_db(transaction=True)
+def test_concurrent_additions_keep_each_queue_contiguous():
+    apartment_a, apartment_b = uuid.uuid4(), uuid.uuid4()
+    applications_to_a = []
+    for _ in range(6):
+        application = ApplicationFactory(type=ApplicationType.HITAS)
+        application.application_apartments.create(
+            apartment_uuid=apartment_a, priority_number=1
+        )
+        applications_to_a.append(application)
+    application_to_b = ApplicationFactory(type=ApplicationType.HITAS)
+    application_to_b.application_apartments.create(
+        apartment_uuid=apartment_b, priority_number=1
+    )
+    holding_a, release_a, added_to_b = (
+        threading.Event(),
+        threading.Event(),
+        threading.Event(),
+    )
+    start = threading.Barrier(len(applications_to_a))
+    errors = []
+
+    holder = threading.Thread(
+        target=_hold_apartment_lock, args=(apartment_a, holding_a, release_a)
+    )
+    holder.start()
+    assert holding_a.wait(timeout=10)
+    threads = [
+        threading.Thread(
+            target=_add_to_queues_in_thread, args=(application, errors, start)
+        )
+        for application in applications_to_a
+    ]
+    for thread in threads:
+        thread.start()
+
+    # The queue of B is not serialized behind the additions waiting for A
+    other = threading.Thread(
+        target=_add_to_queues_in_thread,
+        args=(application_to_b, errors, None, added_to_b),
+    )
+    other.start()
+    assert added_to_b.wait(timeout=10)
+    assert not ApartmentReservation.objects.filter(apartment_uuid=apartment_a).exists()
+
+    release_a.set()
+    for thread in [holder, other, *threads]:
+        thread.join(timeout=30)
+    assert not errors
+
+    reservations = ApartmentReservation.objects.filter(apartment_uuid=apartment_a)
+    assert sorted(r.queue_position for r in reservations) == list(
+        range(1, len(applications_to_a) + 1)
+    )
+    assert len({r.list_position for r in reservations}) == len(applications_to_a)
+    assert {r.application_apartment.application_id for r in reservations} == {
+        application.id for application in applications_to_a
+    }
+    assert (
+        ApartmentReservation.objects.get(apartment_uuid=apartment_b).queue_position == 1
+    )
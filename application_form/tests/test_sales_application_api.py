@@ -12,7 +12,11 @@ from apartment_application_service.settings import (
     METADATA_HITAS_PROCESS_NUMBER,
 )
 from application_form.enums import ApplicationArrivalMethod, ApplicationType
-from application_form.models import ApartmentReservation, LotteryEvent
+from application_form.models import (
+    ApartmentReservation,
+    ApartmentReservationStateChangeEvent,
+    LotteryEvent,
+)
 from application_form.models.application import Application
 from application_form.tests.conftest import create_application_data, generate_apartments
 from application_form.tests.utils import assert_profile_match_data
@@ -458,3 +462,65 @@ def test_sale_application_post_generate_metadata(
         + data["additional_applicant"]["last_name"],
     )
     assert application.method_of_arrival == ApplicationArrivalMethod.POST
+
+
+@pytest.mark.django_db
+def test_sales_application_bulk_post(
+    drupal_salesperson_api_client, elasticsearch
+):  # noqa: F811 E501
+    customer_profile = ProfileFactory()
+    drupal_salesperson_api_client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {_create_token(drupal_salesperson_api_client.user.profile)}"  # noqa: E501
+    )
+    apartments = generate_apartments(
+        elasticsearch,
+        5,
+        {"project_application_end_time": timezone.now() + timedelta(days=1)},
+    )
+    items = []
+    for _ in range(2):
+        data = create_application_data(
+            customer_profile, num_applicants=1, apartments=apartments
+        )
+        data["profile"] = customer_profile.id
+        items.append(data)
+    invalid = create_application_data(
+        customer_profile, num_applicants=1, apartments=apartments
+    )
+    invalid["profile"] = customer_profile.id
+    del invalid["apartments"]
+    duplicate = {**items[0]}
+    items += [invalid, duplicate]
+
+    response = drupal_salesperson_api_client.post(
+        reverse("application_form:sales-application-bulk"), items, format="json"
+    )
+
+    assert response.status_code == 207
+    assert [result["status"] for result in response.data] == [201, 201, 400, 400]
+    assert [result["application_uuid"] for result in response.data] == [
+        item["application_uuid"] for item in items
+    ]
+    assert "apartments" in response.data[2]["errors"]
+    assert "application_uuid" in response.data[3]["errors"]
+
+    applications = Application.objects.filter(
+        external_uuid__in=[item["application_uuid"] for item in items]
+    )
+    assert applications.count() == 2
+    # Both applications belong to the same customer
+    assert len({application.customer_id for application in applications}) == 1
+    assert Customer.objects.filter(primary_profile=customer_profile).count() == 1
+    assert ApartmentReservation.objects.filter(
+        application_apartment__application__in=applications
+    ).count() == 2 * len(apartments)
+    for application in applications:
+        assert application.method_of_arrival == ApplicationArrivalMethod.POST
+        assert application.applicants.count() == 1
+    # The salesperson who sent the applications is recorded as the creator
+    assert {
+        event.user
+        for event in ApartmentReservationStateChangeEvent.objects.filter(
+            reservation__application_apartment__application__in=applications
+        )
+    } == {drupal_salesperson_api_client.user}
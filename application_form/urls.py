@@ -5,10 +5,12 @@ from application_form.api.sales.views import (
     apartment_states,
     ApartmentReservationViewSet,
     execute_lottery_for_project,
+    lottery_job_status,
     OfferViewSet,
     SalesApplicationViewSet,
 )
 from application_form.api.views import (
+    ApplicationIntakeStatusView,
     ApplicationViewSet,
     DeleteApplicationView,
     LatestApplicantInfo,
@@ -54,11 +56,21 @@ urlpatterns = [
         DeleteApplicationView.as_view(),
         name="application-delete",
     ),
+    path(
+        r"applications/intake/<uuid:application_uuid>/",
+        ApplicationIntakeStatusView.as_view(),
+        name="application-intake-status",
+    ),
     path(
         r"sales/execute_lottery_for_project/",
         execute_lottery_for_project,
         name="execute_lottery_for_project",
     ),
+    path(
+        r"sales/lottery_jobs/<int:lottery_job_id>/",
+        lottery_job_status,
+        name="lottery_job_status",
+    ),
     path(
         r"sales/apartment_reservations/<int:apartment_reservation_id>/installments/invoices/",  # noqa: E501
         ApartmentInstallmentInvoiceAPIView.as_view(),
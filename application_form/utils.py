@@ -1,21 +1,34 @@
 import re
+import uuid
 from contextlib import contextmanager
-from typing import Tuple
+from typing import Iterable, Tuple, Union
 
 from django.db import transaction
 from django.db.transaction import get_connection
 
 
-# from https://stackoverflow.com/a/54403001
+def _advisory_lock_key(apartment_uuid: Union[uuid.UUID, str]) -> int:
+    # Postgres advisory locks are keyed by a signed 64-bit integer. A collision only
+    # means that two apartments share a lock, which is harmless.
+    return int.from_bytes(uuid.UUID(str(apartment_uuid)).bytes[:8], "big", signed=True)
+
+
 @contextmanager
-def lock_table(model):
+def lock_apartments(apartment_uuids: Iterable[Union[uuid.UUID, str]]):
+    """Lock the queues of the given apartments until the transaction ends.
+
+    Uses transaction-level advisory locks, so modifications to the queues of other
+    apartments can proceed in parallel. The locks are acquired in a fixed order to
+    avoid deadlocks between transactions locking overlapping sets of apartments.
+    """
+    lock_keys = sorted(
+        {_advisory_lock_key(apartment_uuid) for apartment_uuid in apartment_uuids}
+    )
     with transaction.atomic():
-        cursor = get_connection().cursor()
-        cursor.execute(f"LOCK TABLE {model._meta.db_table}")
-        try:
-            yield
-        finally:
-            cursor.close()
+        with get_connection().cursor() as cursor:
+            for lock_key in lock_keys:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_key])
+        yield
 
 
 def get_apartment_number_sort_tuple(apartment_number: str) -> Tuple[str, int]:
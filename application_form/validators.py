@@ -10,6 +10,7 @@ from apartment.elastic.queries import get_apartment_uuids, get_project
 from apartment.enums import OwnershipType
 from application_form import error_codes
 from application_form.models import Applicant
+from users.blind_index import national_identification_number_index
 
 
 class SSNSuffixValidator:
@@ -89,18 +90,20 @@ class ProjectApplicantValidator:
                 return
 
         apartment_uuids = get_apartment_uuids(project_uuid)
-        # We fetch the project's all DOBs and SSN suffixes first and then check those in
-        # Python to make sure Postgres won't end up decrypting all applicants in the
-        # database, which it seems to prefer and that caused major issues before.
-        project_applicants = list(
-            Applicant.objects.filter(
-                application__application_apartments__apartment_uuid__in=apartment_uuids
-            ).values_list("date_of_birth", "ssn_suffix")
-        )
-
-        for date_of_birth, ssn_suffix in date_of_birth_and_ssn_suffix:
-            if (date_of_birth, ssn_suffix) in project_applicants:
-                raise PermissionDenied(
-                    detail="Applicant(s) have already applied to project.",
-                    code=error_codes.E1001_APPLICANT_HAS_ALREADY_APPLIED,
-                )
+        # The applicants are matched with the blind index of their national
+        # identification number, so Postgres does not have to decrypt any applicants.
+        nin_indexes = [
+            national_identification_number_index(
+                date_of_birth.strftime("%d%m%y") + ssn_suffix
+            )
+            for date_of_birth, ssn_suffix in date_of_birth_and_ssn_suffix
+            if date_of_birth and ssn_suffix
+        ]
+        if Applicant.objects.filter(
+            application__application_apartments__apartment_uuid__in=apartment_uuids,
+            national_identification_number_index__in=nin_indexes,
+        ).exists():
+            raise PermissionDenied(
+                detail="Applicant(s) have already applied to project.",
+                code=error_codes.E1001_APPLICANT_HAS_ALREADY_APPLIED,
+            )
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Callable, Optional, Union
+from typing import Callable, Iterable, Optional, Union
 
 from django.contrib.auth.models import AnonymousUser
 from django.db.models import Model
@@ -37,7 +37,42 @@ def log(
 
     Audit log events are written to the "audit" logger at "INFO" level.
     """
+    AuditLog.objects.create(
+        message=_build_message(actor, operation, target, status, get_time())
+    )
+
+
+def log_many(
+    actor: Optional[Union[Profile, AnonymousUser]],
+    operation: Operation,
+    targets: Iterable[Model],
+    status: Status = Status.SUCCESS,
+    get_time: Callable[[], datetime] = _now,
+):
+    """
+    Write an event per target to the audit log with a single INSERT.
+
+    The events are the same as the ones written by `log`, and they all share the
+    same timestamp.
+    """
     current_time = get_time()
+    AuditLog.objects.bulk_create(
+        [
+            AuditLog(
+                message=_build_message(actor, operation, target, status, current_time)
+            )
+            for target in targets
+        ]
+    )
+
+
+def _build_message(
+    actor: Optional[Union[Profile, AnonymousUser]],
+    operation: Operation,
+    target: Optional[Model],
+    status: Status,
+    current_time: datetime,
+) -> dict:
     profile_id = None
     if actor is None:
         role = Role.SYSTEM
@@ -49,7 +84,7 @@ def log(
     else:
         role = Role.USER
         profile_id = str(actor.pk)
-    message = {
+    return {
         "audit_event": {
             "origin": ORIGIN,
             "status": str(status.value),
@@ -66,7 +101,6 @@ def log(
             },
         },
     }
-    AuditLog.objects.create(message=message)
 
 
 def _get_target_id(instance: Optional[Model]) -> Optional[str]:
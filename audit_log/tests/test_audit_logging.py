@@ -125,6 +125,26 @@ def test_log_current_timestamp(profile):
     assert date_before_logging <= logged_date_from_date_time <= date_after_logging
 
 
+@pytest.mark.django_db
+def test_log_many(fixed_datetime, profile, other_profile):
+    audit_logging.log_many(
+        None, Operation.UPDATE, [profile, other_profile], get_time=fixed_datetime
+    )
+    messages = [entry.message for entry in AuditLog.objects.order_by("id")]
+    assert messages == [
+        {
+            **_common_fields,
+            "audit_event": {
+                **_common_fields["audit_event"],
+                "operation": "UPDATE",
+                "actor": {"role": "SYSTEM", "profile_id": None},
+                "target": {"id": str(target.pk), "type": "Profile"},
+            },
+        }
+        for target in [profile, other_profile]
+    ]
+
+
 @pytest.mark.django_db
 @override_settings(
     ENABLE_SEND_AUDIT_LOG=True,
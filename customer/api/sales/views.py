@@ -1,5 +1,9 @@
+from decimal import Decimal, InvalidOperation
+
 from django.db.models import Q
 from rest_framework import mixins, permissions, viewsets
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
 
 from audit_log.viewsets import AuditLoggingModelViewSet
 from customer.api.sales.serializers import (
@@ -8,6 +12,83 @@ from customer.api.sales.serializers import (
     CustomerSerializer,
 )
 from customer.models import Customer, CustomerComment
+from customer.search import search_customers, SEARCH_ORDERING
+
+
+class CustomerSearchPagination(CursorPagination):
+    """
+    Keyset pagination of the customer search results.
+
+    The cursor holds the rank and the primary key of the customer at the edge of the
+    page. Together they are unique, so a page continues exactly where the previous one
+    ended even when many customers have the same rank.
+
+    The results are paginated only when the client asks for it with the `cursor` or
+    `page_size` parameter, so that clients expecting a plain list keep working.
+    """
+
+    ordering = SEARCH_ORDERING
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_query_param not in request.query_params
+            and self.page_size_query_param not in request.query_params
+        ):
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        if position is not None:
+            rank, pk = self._parse_position(position)
+            if reverse:
+                queryset = queryset.filter(Q(rank__gt=rank) | Q(rank=rank, pk__lt=pk))
+            else:
+                queryset = queryset.filter(Q(rank__lt=rank) | Q(rank=rank, pk__gt=pk))
+        queryset = queryset.order_by(*(("rank", "-pk") if reverse else self.ordering))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        if self.template is not None and (self.has_next or self.has_previous):
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position(self, customer: Customer) -> str:
+        return f"{customer.rank}:{customer.pk}"
+
+    def _parse_position(self, position: str):
+        try:
+            rank, pk = position.split(":")
+            return Decimal(rank), int(pk)
+        except (ValueError, InvalidOperation):
+            raise NotFound(self.invalid_cursor_message)
 
 
 class CustomerViewSet(AuditLoggingModelViewSet):
@@ -17,6 +98,7 @@ class CustomerViewSet(AuditLoggingModelViewSet):
         "primary_profile__last_name", "primary_profile__first_name"
     )
     serializer_class = CustomerSerializer
+    pagination_class = CustomerSearchPagination
     http_method_names = ["get", "post", "put", "head"]  # disable PATCH
 
     def get_queryset(self):
@@ -30,35 +112,17 @@ class CustomerViewSet(AuditLoggingModelViewSet):
                 for value in [first_name, last_name, phone_number, email]
             )
             if search_values_less_than_min_length:
-                return Customer.objects.none()
+                # The empty result still needs the rank for the search ordering
+                return search_customers({}).none()
 
-            queryset = Customer.objects.all().order_by(
-                "primary_profile__last_name",
-                "primary_profile__first_name",
-                "secondary_profile__last_name",
-                "secondary_profile__first_name",
+            return search_customers(
+                {
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "phone_number": phone_number,
+                    "email": email,
+                }
             )
-            if first_name:
-                queryset = queryset.filter(
-                    Q(primary_profile__first_name__icontains=first_name)
-                    | Q(secondary_profile__first_name__icontains=first_name)
-                )
-            if last_name:
-                queryset = queryset.filter(
-                    Q(primary_profile__last_name__icontains=last_name)
-                    | Q(secondary_profile__last_name__icontains=last_name)
-                )
-            if phone_number:
-                queryset = queryset.filter(
-                    Q(primary_profile__phone_number__icontains=phone_number)
-                    | Q(secondary_profile__phone_number__icontains=phone_number)
-                )
-            if email:
-                queryset = queryset.filter(
-                    Q(primary_profile__email__icontains=email)
-                    | Q(secondary_profile__email__icontains=email)
-                )
-            return queryset
         return super().get_queryset()
 
     def get_serializer_class(self):
@@ -0,0 +1,54 @@
+"""
+Search of customers by the names, phone numbers and emails of their profiles.
+
+Each search value is first matched against the profiles, where the trigram indexes
+of the searched fields can be used, and the customers are then found through their
+indexed profile foreign keys. The matches are ranked by their trigram similarity to
+the search values.
+
+The rank is rounded to a fixed-precision decimal, so that together with the primary
+key it is an exact and unique position of a customer in the results, which the
+keyset pagination of the results relies on.
+"""
+
+from typing import Dict
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import DecimalField, FloatField, Q, QuerySet, Value
+from django.db.models.functions import Cast, Greatest
+
+from customer.models import Customer
+from users.models import Profile
+
+SEARCH_FIELDS = ("first_name", "last_name", "phone_number", "email")
+SEARCH_ORDERING = ("-rank", "pk")
+# The rank is a sum of at most four similarities between 0 and 1
+RANK_FIELD = DecimalField(max_digits=7, decimal_places=6)
+
+
+def search_customers(search_values: Dict[str, str]) -> QuerySet:
+    """
+    Return the customers matching all the given search values, keyed by the profile
+    field name. A value matches if either the primary or the secondary profile
+    contains it. The customers are annotated with their relevance as `rank` and
+    ordered by it, and then by their primary key.
+    """
+    queryset = Customer.objects.all()
+    rank = Value(0.0, output_field=FloatField())
+    for field_name in SEARCH_FIELDS:
+        value = search_values.get(field_name)
+        if not value:
+            continue
+        matching_profiles = Profile.objects.filter(
+            **{f"{field_name}__icontains": value}
+        ).values("pk")
+        queryset = queryset.filter(
+            Q(primary_profile__in=matching_profiles)
+            | Q(secondary_profile__in=matching_profiles)
+        )
+        # GREATEST ignores the NULL similarity of a missing secondary profile
+        rank = rank + Greatest(
+            TrigramSimilarity(f"primary_profile__{field_name}", value),
+            TrigramSimilarity(f"secondary_profile__{field_name}", value),
+        )
+    return queryset.annotate(rank=Cast(rank, RANK_FIELD)).order_by(*SEARCH_ORDERING)
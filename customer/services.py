@@ -4,6 +4,7 @@ from typing import Optional, TypedDict
 from django.db import transaction
 
 from customer.models import Customer
+from users.blind_index import national_identification_number_index
 from users.models import Profile
 
 
@@ -46,7 +47,9 @@ def get_or_create_customer_from_profiles(
         # profile's SSN
         customer = Customer.objects.get(
             primary_profile=primary_profile,
-            secondary_profile__national_identification_number=secondary_profile_ssn,
+            secondary_profile__national_identification_number_index=(
+                national_identification_number_index(secondary_profile_ssn)
+            ),
         )
         customer.has_children = has_children
         customer.save()
@@ -426,6 +426,91 @@ def test_get_customer_api_list_with_parameters(sales_ui_salesperson_api_client):
         assert_customer_list_match_data(customers[item["id"]], item)
 
 
+@pytest.mark.django_db
+def test_get_customer_api_list_is_ranked_by_similarity(
+    sales_ui_salesperson_api_client,
+):
+    partial_match = CustomerFactory(
+        primary_profile__first_name="Aaron",
+        primary_profile__last_name="Virtanenkoski",
+        secondary_profile=None,
+    )
+    exact_match = CustomerFactory(
+        primary_profile__first_name="Zoe",
+        primary_profile__last_name="Virtanen",
+        secondary_profile=None,
+    )
+    secondary_match = CustomerFactory(
+        primary_profile__first_name="Bea",
+        primary_profile__last_name="Korhonen",
+        secondary_profile=ProfileFactory(last_name="Virtanen"),
+    )
+    CustomerFactory(primary_profile__last_name="Nieminen", secondary_profile=None)
+
+    response = sales_ui_salesperson_api_client.get(
+        reverse("customer:sales-customer-list"),
+        data={"last_name": "virtanen"},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    ids = [item["id"] for item in response.data]
+    assert set(ids) == {partial_match.id, exact_match.id, secondary_match.id}
+    assert ids[-1] == partial_match.id
+
+
+@pytest.mark.django_db
+def test_get_customer_api_list_with_cursor_pagination(
+    sales_ui_salesperson_api_client,
+):
+    customers = CustomerFactory.create_batch(
+        5, primary_profile__last_name="Mäkinen", secondary_profile=None
+    )
+
+    ids = []
+    url = reverse("customer:sales-customer-list")
+    data = {"last_name": "mäkinen", "page_size": 2}
+    while url:
+        response = sales_ui_salesperson_api_client.get(url, data=data, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data["results"]) <= 2
+        ids += [item["id"] for item in response.data["results"]]
+        url = response.data["next"]
+        data = None
+
+    assert sorted(ids) == sorted(customer.id for customer in customers)
+
+
+@pytest.mark.django_db
+def test_get_customer_api_list_cursor_pagination_goes_back_over_tied_ranks(
+    sales_ui_salesperson_api_client,
+):
+    CustomerFactory.create_batch(
+        5, primary_profile__last_name="Mäkinen", secondary_profile=None
+    )
+    url = reverse("customer:sales-customer-list")
+
+    first_page = sales_ui_salesperson_api_client.get(
+        url, data={"last_name": "mäkinen", "page_size": 2}, format="json"
+    ).data
+    assert first_page["previous"] is None
+    second_page = sales_ui_salesperson_api_client.get(
+        first_page["next"], format="json"
+    ).data
+    response = sales_ui_salesperson_api_client.get(
+        second_page["previous"], format="json"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [item["id"] for item in response.data["results"]] == [
+        item["id"] for item in first_page["results"]
+    ]
+    assert response.data["previous"] is None
+    assert not {item["id"] for item in first_page["results"]} & {
+        item["id"] for item in second_page["results"]
+    }
+
+
 @pytest.mark.django_db
 def test_customer_reservation_ordering(sales_ui_salesperson_api_client):
     project_uuid = uuid.uuid4()
@@ -67,23 +67,30 @@ class InstallmentListSerializer(serializers.ListSerializer):
             instance.type: instance for instance in self.context["old_instances"]
         }
 
-        new_installments = [
-            (
-                self.child.create(
-                    {**new_installment_data, **{"created_at": now, "updated_at": now}}
-                )
-                if not (
-                    old_instance := old_installments_by_type.get(
-                        new_installment_data["type"]
+        model = self.child.Meta.model
+        new_installments = []
+        created_installments = []
+        for new_installment_data in validated_data:
+            if old_instance := old_installments_by_type.get(
+                new_installment_data["type"]
+            ):
+                new_installments.append(
+                    self.child.update(
+                        old_instance,
+                        {**new_installment_data, **{"updated_at": now}},
                     )
                 )
-                else self.child.update(
-                    old_instance,
-                    {**new_installment_data, **{"updated_at": now}},
+            else:
+                installment = model(
+                    **{**new_installment_data, **{"created_at": now, "updated_at": now}}
                 )
-            )
-            for new_installment_data in validated_data
-        ]
+                new_installments.append(installment)
+                created_installments.append(installment)
+
+        # the installments added to the schedule are inserted with a single query
+        model.objects.bulk_create(created_installments)
+        for installment in created_installments:
+            audit_logging.log(self.get_user(), Operation.CREATE, installment)
 
         for old_installment in old_installments_by_type.values():
             if old_installment not in new_installments and is_installment_editable(
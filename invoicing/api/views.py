@@ -1,3 +1,4 @@
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.http import Http404, HttpResponse
 from drf_spectacular.types import OpenApiTypes
@@ -8,7 +9,7 @@ from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apartment.elastic.queries import get_apartment
+from apartment.elastic.queries import get_apartment, get_apartments_by_uuids
 from application_form.models import ApartmentReservation
 from audit_log import audit_logging
 from audit_log.enums import Operation
@@ -134,11 +135,16 @@ class ApartmentInstallmentAddToSapAPIView(APIView):
             raise Http404
 
         # Check that all apartments have a property number
-        for installment in installments:
-            apartment = get_apartment(
-                installment.apartment_reservation.apartment_uuid,
-                include_project_fields=True,
-            )
+        apartment_uuids = set(
+            installments.values_list("apartment_reservation__apartment_uuid", flat=True)
+        )
+        apartments = get_apartments_by_uuids(
+            apartment_uuids, include_project_fields=True
+        )
+        for apartment_uuid in apartment_uuids:
+            apartment = apartments.get(str(apartment_uuid))
+            if apartment is None:
+                raise ObjectDoesNotExist("Apartment does not exist in ElasticSearch.")
             property_number = getattr(apartment, "project_property_number", None)
             if not property_number:
                 raise ValidationError(
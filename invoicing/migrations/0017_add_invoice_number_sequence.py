@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# Continues from the highest invoice number in use, or starts from
+# ApartmentInstallment.MIN_INVOICE_NUMBER
+forwards_sql = """
+CREATE SEQUENCE invoicing_apartmentinstallment_invoice_number_seq
+    MINVALUE 730000001
+    MAXVALUE 999999999
+    OWNED BY invoicing_apartmentinstallment.invoice_number;
+SELECT setval(
+    'invoicing_apartmentinstallment_invoice_number_seq',
+    COALESCE(MAX(invoice_number), 730000001),
+    MAX(invoice_number) IS NOT NULL
+)
+FROM invoicing_apartmentinstallment;
+"""
+
+backwards_sql = """
+DROP SEQUENCE invoicing_apartmentinstallment_invoice_number_seq;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("invoicing", "0016_decrypt_apartmentinstallment"),
+    ]
+
+    operations = [migrations.RunSQL(forwards_sql, backwards_sql)]
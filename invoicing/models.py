@@ -1,11 +1,11 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
-from uuid import uuid4
+from typing import Iterable
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models, transaction
+from django.db import connections, models, router
 from django.db.models import UniqueConstraint
 from django.utils import timezone
 from django.utils.timezone import localdate, now
@@ -68,6 +68,9 @@ class InstallmentBase(models.Model):
         }
 
 
+INVOICE_NUMBER_SEQUENCE = "invoicing_apartmentinstallment_invoice_number_seq"
+
+
 class ApartmentInstallmentQuerySet(models.QuerySet):
     def sending_to_sap_needed(self):
         max_due_date = timezone.localdate() + timedelta(
@@ -82,6 +85,54 @@ class ApartmentInstallmentQuerySet(models.QuerySet):
     def set_sent_to_sap_at(self, dt: datetime = None):
         self.update(sent_to_sap_at=dt or timezone.now())
 
+    def assign_numbers(self, installments: Iterable["ApartmentInstallment"]) -> None:
+        """Give the new installments ids and reference numbers, and the installments
+        without one an invoice number.
+
+        The numbers are reserved from the database sequences with a single query, so
+        concurrent requests never get the same numbers. Numbers reserved in a
+        transaction that is rolled back are not reused.
+        """
+        installments = list(installments)
+        new = [installment for installment in installments if installment.id is None]
+        without_invoice_number = [
+            installment
+            for installment in installments
+            if not installment.invoice_number
+        ]
+        if not new and not without_invoice_number:
+            return
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT "
+                "CASE WHEN n <= %s THEN nextval(pg_get_serial_sequence(%s, 'id')) END, "
+                "CASE WHEN n <= %s THEN nextval(%s) END "
+                "FROM generate_series(1, %s) AS n",
+                [
+                    len(new),
+                    self.model._meta.db_table,
+                    len(without_invoice_number),
+                    INVOICE_NUMBER_SEQUENCE,
+                    max(len(new), len(without_invoice_number)),
+                ],
+            )
+            rows = cursor.fetchall()
+
+        ids = sorted(row[0] for row in rows if row[0] is not None)
+        invoice_numbers = sorted(row[1] for row in rows if row[1] is not None)
+        for installment, invoice_number in zip(without_invoice_number, invoice_numbers):
+            installment.invoice_number = invoice_number
+        for installment, installment_id in zip(new, ids):
+            installment.id = installment_id
+            if not installment.reference_number:
+                installment.reference_number = generate_reference_number(installment_id)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.assign_numbers(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class ApartmentInstallment(InstallmentBase):
     MIN_INVOICE_NUMBER = 730000001
@@ -148,19 +199,6 @@ class ApartmentInstallment(InstallmentBase):
         else:
             return PaymentStatus.OVERPAID
 
-    def _get_next_invoice_number(self):
-        if self.invoice_number:
-            return self.invoice_number
-
-        apartment_installment = (
-            ApartmentInstallment.objects.all().order_by("-invoice_number").first()
-        )
-
-        if apartment_installment:
-            return apartment_installment.invoice_number + 1
-
-        return self.MIN_INVOICE_NUMBER
-
     def set_reference_number(self, force=False):
         if self.reference_number and not force:
             return
@@ -168,26 +206,16 @@ class ApartmentInstallment(InstallmentBase):
         self.reference_number = generate_reference_number(self.id)
         self.save(update_fields=("reference_number",))
 
-    @transaction.atomic
     def save(self, *args, **kwargs):
-        creating = not self.id
-
-        self.invoice_number = self._get_next_invoice_number()
-
-        if creating:
-            generate_reference_number = not self.reference_number
-
-            if generate_reference_number:
-                # set a temporary unique reference number to please the unique
-                # constraint
-                self.reference_number = str(f"TEMP-{uuid4()}")
-
-            super().save(*args, **kwargs)
-
-            if generate_reference_number:
-                self.set_reference_number(force=True)
-        else:
-            super().save(*args, **kwargs)
+        if self.id is None or not self.invoice_number:
+            creating = self.id is None
+            ApartmentInstallment.objects.using(
+                kwargs.get("using") or router.db_for_write(ApartmentInstallment)
+            ).assign_numbers([self])
+            if creating:
+                # the id is already reserved, so there is no row to update
+                kwargs["force_insert"] = True
+        super().save(*args, **kwargs)
 
     def add_to_be_sent_to_sap(self, force=False):
         if self.added_to_be_sent_to_sap_at and not force:
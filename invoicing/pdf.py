@@ -2,16 +2,18 @@ import dataclasses
 import logging
 from datetime import date
 from decimal import Decimal
-from functools import lru_cache
-from typing import ClassVar, Dict, List, Union
-from uuid import UUID
+from typing import ClassVar, Dict, Iterable, List, Union
 
 from django.db.models import QuerySet
 from django.utils import translation
 from django.utils.translation import gettext_lazy as _
 
 from apartment.elastic.documents import ApartmentDocument
-from apartment.elastic.queries import get_apartment, get_project
+from apartment.elastic.queries import (
+    get_apartment,
+    get_apartments_by_uuids,
+    get_project,
+)
 from apartment.enums import OwnershipType
 from apartment_application_service.pdf import create_pdf, PDFData
 from customer.models import Customer
@@ -59,20 +61,57 @@ class InvoicePDFData(PDFData):
 def get_invoice_pdf_data_from_installment(
     installment: ApartmentInstallment,
 ) -> InvoicePDFData:
-    @lru_cache
-    def get_cached_project(project_uuid: UUID):
-        return get_project(project_uuid)
+    return get_invoice_pdf_data_from_installments([installment])[0]
 
-    @lru_cache
-    def get_cached_apartment(apartment_uuid: UUID) -> ApartmentDocument:
-        return get_apartment(apartment_uuid, include_project_fields=True)
 
-    reservation = installment.apartment_reservation
+def get_invoice_pdf_data_from_installments(
+    installments: Union[QuerySet, Iterable[ApartmentInstallment]],
+) -> List[InvoicePDFData]:
+    """Get the invoice data of each installment.
+
+    The apartments of all the installments are fetched with a single search, and each
+    project only once. The customers of a queryset are selected with the installments.
+    """
+    if isinstance(installments, QuerySet):
+        installments = installments.select_related(
+            "apartment_reservation__customer__primary_profile",
+            "apartment_reservation__customer__secondary_profile",
+        )
+    installments = list(installments)
+
+    apartments = get_apartments_by_uuids(
+        (
+            installment.apartment_reservation.apartment_uuid
+            for installment in installments
+        ),
+        include_project_fields=True,
+    )
+    projects: Dict[str, ApartmentDocument] = {}
+
+    invoice_pdf_data_list = []
+    for installment in installments:
+        apartment_uuid = installment.apartment_reservation.apartment_uuid
+        apartment = apartments.get(str(apartment_uuid))
+        if apartment is None:
+            # raises ObjectDoesNotExist like a single lookup would
+            apartment = get_apartment(apartment_uuid, include_project_fields=True)
+        project_uuid = str(apartment.project_uuid)
+        if project_uuid not in projects:
+            projects[project_uuid] = get_project(project_uuid)
+        invoice_pdf_data_list.append(
+            _get_invoice_pdf_data(installment, apartment, projects[project_uuid])
+        )
+    return invoice_pdf_data_list
+
+
+def _get_invoice_pdf_data(
+    installment: ApartmentInstallment,
+    apartment: ApartmentDocument,
+    project: ApartmentDocument,
+) -> InvoicePDFData:
     payer_name_and_address = _get_payer_name_and_address(
         installment.apartment_reservation.customer
     )
-    apartment = get_cached_apartment(reservation.apartment_uuid)
-    project = get_cached_project(apartment.project_uuid)
 
     # override language to Finnish, as the user's browser settings etc.
     # shouldn't affect the printed out PDFs
@@ -113,9 +152,5 @@ def create_invoice_pdf_from_installments(
     installments: Union[QuerySet, List[ApartmentInstallment]],
 ):
 
-    invoice_pdf_data_list = []
-    for installment in installments:
-        invoice_pdf_data = get_invoice_pdf_data_from_installment(installment)
-        invoice_pdf_data_list.append(invoice_pdf_data)
-
+    invoice_pdf_data_list = get_invoice_pdf_data_from_installments(installments)
     return create_pdf(INVOICE_PDF_TEMPLATE_FILE_NAME, invoice_pdf_data_list)
@@ -1,9 +1,12 @@
 from datetime import date
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from freezegun import freeze_time
 
-from invoicing.enums import PaymentStatus
+from application_form.tests.factories import ApartmentReservationFactory
+from invoicing.enums import InstallmentType, PaymentStatus
 from invoicing.models import (
     ApartmentInstallment,
     Payment,
@@ -15,6 +18,7 @@ from invoicing.tests.factories import (
     PaymentFactory,
     ProjectInstallmentTemplateFactory,
 )
+from invoicing.utils import generate_reference_number
 
 
 @pytest.mark.django_db
@@ -31,8 +35,13 @@ def test_apartment_installment_factory_creation():
 
 @pytest.mark.django_db
 def test_apartment_installment_save_invoice_numbers(settings):
-    for i in range(3):
-        expected_invoice_number = ApartmentInstallment.MIN_INVOICE_NUMBER + i
+    # the invoice number sequence is not rolled back between tests
+    first_invoice_number = ApartmentInstallmentFactory.create(
+        invoice_number=None
+    ).invoice_number
+    assert first_invoice_number >= ApartmentInstallment.MIN_INVOICE_NUMBER
+    for i in range(1, 3):
+        expected_invoice_number = first_invoice_number + i
         apartment_installment = ApartmentInstallmentFactory.create(invoice_number=None)
         assert apartment_installment.invoice_number == expected_invoice_number
 
@@ -41,13 +50,61 @@ def test_apartment_installment_save_invoice_numbers(settings):
 def test_apartment_installment_change_year_and_do_not_restart_invoice_numbers(
     settings,
 ):
+    invoice_numbers = []
     for i in range(3):
         with freeze_time(date(2010 + i, 1, 1)):
-            expected_invoice_number = ApartmentInstallment.MIN_INVOICE_NUMBER + i
             apartment_installment = ApartmentInstallmentFactory.create(
                 invoice_number=None
             )
-            assert apartment_installment.invoice_number == expected_invoice_number
+            invoice_numbers.append(apartment_installment.invoice_number)
+    assert invoice_numbers == list(range(invoice_numbers[0], invoice_numbers[0] + 3))
+
+
+@pytest.mark.django_db
+def test_apartment_installment_is_created_with_a_single_insert():
+    reservation = ApartmentReservationFactory()
+    installment = ApartmentInstallmentFactory.build(
+        apartment_reservation=reservation,
+        invoice_number=None,
+        reference_number="",
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        installment.save()
+
+    # one query reserves the numbers, and the installment is inserted with them
+    assert len(queries) == 2
+    assert queries[1]["sql"].startswith("INSERT")
+    installment.refresh_from_db()
+    assert installment.reference_number == generate_reference_number(installment.id)
+    assert installment.invoice_number >= ApartmentInstallment.MIN_INVOICE_NUMBER
+
+
+@pytest.mark.django_db
+def test_apartment_installment_bulk_create_assigns_numbers():
+    reservation = ApartmentReservationFactory()
+    installments = [
+        ApartmentInstallmentFactory.build(
+            apartment_reservation=reservation,
+            type=installment_type,
+            invoice_number=None,
+            reference_number="",
+        )
+        for installment_type in (
+            InstallmentType.PAYMENT_1,
+            InstallmentType.PAYMENT_2,
+            InstallmentType.PAYMENT_3,
+        )
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        ApartmentInstallment.objects.bulk_create(installments)
+
+    assert len(queries) == 2
+    invoice_numbers = [installment.invoice_number for installment in installments]
+    assert invoice_numbers == list(range(invoice_numbers[0], invoice_numbers[0] + 3))
+    for installment in ApartmentInstallment.objects.all():
+        assert installment.reference_number == generate_reference_number(installment.id)
 
 
 @pytest.mark.django_db
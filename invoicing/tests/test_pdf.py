@@ -1,4 +1,8 @@
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import gettext_lazy as _
 
 from apartment.enums import OwnershipType
@@ -6,9 +10,11 @@ from apartment.tests.factories import ApartmentDocumentFactory
 from application_form.tests.factories import ApartmentReservationFactory
 from customer.tests.factories import CustomerFactory
 from invoicing.enums import InstallmentType
+from invoicing.models import ApartmentInstallment
 from invoicing.pdf import (
     _get_payer_name_and_address,
     get_invoice_pdf_data_from_installment,
+    get_invoice_pdf_data_from_installments,
 )
 from invoicing.tests.factories import ApartmentInstallmentFactory
 from users.tests.factories import ProfileFactory
@@ -74,3 +80,36 @@ def test_pdf_payer_name_address_correct():
         f"{customer.primary_profile.postal_code} {customer.primary_profile.city}"
     )
     assert payer_name_address == expected_payer_name_address
+
+
+@pytest.mark.django_db
+def test_invoice_pdf_data_documents_are_fetched_once():
+    first_apartment = ApartmentDocumentFactory(project_contract_rs_bank="Bank")
+    second_apartment = ApartmentDocumentFactory(
+        project_uuid=first_apartment.project_uuid,
+        project_contract_rs_bank="Bank",
+    )
+    for apartment in (first_apartment, second_apartment):
+        reservation = ApartmentReservationFactory(
+            apartment_uuid=apartment.uuid,
+            customer=CustomerFactory(secondary_profile=ProfileFactory()),
+        )
+        for installment_type in (InstallmentType.PAYMENT_1, InstallmentType.PAYMENT_2):
+            ApartmentInstallmentFactory(
+                apartment_reservation=reservation, type=installment_type
+            )
+
+    with patch("invoicing.pdf.get_apartment") as get_apartment, CaptureQueriesContext(
+        connection
+    ) as queries:
+        pdf_data_list = get_invoice_pdf_data_from_installments(
+            ApartmentInstallment.objects.order_by("id")
+        )
+
+    assert len(pdf_data_list) == 4
+    assert not get_apartment.called
+    assert len(queries) == 1
+    assert all(
+        pdf_data.recipient_account_number.startswith("Bank")
+        for pdf_data in pdf_data_list
+    )
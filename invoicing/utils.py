@@ -2,7 +2,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from itertools import cycle
 from typing import Optional, Union
 
-from invoicing.enums import PriceRounding
+from invoicing.enums import InstallmentType, PriceRounding
 
 REFERENCE_NUMBER_PREFIX = "2825"
 
@@ -33,3 +33,18 @@ def generate_reference_number(identifier: Union[int, str]) -> str:
 # from https://docs.python.org/3/library/decimal.html#decimal-faq
 def remove_exponent(d: Decimal) -> Decimal:
     return d.quantize(Decimal(1)) if d == d.to_integral() else d.normalize()
+
+
+def get_reservation_installment(reservation, installment_type: InstallmentType):
+    """Get the installment of the given type of the reservation, or None.
+
+    Goes through `apartment_installments.all()`, so the installments prefetched with
+    `prefetch_related` are used when there are any."""
+    return next(
+        (
+            installment
+            for installment in reservation.apartment_installments.all()
+            if installment.type == installment_type
+        ),
+        None,
+    )
@@ -0,0 +1,21 @@
+import hashlib
+import hmac
+from typing import Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def national_identification_number_index(value: Optional[str]) -> Optional[str]:
+    """
+    Return the blind index of the given national identification number.
+
+    The number itself is stored encrypted, so it cannot be searched with an index.
+    Its keyed hash can, and it does not reveal the number without the key.
+    """
+    if not settings.BLIND_INDEX_KEY:
+        raise ImproperlyConfigured("BLIND_INDEX_KEY must be set.")
+    if not value:
+        return None
+    key = settings.BLIND_INDEX_KEY.encode()
+    return hmac.new(key, value.strip().upper().encode(), hashlib.sha256).hexdigest()
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+from users.blind_index import national_identification_number_index
+
+BACKFILL_CHUNK_SIZE = 1000
+
+
+def backfill_national_identification_number_index(apps, schema_editor):
+    Profile = apps.get_model("users", "Profile")
+    last_pk = None
+    while True:
+        profiles = Profile.objects.order_by("pk").only(
+            "pk", "national_identification_number"
+        )
+        if last_pk is not None:
+            profiles = profiles.filter(pk__gt=last_pk)
+        chunk = list(profiles[:BACKFILL_CHUNK_SIZE])
+        if not chunk:
+            return
+        for profile in chunk:
+            profile.national_identification_number_index = (
+                national_identification_number_index(
+                    profile.national_identification_number
+                )
+            )
+        Profile.objects.bulk_update(chunk, ["national_identification_number_index"])
+        last_pk = chunk[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0024_remove_userkeyvalue_unique_key_value_pairs_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="national_identification_number_index",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                max_length=64,
+                null=True,
+                verbose_name="national identification number index",
+            ),
+        ),
+        migrations.RunPython(
+            backfill_national_identification_number_index, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 14:00
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+
+def _trigram_index(field_name):
+    return django.contrib.postgres.indexes.GinIndex(
+        django.contrib.postgres.indexes.OpClass(
+            django.db.models.functions.text.Upper(
+                django.db.models.functions.comparison.Cast(
+                    field_name, models.TextField()
+                )
+            ),
+            name="gin_trgm_ops",
+        ),
+        name=f"profile_{field_name}_trgm",
+    )
+
+
+class Migration(migrations.Migration):
+    # The indexes are built without locking the profiles table
+    atomic = False
+
+    dependencies = [
+        ("users", "0025_profile_national_identification_number_index"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(model_name="profile", index=_trigram_index("first_name")),
+        AddIndexConcurrently(model_name="profile", index=_trigram_index("last_name")),
+        AddIndexConcurrently(
+            model_name="profile", index=_trigram_index("phone_number")
+        ),
+        AddIndexConcurrently(model_name="profile", index=_trigram_index("email")),
+    ]
@@ -3,13 +3,16 @@ from uuid import uuid4
 
 from django.conf import settings
 from django.contrib import admin
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
-from django.db.models import QuerySet, UUIDField
+from django.db.models import QuerySet, TextField, UUIDField
+from django.db.models.functions import Cast, Upper
 from django.utils.translation import gettext_lazy as _
 from helusers.models import AbstractUser
 from pgcrypto.fields import CharPGPPublicKeyField, DatePGPPublicKeyField
 
 from apartment_application_service.models import TimestampedModel
+from users.blind_index import national_identification_number_index
 from users.enums import Roles
 
 _logger = logging.getLogger(__name__)
@@ -59,6 +62,16 @@ class User(AbstractUser):
             return getattr(self, field_name)
 
 
+class ProfileQuerySet(models.QuerySet):
+    def filter_by_national_identification_number(self, value: str) -> QuerySet:
+        """Filter by the national identification number using its blind index."""
+        return self.filter(
+            national_identification_number_index=national_identification_number_index(
+                value
+            )
+        )
+
+
 class Profile(TimestampedModel):
     CONTACT_LANGUAGE_CHOICES = [
         ("fi", _("Finnish")),
@@ -96,6 +109,15 @@ class Profile(TimestampedModel):
         blank=True,
         null=True,
     )
+    # Maintained on save, see users.blind_index
+    national_identification_number_index = models.CharField(
+        _("national identification number index"),
+        max_length=64,
+        blank=True,
+        null=True,
+        db_index=True,
+        editable=False,
+    )
     city = models.CharField(_("city"), max_length=50)
     postal_code = models.CharField(_("postal code"), max_length=10)
     contact_language = models.CharField(
@@ -104,6 +126,8 @@ class Profile(TimestampedModel):
         choices=CONTACT_LANGUAGE_CHOICES,
     )
 
+    objects = ProfileQuerySet.as_manager()
+
     @property
     def ssn_suffix(self):
         if self.national_identification_number:
@@ -135,6 +159,13 @@ class Profile(TimestampedModel):
             update_fields = list(update_fields)
             update_fields.remove("ssn_suffix")
             update_fields.append("national_identification_number")
+        self.national_identification_number_index = (
+            national_identification_number_index(self.national_identification_number)
+        )
+        if update_fields and "national_identification_number" in update_fields:
+            update_fields = list(update_fields) + [
+                "national_identification_number_index"
+            ]
         super(Profile, self).save(*args, update_fields=update_fields, **kwargs)
 
     def is_salesperson(self):
@@ -146,6 +177,14 @@ class Profile(TimestampedModel):
     class Meta:
         verbose_name = _("profile")
         verbose_name_plural = _("profiles")
+        # Trigram indexes for the icontains lookups of the customer search
+        indexes = [
+            GinIndex(
+                OpClass(Upper(Cast(field_name, TextField())), name="gin_trgm_ops"),
+                name=f"profile_{field_name}_trgm",
+            )
+            for field_name in ("first_name", "last_name", "phone_number", "email")
+        ]
 
     @property
     def full_name(self):
@@ -6,6 +6,8 @@ from django.db import models
 from django.db.models import Model
 from faker import Faker
 
+from users.blind_index import national_identification_number_index
+
 
 @pytest.mark.django_db
 def test_0021_decrypt_profile(migrator):
@@ -114,3 +116,43 @@ def test_0021_decrypt_profile(migrator):
 
     for k, v in profile_2_test_data.items():
         assert getattr(profile_2, k) == v
+
+
+@pytest.mark.django_db
+def test_0025_backfill_national_identification_number_index(migrator):
+    old_state = migrator.apply_initial_migration(
+        ("users", "0024_remove_userkeyvalue_unique_key_value_pairs_and_more")
+    )
+    OldProfile: Model = old_state.apps.get_model("users", "Profile")
+    profile_data = {
+        "city": "Helsinki",
+        "contact_language": "fi",
+        "email": "test@example.com",
+        "first_name": "Test",
+        "last_name": "Person",
+        "phone_number": "0401234567",
+        "postal_code": "00100",
+        "street_address": "Street 1",
+        "date_of_birth": date(1990, 1, 1),
+    }
+    with_nin = OldProfile.objects.create(
+        national_identification_number="010190-123A", **profile_data
+    )
+    without_nin = OldProfile.objects.create(
+        national_identification_number=None, **profile_data
+    )
+
+    new_state = migrator.apply_tested_migration(
+        ("users", "0025_profile_national_identification_number_index")
+    )
+
+    NewProfile: Model = new_state.apps.get_model("users", "Profile")
+    assert NewProfile.objects.get(
+        pk=with_nin.pk
+    ).national_identification_number_index == (
+        national_identification_number_index("010190-123A")
+    )
+    assert (
+        NewProfile.objects.get(pk=without_nin.pk).national_identification_number_index
+        is None
+    )
@@ -1,5 +1,7 @@
 import pytest
+from django.core.exceptions import ImproperlyConfigured
 
+from users.blind_index import national_identification_number_index
 from users.models import Profile
 from users.tests.factories import ProfileFactory
 
@@ -12,3 +14,32 @@ def test_profile_exist_after_user_is_deleted():
 
     assert Profile.objects.all().count() == 1
     assert Profile.objects.first().user is None
+
+
+@pytest.mark.django_db
+def test_profile_can_be_found_by_national_identification_number():
+    profile = ProfileFactory(national_identification_number="010190-123A")
+    ProfileFactory(national_identification_number="010190-124B")
+
+    assert profile.national_identification_number_index
+    assert list(
+        Profile.objects.filter_by_national_identification_number("010190-123a")
+    ) == [profile]
+
+    profile.ssn_suffix = "-125C"
+    profile.save(update_fields=["ssn_suffix"])
+
+    assert not Profile.objects.filter_by_national_identification_number(
+        "010190-123A"
+    ).exists()
+    assert (
+        Profile.objects.filter_by_national_identification_number("010190-125C").get()
+        == profile
+    )
+
+
+def test_national_identification_number_index_requires_key(settings):
+    settings.BLIND_INDEX_KEY = ""
+
+    with pytest.raises(ImproperlyConfigured):
+        national_identification_number_index("010190-123A")